@@ -9,12 +9,19 @@ from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
-from database.database import AsyncSessionLocal
+from database.database import create_db_engine, create_session_factory, get_pool_stats
 from database.models import Card, CardType
+from utils.card_index import card_index
+from utils.card_search import find_cards_by_names
 import config
 
 logger = logging.getLogger('api_server')
 
+# The API runs on its own event loop in a separate thread, so it can't share
+# the bot's pooled connections. Uploads are rare, so one connection per request is fine.
+api_engine = create_db_engine(pooled=False)
+AsyncSessionLocal = create_session_factory(api_engine)
+
 app = FastAPI(title="Football Card Bot API", version="1.0.0")
 
 def parse_card_type(event_str: str) -> CardType:
@@ -55,8 +62,13 @@ def extract_event_type(event_str: str) -> str:
     
     return event_map.get(event_lower, event_str.title())
 
-async def process_csv_row(session: AsyncSession, row: Dict[str, str], row_num: int) -> Dict[str, any]:
-    """Process a single CSV row and update/insert card"""
+async def process_csv_row(session: AsyncSession, row: Dict[str, str], row_num: int,
+                          existing_cards: Dict[str, Card]) -> Dict[str, any]:
+    """
+    Process a single CSV row and update/insert card.
+    existing_cards maps lowercased names to the upload's cards (see find_cards_by_names)
+    and gains the cards this row inserts.
+    """
     try:
         # Extract required fields
         player_name = row.get('player', '').strip()
@@ -94,10 +106,7 @@ async def process_csv_row(session: AsyncSession, row: Dict[str, str], row_num: i
         event_type = extract_event_type(event) if card_type == CardType.EVENT else None
         
         # Check if card exists (by name, case-insensitive)
-        result = await session.execute(
-            select(Card).where(Card.name.ilike(player_name))
-        )
-        existing_card = result.scalar_one_or_none()
+        existing_card = existing_cards.get(player_name.lower())
         
         if existing_card:
             # Update existing card
@@ -130,6 +139,7 @@ async def process_csv_row(session: AsyncSession, row: Dict[str, str], row_num: i
             session.add(new_card)
             await session.flush()
             await session.refresh(new_card)
+            existing_cards[player_name.lower()] = new_card
             
             return {
                 "row": row_num,
@@ -198,17 +208,25 @@ async def upload_csv(file: UploadFile = File(...)):
             )
         
         # Process rows
+        rows = list(csv_reader)
         results = []
         async with AsyncSessionLocal() as session:
+            # Look up every named card in one query instead of once per row
+            names = [(row.get('player') or '').strip() for row in rows]
+            existing_cards = await find_cards_by_names(session, names)
+            
             row_num = 1  # Start from 1 (header is row 0)
-            for row in csv_reader:
+            for row in rows:
                 row_num += 1
-                result = await process_csv_row(session, row, row_num)
+                result = await process_csv_row(session, row, row_num, existing_cards)
                 results.append(result)
             
             # Commit all changes
             await session.commit()
         
+        # Rebuild the bot's card index on next use
+        card_index.invalidate()
+        
         # Count statistics
         updated_count = sum(1 for r in results if r.get("status") == "updated")
         inserted_count = sum(1 for r in results if r.get("status") == "inserted")
@@ -240,6 +258,14 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/api/pool-stats")
+async def pool_stats():
+    """Connection pool metrics for the bot's database engine, plus the user display cache counters"""
+    stats = get_pool_stats()
+    user_cache = getattr(app.state, 'user_cache', None)
+    stats['user_cache'] = user_cache.stats() if user_cache is not None else None
+    return stats
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,197 @@
+"""
+Benchmark for the hot-path indexes
+Seeds a scratch database with synthetic users, cards, collections, teams,
+bets, spawns and leaderboard rows, then runs each cog lookup with the
+indexes missing and again after the index migrations create them,
+reporting the query plan and latency of both runs.
+Never point this at the bot's database: it drops and recreates every table.
+Usage: python benchmark_indexes.py [database_url] [users]
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import MetaData, select, insert, text, and_, or_
+from sqlalchemy.ext.asyncio import create_async_engine
+from database.database import Base
+from database.models import (
+    User, Card, Collection, Team, TeamSlot, Bet, Leaderboard, SpawnedCard, ActiveMatch, CardType
+)
+from database.migrations import MIGRATIONS
+
+DEFAULT_URL = 'sqlite+aiosqlite:///benchmark_indexes.db'
+POSITIONS = ['GK', 'LB', 'LCB', 'RCB', 'RB', 'LCM', 'CM', 'RCM', 'LW', 'ST', 'RW']
+GUILDS = 50
+CARDS = 5000
+CARDS_PER_USER = 100
+ITERATIONS = 200
+BATCH_SIZE = 5000
+
+# Indexes and unique constraints added for these lookups
+BENCHMARKED = {
+    'ix_collections_user_card',
+    'uq_collections_user_card',
+    'ix_collections_card_id',
+    'uq_team_slots_team_position',
+    'ix_leaderboard_guild_rank',
+    'uq_leaderboard_guild_user',
+    'ix_bets_guild_creator_challenged',
+    'uq_spawned_cards_message',
+    'uq_active_matches_channel',
+    'ix_cards_api_player_id',
+}
+
+def bare_metadata() -> MetaData:
+    """Copy of the models' schema without the benchmarked indexes and constraints"""
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        copy = table.to_metadata(metadata)
+        for index in list(copy.indexes):
+            if index.name in BENCHMARKED:
+                copy.indexes.discard(index)
+        for constraint in list(copy.constraints):
+            if constraint.name in BENCHMARKED:
+                copy.constraints.discard(constraint)
+    return metadata
+
+async def insert_rows(conn, model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        await conn.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+async def seed(engine, users: int, rng: random.Random):
+    """Create the schema without the benchmarked indexes and fill it"""
+    print(f"🌱 Seeding {users:,} users, {CARDS:,} cards, {users * CARDS_PER_USER:,} collection rows...")
+    start = time.perf_counter()
+    now = datetime.now(timezone.utc)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(bare_metadata().create_all)
+
+        await insert_rows(conn, Card, [
+            {'id': i, 'name': f"Player {i}", 'position': rng.choice(POSITIONS), 'api_player_id': 100000 + i,
+             'overall_rating': rng.randint(60, 95), 'attack_stat': rng.randint(30, 99),
+             'defense_stat': rng.randint(30, 99), 'card_type': CardType.BASE}
+            for i in range(1, CARDS + 1)
+        ])
+        await insert_rows(conn, User, [
+            {'id': i, 'username': f"user{i}"} for i in range(1, users + 1)
+        ])
+        await insert_rows(conn, Collection, [
+            {'user_id': user_id, 'card_id': card_id, 'quantity': rng.randint(1, 3)}
+            for user_id in range(1, users + 1) for card_id in rng.sample(range(1, CARDS + 1), CARDS_PER_USER)
+        ])
+        await insert_rows(conn, Team, [
+            {'id': i, 'user_id': i, 'guild_id': i % GUILDS, 'formation': '433'} for i in range(1, users + 1)
+        ])
+        await insert_rows(conn, TeamSlot, [
+            {'team_id': team_id, 'card_id': rng.randint(1, CARDS), 'position': pos}
+            for team_id in range(1, users + 1) for pos in POSITIONS
+        ])
+        await insert_rows(conn, Leaderboard, [
+            {'guild_id': i % GUILDS, 'user_id': i, 'points': rng.randint(0, 300)} for i in range(1, users + 1)
+        ])
+        await insert_rows(conn, Bet, [
+            {'guild_id': i % GUILDS, 'creator_id': i, 'challenged_id': rng.randint(1, users),
+             'creator_cards': [rng.randint(1, CARDS)], 'challenged_cards': []}
+            for i in range(1, users + 1)
+        ])
+        await insert_rows(conn, SpawnedCard, [
+            {'guild_id': i % GUILDS, 'channel_id': i % 500, 'message_id': 10**12 + i,
+             'card_id': rng.randint(1, CARDS), 'caught': True, 'expires_at': now - timedelta(days=1)}
+            for i in range(users * 2)
+        ])
+        await insert_rows(conn, ActiveMatch, [
+            {'guild_id': i % GUILDS, 'channel_id': 10**9 + i, 'player1_id': i, 'player2_id': i % users + 1,
+             'current_turn_player': i}
+            for i in range(1, users // 10 + 1)
+        ])
+
+    print(f"✅ Seeded in {time.perf_counter() - start:.1f}s\n")
+
+def cog_queries(users: int):
+    """(label, statement) for each lookup the cogs run on the hot path"""
+    user_id = users // 2
+    return [
+        ("collection: user's cards", select(Card.id, Card.name).join(Collection, Card.id == Collection.card_id)
+            .where(Collection.user_id == user_id).order_by(Card.overall_rating.desc())),
+        ("collection: owns card", select(Collection.id).where(Collection.user_id == user_id)
+            .where(Collection.card_id == 42)),
+        ("collection: card owners", select(Collection.user_id).where(Collection.card_id == 42)),
+        ("team: slot by position", select(TeamSlot).where(TeamSlot.team_id == user_id)
+            .where(TeamSlot.position == 'ST')),
+        ("team: full lineup", select(TeamSlot).where(TeamSlot.team_id == user_id)),
+        ("leaderboard: first page", select(Leaderboard.user_id, Leaderboard.points)
+            .where(Leaderboard.guild_id == 7).order_by(Leaderboard.points.desc(), Leaderboard.user_id).limit(11)),
+        ("leaderboard: user entry", select(Leaderboard).where(Leaderboard.guild_id == user_id % GUILDS)
+            .where(Leaderboard.user_id == user_id)),
+        ("match: open bet", select(Bet).where(Bet.guild_id == user_id % GUILDS)
+            .where(Bet.creator_id == user_id).where(Bet.challenged_id == 3)),
+        ("match: settle bets", select(Bet).where(Bet.guild_id == user_id % GUILDS).where(or_(
+            and_(Bet.creator_id == user_id, Bet.challenged_id == 3),
+            and_(Bet.creator_id == 3, Bet.challenged_id == user_id)))),
+        ("match: active by channel", select(ActiveMatch).where(ActiveMatch.channel_id == 10**9 + 5)),
+        ("spawn: by message", select(SpawnedCard).where(SpawnedCard.message_id == 10**12 + user_id)),
+        ("api: card by player id", select(Card).where(Card.api_player_id == 100000 + CARDS // 2)),
+    ]
+
+async def explain(conn, stmt) -> str:
+    """One-line query plan"""
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    if conn.dialect.name == 'sqlite':
+        rows = (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+        return '; '.join(row[-1] for row in rows)
+    rows = (await conn.execute(text(f"EXPLAIN {sql}"))).all()
+    return ' -> '.join(row[0].strip() for row in rows if 'Scan' in row[0] or 'Index' in row[0]) or rows[0][0]
+
+async def measure(engine, users: int) -> dict:
+    """{label: (ms per query, plan)}"""
+    results = {}
+    async with engine.connect() as conn:
+        for label, stmt in cog_queries(users):
+            plan = await explain(conn, stmt)
+            await conn.execute(stmt)  # Warm up
+            start = time.perf_counter()
+            for _ in range(ITERATIONS):
+                (await conn.execute(stmt)).all()
+            results[label] = ((time.perf_counter() - start) / ITERATIONS * 1000, plan)
+    return results
+
+def report(title: str, results: dict):
+    print(title)
+    for label, (ms, plan) in results.items():
+        print(f"  {label:<28} {ms:8.3f} ms   {plan}")
+    print()
+
+async def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else os.getenv('BENCHMARK_DATABASE_URL', DEFAULT_URL)
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    engine = create_async_engine(url)
+    rng = random.Random(42)
+
+    await seed(engine, users, rng)
+    before = await measure(engine, users)
+    report("📉 Without indexes", before)
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        start = time.perf_counter()
+        for migration in MIGRATIONS:
+            if not migration.transactional:
+                await migration.upgrade(conn)
+        print(f"🔧 Built indexes in {time.perf_counter() - start:.1f}s\n")
+        await conn.execute(text("ANALYZE"))
+
+    after = await measure(engine, users)
+    report("📈 With indexes", after)
+
+    print("Speedup")
+    for label in before:
+        print(f"  {label:<28} {before[label][0] / max(after[label][0], 1e-6):8.1f}x")
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
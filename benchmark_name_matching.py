@@ -0,0 +1,99 @@
+"""
+Benchmark for the name matching index
+Runs over the full card catalog and reports accuracy and lookup cost
+for exact names, surnames, missing accents and typos.
+Usage: python benchmark_name_matching.py [iterations]
+"""
+import random
+import sys
+import time
+from data.card_catalog import iter_all_cards
+from utils.name_matching import NameMatcher, is_match, name_profile, normalize_name, similarity
+import config
+
+def make_typo(name: str, rng: random.Random) -> str:
+    """Swap two adjacent letters somewhere in the name"""
+    letters = [i for i in range(len(name) - 1) if name[i].isalpha() and name[i + 1].isalpha()]
+    if not letters:
+        return name
+    i = rng.choice(letters)
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+def timed(label: str, func, queries, iterations: int):
+    """Run func over queries and print per-lookup cost"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for query in queries:
+            func(query)
+    elapsed = time.perf_counter() - start
+    per_op = elapsed / (iterations * len(queries)) * 1_000_000
+    print(f"  {label:<28} {per_op:8.2f} µs/lookup")
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rng = random.Random(42)
+    cards = list(iter_all_cards())
+    names = [card.name for card in cards]
+
+    print(f"📇 Catalog: {len(cards)} cards, {len(set(normalize_name(n) for n in names))} distinct normalized names")
+
+    # Build the index
+    start = time.perf_counter()
+    name_profile.cache_clear()
+    matcher = NameMatcher(cards)
+    print(f"🔨 Index built in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    exact = names
+    surnames = [name.split(' (')[0].split()[-1] for name in names]
+    folded = [normalize_name(name) for name in names]
+    typos = [make_typo(name.split(' (')[0], rng) for name in names]
+
+    print("\n🎯 Accuracy (best match has the same normalized name)")
+    for label, queries in (("exact", exact), ("no accents / suffix", folded), ("typo", typos)):
+        hits = 0
+        for query, card in zip(queries, cards):
+            best = matcher.match(query)
+            if best and normalize_name(best.name) == normalize_name(card.name):
+                hits += 1
+        print(f"  {label:<28} {hits}/{len(cards)} ({hits / len(cards):.1%})")
+
+    accepted = sum(is_match(query, card.name) for query, card in zip(typos, cards))
+    print(f"  catch accepts typo            {accepted}/{len(cards)} "
+          f"(threshold {config.CATCH_MATCH_THRESHOLD}, one edit per {config.CATCH_TYPO_CHARS} letters)")
+    rejected = sum(not is_match(surname, card.name) for surname, card in zip(surnames, cards)
+                   if normalize_name(surname) != normalize_name(card.name))
+    print(f"  catch rejects surname only    {rejected}")
+
+    # The catch threshold should sit above the closest pair of different players
+    # (catches don't accept part of a name, so names inside others are left out)
+    distinct = sorted(set(folded))
+    closest = max(
+        ((similarity(a, b), a, b) for i, a in enumerate(distinct) for b in distinct[i + 1:]
+         if a not in b and b not in a),
+        default=(0.0, '', '')
+    )
+    print(f"  closest distinct full names   {closest[0]:.2f} ('{closest[1]}' vs '{closest[2]}')")
+    # A guess of one player's full name must never catch another player
+    false_accepts = [(a, b) for a in distinct for b in distinct if a != b and is_match(a, b)]
+    print(f"  catch accepts another player  {len(false_accepts)}/{len(distinct) * (len(distinct) - 1)} pairs"
+          + (f" (e.g. '{false_accepts[0][0]}' vs '{false_accepts[0][1]}')" if false_accepts else ""))
+
+    print(f"\n⏱️  Lookup cost ({iterations} passes)")
+    timed("index exact", matcher.match, exact, iterations)
+    timed("index surname", matcher.match, surnames, iterations)
+    timed("index typo", matcher.match, typos, iterations)
+    timed("catch check (typo)", lambda pair: is_match(*pair), list(zip(typos, names)), iterations)
+    timed("catch check (exact)", lambda pair: is_match(*pair), list(zip(exact, names)), iterations)
+
+    # Baseline: the old substring scan over every name
+    def linear(query):
+        query = query.lower()
+        for name in names:
+            if name.lower() == query or query in name.lower():
+                return name
+        return None
+
+    timed("linear substring scan", linear, exact, iterations)
+
+if __name__ == "__main__":
+    main()
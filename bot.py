@@ -4,7 +4,11 @@ import asyncio
 import logging
 from database.database import init_db, AsyncSessionLocal
 from database.models import ServerConfig
-from utils.card_spawner import CardSpawner
+from utils.card_spawner import CardSpawner, CatchCardView
+from utils.message_counter import MessageCounter
+from utils.user_cache import UserCache
+from utils.card_index import card_index
+from utils.ratings import rating_index
 from sqlalchemy import select
 import config
 from api_server import app
@@ -31,12 +35,31 @@ class FootballCardBot(commands.Bot):
             help_command=None
         )
         self.card_spawner = CardSpawner(self)
+        self.message_counter = MessageCounter()
+        self.user_cache = UserCache(self)
     
     async def setup_hook(self):
         """Setup hook called when bot is starting"""
         logger.info("Initializing database...")
         await init_db()
         
+        # Start write-behind flushing of spawn message counters
+        self.message_counter.start()
+        
+        logger.info("Loading card index...")
+        await card_index.load()
+        card_index.start()
+        
+        logger.info("Loading rating index...")
+        await rating_index.load()
+        
+        # Restore uncaught spawns from before a restart and start expiring them
+        await self.card_spawner.restore_spawns()
+        self.card_spawner.registry.start()
+        
+        # One persistent catch button handler for spawn messages from previous runs
+        self.add_view(CatchCardView(self.card_spawner))
+        
         logger.info("Loading cogs...")
         cogs = [
             'cogs.help',
@@ -84,23 +107,27 @@ class FootballCardBot(commands.Bot):
         if not message.guild:
             return
         
-        # Check if this should trigger a spawn
-        async with AsyncSessionLocal() as session:
-            should_spawn, channel_id = await self.card_spawner.increment_message_count(
-                session, message.guild.id
-            )
-            
-            if should_spawn and channel_id:
-                # Spawn card in configured channel
-                try:
-                    await self.card_spawner.spawn_card(session, message.guild.id, channel_id)
-                    logger.info(f"Spawned card in guild {message.guild.id}")
-                except Exception as e:
-                    logger.error(f"Error spawning card: {e}")
+        # Check if this should trigger a spawn (in-memory, no database I/O)
+        should_spawn, channel_id = await self.message_counter.increment(message.guild.id)
+        
+        if should_spawn and channel_id:
+            # Spawn card in configured channel
+            try:
+                await self.card_spawner.spawn_card(message.guild.id, channel_id)
+                logger.info(f"Spawned card in guild {message.guild.id}")
+            except Exception as e:
+                logger.error(f"Error spawning card: {e}")
         
         # Process commands (if any)
         await self.process_commands(message)
     
+    async def close(self):
+        """Flush pending state before shutting down"""
+        await self.message_counter.stop()
+        await card_index.stop()
+        await self.card_spawner.registry.stop()
+        await super().close()
+    
     async def on_guild_join(self, guild: discord.Guild):
         """Called when bot joins a new guild"""
         logger.info(f"Joined new guild: {guild.name} (ID: {guild.id})")
@@ -201,6 +228,7 @@ def main():
     
     # Create and run bot (blocking)
     bot = FootballCardBot()
+    app.state.user_cache = bot.user_cache  # Reported by /api/pool-stats
     
     try:
         bot.run(config.DISCORD_BOT_TOKEN)
@@ -5,7 +5,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from database.database import AsyncSessionLocal
 from database.models import User, Card, Collection, PromoCode, Logo, CardType, LogoRarity, ServerConfig
-from utils.card_spawner import CardSpawner
+from utils.collection_ops import CollectionOps
+from utils.card_index import card_index
+from utils.card_search import search_cards
 from datetime import datetime, timedelta
 import random
 
@@ -14,7 +16,8 @@ class AdminCog(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        self.card_spawner = CardSpawner(bot)
+        # Share the bot's spawner so admin spawns use the same registry
+        self.card_spawner = bot.card_spawner
     
     @app_commands.command(name="admin_spawn", description="[ADMIN] Spawn 15 cards at once")
     @app_commands.checks.has_permissions(administrator=True)
@@ -35,20 +38,20 @@ class AdminCog(commands.Cog):
                 return
             
             channel_id = server_config.spawn_channel_id
-            
-            await interaction.response.send_message("🔄 Spawning 15 cards...", ephemeral=True)
-            
-            # Spawn 15 cards
-            for i in range(15):
-                await self.card_spawner.spawn_card(session, interaction.guild.id, channel_id)
-            
-            embed = discord.Embed(
-                title="✅ Cards Spawned!",
-                description=f"Successfully spawned 15 cards in <#{channel_id}>!",
-                color=discord.Color.green()
-            )
-            
-            await interaction.followup.send(embed=embed, ephemeral=True)
+        
+        await interaction.response.send_message("🔄 Spawning 15 cards...", ephemeral=True)
+        
+        # Spawn 15 cards
+        for i in range(15):
+            await self.card_spawner.spawn_card(interaction.guild.id, channel_id)
+        
+        embed = discord.Embed(
+            title="✅ Cards Spawned!",
+            description=f"Successfully spawned 15 cards in <#{channel_id}>!",
+            color=discord.Color.green()
+        )
+        
+        await interaction.followup.send(embed=embed, ephemeral=True)
     
     @app_commands.command(name="give_user", description="[ADMIN] Give a card to a user")
     @app_commands.describe(
@@ -61,17 +64,15 @@ class AdminCog(commands.Cog):
         """Give a specific card to a user"""
         async with AsyncSessionLocal() as session:
             # Find card
-            result = await session.execute(
-                select(Card).where(Card.name.ilike(f"%{card_name}%"))
-            )
-            card = result.scalar_one_or_none()
+            matches = await search_cards(card_name, limit=1)
             
-            if not card:
+            if not matches:
                 await interaction.response.send_message(
                     f"❌ Card '{card_name}' not found!",
                     ephemeral=True
                 )
                 return
+            card = matches[0]
             
             # Get or create user
             result = await session.execute(
@@ -85,13 +86,7 @@ class AdminCog(commands.Cog):
                 await session.flush()
             
             # Add to collection
-            collection_entry = Collection(
-                user_id=user.id,
-                card_id=card.id
-            )
-            session.add(collection_entry)
-            
-            db_user.cards_collected += 1
+            await CollectionOps.grant_cards(session, user.id, [card.id])
             
             await session.commit()
             
@@ -114,10 +109,7 @@ class AdminCog(commands.Cog):
         """Give all cards from a specific club to a user"""
         async with AsyncSessionLocal() as session:
             # Find all cards from club
-            result = await session.execute(
-                select(Card).where(Card.club.ilike(f"%{club_name}%"))
-            )
-            cards = result.scalars().all()
+            cards = await card_index.find_by_club(club_name)
             
             if not cards:
                 await interaction.response.send_message(
@@ -138,14 +130,7 @@ class AdminCog(commands.Cog):
                 await session.flush()
             
             # Add all cards to collection
-            for card in cards:
-                collection_entry = Collection(
-                    user_id=user.id,
-                    card_id=card.id
-                )
-                session.add(collection_entry)
-            
-            db_user.cards_collected += len(cards)
+            await CollectionOps.grant_cards(session, user.id, [card.id for card in cards])
             
             await session.commit()
             
@@ -168,12 +153,10 @@ class AdminCog(commands.Cog):
         """Give all cards from a specific event to a user"""
         async with AsyncSessionLocal() as session:
             # Find all event cards
-            result = await session.execute(
-                select(Card)
-                .where(Card.card_type == CardType.EVENT)
-                .where(Card.event_type.ilike(f"%{event_type}%"))
-            )
-            cards = result.scalars().all()
+            cards = [
+                card for card in await card_index.find_by_event_type(event_type)
+                if card.card_type == CardType.EVENT
+            ]
             
             if not cards:
                 await interaction.response.send_message(
@@ -194,14 +177,7 @@ class AdminCog(commands.Cog):
                 await session.flush()
             
             # Add all cards to collection
-            for card in cards:
-                collection_entry = Collection(
-                    user_id=user.id,
-                    card_id=card.id
-                )
-                session.add(collection_entry)
-            
-            db_user.cards_collected += len(cards)
+            await CollectionOps.grant_cards(session, user.id, [card.id for card in cards])
             
             await session.commit()
             
@@ -222,8 +198,8 @@ class AdminCog(commands.Cog):
         
         async with AsyncSessionLocal() as session:
             # Get all cards
-            result = await session.execute(select(Card))
-            cards = result.scalars().all()
+            await card_index.ensure_loaded()
+            cards = card_index.cards
             
             if not cards:
                 await interaction.followup.send(
@@ -244,14 +220,7 @@ class AdminCog(commands.Cog):
                 await session.flush()
             
             # Add all cards to collection
-            for card in cards:
-                collection_entry = Collection(
-                    user_id=user.id,
-                    card_id=card.id
-                )
-                session.add(collection_entry)
-            
-            db_user.cards_collected += len(cards)
+            await CollectionOps.grant_cards(session, user.id, [card.id for card in cards])
             
             await session.commit()
             
@@ -304,17 +273,15 @@ class AdminCog(commands.Cog):
                     return
                 
                 # Find card
-                result = await session.execute(
-                    select(Card).where(Card.name.ilike(f"%{card_name}%"))
-                )
-                card = result.scalar_one_or_none()
+                matches = await search_cards(card_name, limit=1)
                 
-                if not card:
+                if not matches:
                     await interaction.response.send_message(
                         f"❌ Card '{card_name}' not found!",
                         ephemeral=True
                     )
                     return
+                card = matches[0]
                 
                 reward = {"type": "card", "card_id": card.id}
             else:
@@ -7,6 +7,12 @@ from database.database import AsyncSessionLocal
 from database.models import User, Card, Collection, PromoCode, CardType
 from utils.embeds import EmbedBuilder
 from utils.api_football import APIFootball
+from utils.drop_table import drop_engine
+from utils.collection_ops import CollectionOps
+from utils.collection_pages import collection_pages
+from utils.card_search import search_cards
+from utils.owned_cards import owned_card_choices
+from typing import Dict, Optional
 from datetime import datetime, timedelta
 import config
 
@@ -42,24 +48,17 @@ class CollectionCog(commands.Cog):
         if not card:
             return None
         
-        # Add to collection
-        collection_entry = Collection(
-            user_id=user_id,
-            card_id=card.id
-        )
-        session.add(collection_entry)
-        
-        # Update user stats
-        result = await session.execute(
-            select(User).where(User.id == user_id)
-        )
-        user = result.scalar_one_or_none()
-        if user:
-            user.cards_collected += 1
+        # Add to collection and update user stats
+        await CollectionOps.grant_cards(session, user_id, [card.id])
         
         await session.commit()
         return card
     
+    async def _give_cards(self, session: AsyncSession, user: User, cards: list):
+        """Add already-drawn cards to a user's collection"""
+        await CollectionOps.grant_cards(session, user.id, [card.id for card in cards])
+        await session.commit()
+    
     @app_commands.command(name="pack", description="Open a pack")
     @app_commands.describe(pack_type="Type of pack to open")
     @app_commands.choices(pack_type=[
@@ -95,21 +94,11 @@ class CollectionCog(commands.Cog):
                 )
                 return
             
-            # Determine card type based on pack
-            card_type_map = {
-                'daily_pack': CardType.BASE,
-                'weekly_pack': CardType.ICON,
-                'event_pack': CardType.EVENT,
-                'premium_pack': None,  # Random
-                'booster_pack': CardType.BASE,
-            }
+            # Draw cards using the pack's weighted drop table
+            pack_size = config.PACK_SIZES.get(pack_type, 1)
+            cards = await drop_engine.draw_many(pack_type, pack_size)
             
-            card_type = card_type_map.get(pack_type)
-            
-            # Give random card
-            card = await self._give_random_card(session, interaction.user.id, card_type)
-            
-            if not card:
+            if not cards:
                 await interaction.response.send_message(
                     "❌ Error opening pack. Please try again later.",
                     ephemeral=True
@@ -119,12 +108,24 @@ class CollectionCog(commands.Cog):
             # Update cooldown
             cooldown_field = f"{pack_type}_cooldown"
             setattr(user, cooldown_field, datetime.utcnow())
-            await session.commit()
-            
-            # Show card
-            embed = EmbedBuilder.card_embed(card, show_full=True)
-            embed.title = f"📦 Pack Opened - {card.name}!"
-            embed.color = discord.Color.gold()
+            await self._give_cards(session, user, cards)
+            
+            # Show cards
+            if len(cards) == 1:
+                card = cards[0]
+                embed = EmbedBuilder.card_embed(card, show_full=True)
+                embed.title = f"📦 Pack Opened - {card.name}!"
+                embed.color = discord.Color.gold()
+            else:
+                cards = sorted(cards, key=lambda c: c.overall_rating, reverse=True)
+                embed = discord.Embed(
+                    title=f"📦 Pack Opened - {len(cards)} Cards!",
+                    description="\n".join(
+                        f"**{card.name}** - {card.position} ({card.overall_rating} OVR)"
+                        for card in cards
+                    ),
+                    color=discord.Color.gold()
+                )
             
             await interaction.response.send_message(embed=embed)
     
@@ -142,89 +143,41 @@ class CollectionCog(commands.Cog):
     async def view_collection(self, interaction: discord.Interaction, 
                              sort_by: str = "ovr", event_filter: str = None, page: int = 1):
         """View user's card collection"""
-        async with AsyncSessionLocal() as session:
-            # Get user
-            result = await session.execute(
-                select(User).where(User.id == interaction.user.id)
-            )
-            user = result.scalar_one_or_none()
-            
-            if not user:
-                await interaction.response.send_message(
-                    "You don't have any cards yet! Use `/pack` or catch spawned cards.",
-                    ephemeral=True
-                )
-                return
-            
-            # Get collection
-            query = (
-                select(Card, Collection)
-                .join(Collection, Card.id == Collection.card_id)
-                .where(Collection.user_id == interaction.user.id)
-            )
-            
-            # Apply event filter
+        view = CollectionView(interaction.user, sort_by, event_filter)
+        embed = await view.load_page(page)
+        
+        if embed is None:
             if event_filter:
-                query = query.where(Card.event_type == event_filter)
-            
-            # Apply sorting
-            if sort_by == "ovr":
-                query = query.order_by(Card.overall_rating.desc())
-            elif sort_by == "name":
-                query = query.order_by(Card.name)
-            elif sort_by == "date":
-                query = query.order_by(Collection.obtained_at.desc())
-            
-            result = await session.execute(query)
-            card_data = result.all()
-            
-            if not card_data:
+                await interaction.response.send_message("No cards found with those filters!", view=view, ephemeral=True)
+            else:
                 await interaction.response.send_message(
-                    "No cards found with those filters!",
-                    ephemeral=True
+                    "You don't have any cards yet! Use `/pack` or catch spawned cards.", ephemeral=True
                 )
-                return
-            
-            cards = [card for card, _ in card_data]
-            
-            # Pagination
-            cards_per_page = 10
-            total_pages = (len(cards) + cards_per_page - 1) // cards_per_page
-            page = max(1, min(page, total_pages))
-            
-            start_idx = (page - 1) * cards_per_page
-            end_idx = start_idx + cards_per_page
-            page_cards = cards[start_idx:end_idx]
-            
-            embed = EmbedBuilder.collection_embed(user, page_cards, page, total_pages, sort_by)
-            
-            await interaction.response.send_message(embed=embed)
+            return
+        
+        await interaction.response.send_message(embed=embed, view=view)
     
     @app_commands.command(name="show", description="Display a specific card in detail")
     @app_commands.describe(player_name="Name of the player to show")
     async def show_card(self, interaction: discord.Interaction, player_name: str):
         """Show detailed card information"""
-        async with AsyncSessionLocal() as session:
-            # Find card in user's collection
-            result = await session.execute(
-                select(Card, Collection)
-                .join(Collection, Card.id == Collection.card_id)
-                .where(Collection.user_id == interaction.user.id)
-                .where(Card.name.ilike(f"%{player_name}%"))
+        # Best match in user's collection
+        matches = await search_cards(player_name, owner=interaction.user.id, limit=1)
+        
+        if not matches:
+            await interaction.response.send_message(
+                f"You don't have a card matching '{player_name}'!",
+                ephemeral=True
             )
-            card_data = result.first()
-            
-            if not card_data:
-                await interaction.response.send_message(
-                    f"You don't have a card matching '{player_name}'!",
-                    ephemeral=True
-                )
-                return
-            
-            card, _ = card_data
-            
-            embed = EmbedBuilder.card_embed(card, show_full=True)
-            await interaction.response.send_message(embed=embed)
+            return
+        
+        embed = EmbedBuilder.card_embed(matches[0], show_full=True)
+        await interaction.response.send_message(embed=embed)
+    
+    @show_card.autocomplete('player_name')
+    async def show_card_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Suggest cards from the user's collection"""
+        return await owned_card_choices(interaction.user.id, current)
     
     @app_commands.command(name="stats", description="View your statistics")
     async def view_stats(self, interaction: discord.Interaction):
@@ -356,12 +309,7 @@ class CollectionCog(commands.Cog):
                 # Give specific card
                 card_id = reward.get('card_id')
                 if card_id:
-                    collection_entry = Collection(
-                        user_id=interaction.user.id,
-                        card_id=card_id
-                    )
-                    session.add(collection_entry)
-                    user.cards_collected += 1
+                    await CollectionOps.grant_cards(session, interaction.user.id, [card_id])
                     reward_text = "You received a special card!"
             
             elif reward['type'] == 'pack':
@@ -407,6 +355,142 @@ class CollectionCog(commands.Cog):
         
         await interaction.response.send_message(embed=embed)
 
+SORT_LABELS = {
+    'ovr': "Overall Rating",
+    'name': "Alphabetical",
+    'date': "Recently Obtained",
+}
+
+class CollectionView(discord.ui.View):
+    """
+    Collection browser: page buttons, a jump-to-page dialog and sort/filter selects.
+    Pages come through the collection page cache and the neighbours of the page
+    on screen are prefetched, so paging usually answers without a query.
+    """
+    
+    PAGE_SIZE = 10
+    
+    def __init__(self, user: discord.abc.User, sort_by: str, event_filter: Optional[str]):
+        super().__init__(timeout=180)
+        self.user = user
+        self.sort_by = sort_by
+        self.event_filter = event_filter
+        self.page = 1
+        self.total_pages = 1
+        self.cursors: Dict[int, Optional[str]] = {1: None}  # {page: cursor that starts it}
+        
+        self.sort_select.options = [
+            discord.SelectOption(label=label, value=value) for value, label in SORT_LABELS.items()
+        ]
+        self.filter_select.options = [discord.SelectOption(label="All Cards", value="all")] + [
+            discord.SelectOption(label=event_type, value=event_type) for event_type in config.EVENT_TYPES
+        ]
+        self._mark_selected()
+    
+    def _mark_selected(self):
+        for option in self.sort_select.options:
+            option.default = option.value == self.sort_by
+        for option in self.filter_select.options:
+            option.default = option.value == (self.event_filter or "all")
+    
+    def _set_buttons(self, has_next: bool):
+        self.previous_page.disabled = self.page == 1
+        self.next_page.disabled = not has_next
+        self.jump_to_page.disabled = self.total_pages <= 1
+    
+    async def load_page(self, page: int) -> Optional[discord.Embed]:
+        """Fetch a page and update the components. Returns None if nothing matches."""
+        total_cards, total_copies = await collection_pages.count(self.user.id, self.event_filter)
+        if not total_cards:
+            self.page = self.total_pages = 1
+            self._set_buttons(False)
+            return None
+        
+        self.total_pages = (total_cards + self.PAGE_SIZE - 1) // self.PAGE_SIZE
+        self.page = max(1, min(page, self.total_pages))
+        
+        # Pages reached by paging follow their cursor; a direct jump is read by offset
+        entries, next_cursor = await collection_pages.fetch(
+            self.user.id, self.sort_by, self.event_filter, self.PAGE_SIZE, self.page, self.cursors.get(self.page)
+        )
+        if next_cursor:
+            self.cursors[self.page + 1] = next_cursor
+            collection_pages.prefetch(
+                self.user.id, self.sort_by, self.event_filter, self.PAGE_SIZE, self.page + 1, next_cursor
+            )
+        if self.page > 1:
+            collection_pages.prefetch(
+                self.user.id, self.sort_by, self.event_filter, self.PAGE_SIZE,
+                self.page - 1, self.cursors.get(self.page - 1)
+            )
+        
+        self._set_buttons(next_cursor is not None)
+        return EmbedBuilder.collection_embed(
+            self.user.name, entries, self.page, self.total_pages, self.sort_by, total_cards, total_copies
+        )
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Only the collection's owner can browse it"""
+        return interaction.user.id == self.user.id
+    
+    async def show(self, interaction: discord.Interaction, page: int):
+        """Load a page and edit the browser message in place"""
+        embed = await self.load_page(page)
+        if embed is None:
+            await interaction.response.edit_message(content="No cards found with those filters!", embed=None, view=self)
+            return
+        await interaction.response.edit_message(content=None, embed=embed, view=self)
+    
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary, row=0)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page - 1)
+    
+    @discord.ui.button(label="Go to page", style=discord.ButtonStyle.primary, row=0)
+    async def jump_to_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(JumpToPageModal(self))
+    
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary, row=0)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page + 1)
+    
+    @discord.ui.select(placeholder="Sort by", row=1)
+    async def sort_select(self, interaction: discord.Interaction, select: discord.ui.Select):
+        self.sort_by = select.values[0]
+        self.cursors = {1: None}
+        self._mark_selected()
+        await self.show(interaction, 1)
+    
+    @discord.ui.select(placeholder="Filter by event", row=2)
+    async def filter_select(self, interaction: discord.Interaction, select: discord.ui.Select):
+        self.event_filter = None if select.values[0] == "all" else select.values[0]
+        self.cursors = {1: None}
+        self._mark_selected()
+        await self.show(interaction, 1)
+
+class JumpToPageModal(discord.ui.Modal, title="Go to Page"):
+    """Modal for entering a collection page number"""
+    
+    page_number = discord.ui.TextInput(
+        label="Page",
+        placeholder="Enter a page number...",
+        required=True,
+        max_length=6
+    )
+    
+    def __init__(self, view: CollectionView):
+        super().__init__()
+        self.view = view
+        self.page_number.placeholder = f"1 - {view.total_pages}"
+    
+    async def on_submit(self, interaction: discord.Interaction):
+        """Show the requested page (clamped to the collection)"""
+        try:
+            page = int(self.page_number.value)
+        except ValueError:
+            await interaction.response.send_message("Please enter a page number.", ephemeral=True)
+            return
+        await self.view.show(interaction, page)
+
 async def setup(bot):
     await bot.add_cog(CollectionCog(bot))
 
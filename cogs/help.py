@@ -122,6 +122,7 @@ class HelpCog(commands.Cog):
                 value=(
                     "• `/match start <user>` - Challenge another user\n"
                     "• `/select <player>` - Select a player for the current round\n"
+                    "• `/predict <user>` - Estimate your odds against another team\n"
                     "• Match system: 11 rounds, highest stat wins each round\n"
                     "• Attack plays vs Defense stat\n"
                     "• Formation and chemistry affect stats!"
@@ -141,7 +142,8 @@ class HelpCog(commands.Cog):
                 name="Leaderboard",
                 value=(
                     "• `/leaderboard` - View server rankings\n"
-                    "• Win = 3 points | Draw = 1 point | Loss = 0 points"
+                    "• Win = 3 points | Draw = 1 point | Loss = 0 points\n"
+                    "• `/rating [user]` - Global Elo rating, rank and percentile"
                 ),
                 inline=False
             )
@@ -2,13 +2,20 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select, update, delete
 from database.database import AsyncSessionLocal
-from database.models import User, Team, TeamSlot, Card, Match, ActiveMatch, Bet, Leaderboard, Collection
+from database.models import Team, TeamSlot, Card, ActiveMatch, Bet, Collection, PlayerRating
 from utils.embeds import EmbedBuilder
 from utils.match_engine import MatchEngine, MatchState
+from utils.name_matching import NameMatcher, normalize_name
+from utils.match_simulator import BatchSimulator
+from utils.match_settlement import MatchSettlement
+from utils.leaderboard import leaderboard_service
+from utils.ratings import rating_index
+from utils.card_index import card_index
+from utils.card_search import search_cards
+from utils.owned_cards import owned_card_choices
 from typing import Dict, Optional
-import json
 
 class MatchCog(commands.Cog):
     """Match and betting commands"""
@@ -17,6 +24,49 @@ class MatchCog(commands.Cog):
         self.bot = bot
         self.active_matches = {}  # {channel_id: MatchState}
     
+    async def cog_load(self):
+        """Rehydrate in-progress matches saved before a restart"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(ActiveMatch))
+            rows = result.scalars().all()
+            
+            # Every card referenced by any checkpoint comes from the catalog
+            card_ids = set()
+            for row in rows:
+                card_ids |= MatchState.checkpoint_card_ids(row.game_state)
+            cards_by_id = await card_index.get_many(card_ids)
+            
+            stale = []
+            for row in rows:
+                match_state = MatchState.from_checkpoint(
+                    row.player1_id, row.player2_id, row.game_state, cards_by_id
+                )
+                if match_state is None or match_state.is_complete():
+                    stale.append(row.id)
+                    continue
+                self.active_matches[row.channel_id] = match_state
+            
+            # Matches without a usable checkpoint can't be resumed
+            if stale:
+                await session.execute(delete(ActiveMatch).where(ActiveMatch.id.in_(stale)))
+                await session.commit()
+    
+    async def _checkpoint_match(self, channel_id: int, match_state: MatchState):
+        """Save the match state after a round so it survives a restart"""
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(ActiveMatch)
+                .where(ActiveMatch.channel_id == channel_id)
+                .values(
+                    current_round=match_state.current_round,
+                    player1_score=match_state.player1_score,
+                    player2_score=match_state.player2_score,
+                    current_turn_player=match_state.current_turn,
+                    game_state=match_state.to_checkpoint()
+                )
+            )
+            await session.commit()
+    
     async def _get_team_data(self, session: AsyncSession, user_id: int) -> tuple[Optional[Team], Dict]:
         """Get team and slots for a user"""
         result = await session.execute(
@@ -27,15 +77,15 @@ class MatchCog(commands.Cog):
         if not team or not team.formation:
             return None, {}
         
-        # Get team slots
+        # Get team slots; card details come from the catalog
         result = await session.execute(
-            select(TeamSlot, Card)
-            .join(Card, TeamSlot.card_id == Card.id)
+            select(TeamSlot.position, TeamSlot.card_id)
             .where(TeamSlot.team_id == team.id)
         )
         slots = result.all()
+        cards_by_id = await card_index.get_many(card_id for _, card_id in slots)
         
-        team_slots = {slot.position: card for slot, card in slots}
+        team_slots = {position: cards_by_id[card_id] for position, card_id in slots if card_id in cards_by_id}
         
         # Ensure we have 11 players
         if len(team_slots) < 11:
@@ -43,39 +93,6 @@ class MatchCog(commands.Cog):
         
         return team, team_slots
     
-    async def _update_leaderboard(self, session: AsyncSession, guild_id: int, 
-                                  user_id: int, won: bool, draw: bool):
-        """Update leaderboard entry for a user"""
-        result = await session.execute(
-            select(Leaderboard)
-            .where(Leaderboard.guild_id == guild_id)
-            .where(Leaderboard.user_id == user_id)
-        )
-        lb_entry = result.scalar_one_or_none()
-        
-        if not lb_entry:
-            lb_entry = Leaderboard(
-                guild_id=guild_id,
-                user_id=user_id,
-                points=0,
-                wins=0,
-                draws=0,
-                losses=0
-            )
-            session.add(lb_entry)
-        
-        # Update stats
-        if won:
-            lb_entry.wins += 1
-            lb_entry.points += 3
-        elif draw:
-            lb_entry.draws += 1
-            lb_entry.points += 1
-        else:
-            lb_entry.losses += 1
-        
-        await session.commit()
-    
     @app_commands.command(name="match", description="Start a match against another user")
     @app_commands.describe(opponent="The user you want to challenge")
     async def start_match(self, interaction: discord.Interaction, opponent: discord.Member):
@@ -127,6 +144,10 @@ class MatchCog(commands.Cog):
             # Store in active matches
             self.active_matches[interaction.channel_id] = match_state
             
+            # Prime the name cache so rounds never need to look the players up
+            self.bot.user_cache.remember(interaction.user)
+            self.bot.user_cache.remember(opponent)
+            
             # Create active match record in database
             active_match = ActiveMatch(
                 guild_id=interaction.guild.id,
@@ -135,7 +156,7 @@ class MatchCog(commands.Cog):
                 player2_id=opponent.id,
                 current_round=1,
                 current_turn_player=interaction.user.id,
-                game_state={}
+                game_state=match_state.to_checkpoint()
             )
             session.add(active_match)
             await session.commit()
@@ -189,10 +210,10 @@ class MatchCog(commands.Cog):
         
         # Find matching card
         selected_position = None
-        for position, card in available_cards.items():
-            if card.name.lower() == player_name.lower() or player_name.lower() in card.name.lower():
-                selected_position = position
-                break
+        matcher = NameMatcher(available_cards.items(), key=lambda item: item[1].name)
+        best = matcher.match(player_name)
+        if best:
+            selected_position = best[0]
         
         if not selected_position:
             await interaction.response.send_message(
@@ -214,7 +235,6 @@ class MatchCog(commands.Cog):
             )
             
             # Notify player 2
-            player2 = await self.bot.fetch_user(match_state.player2_id)
             embed = discord.Embed(
                 title="⚽ Your Turn!",
                 description=f"Use `/select <player_name>` to choose your player for Round {match_state.current_round}",
@@ -247,8 +267,11 @@ class MatchCog(commands.Cog):
             round_data = match_state.play_round(player1_position, player2_position)
             
             # Show round result
-            player1 = await self.bot.fetch_user(match_state.player1_id)
-            player2 = await self.bot.fetch_user(match_state.player2_id)
+            players = await self.bot.user_cache.get_many(
+                [match_state.player1_id, match_state.player2_id], interaction.guild
+            )
+            player1 = players[match_state.player1_id]
+            player2 = players[match_state.player2_id]
             
             embed = EmbedBuilder.match_round_embed(
                 round_data,
@@ -262,144 +285,95 @@ class MatchCog(commands.Cog):
             if match_state.is_complete():
                 await self._complete_match(interaction, match_state)
             else:
+                await self._checkpoint_match(interaction.channel_id, match_state)
+                
                 # Next round
-                next_player = await self.bot.fetch_user(match_state.current_turn)
                 embed = discord.Embed(
                     title=f"⚽ Round {match_state.current_round}",
-                    description=f"{next_player.mention}, use `/select <player_name>` to choose!",
+                    description=f"<@{match_state.current_turn}>, use `/select <player_name>` to choose!",
                     color=discord.Color.blue()
                 )
                 await interaction.channel.send(embed=embed)
     
+    @select_player.autocomplete('player_name')
+    async def select_player_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Suggest the user's players still available this match"""
+        match_state = self.active_matches.get(interaction.channel_id)
+        if match_state is None or interaction.user.id not in (match_state.player1_id, match_state.player2_id):
+            return []
+        
+        query = normalize_name(current)
+        available = match_state.get_available_cards(interaction.user.id)
+        return [
+            app_commands.Choice(name=f"{card.name} ({position}, {card.overall_rating})"[:100], value=card.name[:100])
+            for position, card in available.items()
+            if query in normalize_name(card.name)
+        ][:25]
+    
     async def _complete_match(self, interaction: discord.Interaction, match_state: MatchState):
         """Complete a match and update records"""
+        # Get users
+        players = await self.bot.user_cache.get_many(
+            [match_state.player1_id, match_state.player2_id], interaction.guild
+        )
+        player1 = players[match_state.player1_id]
+        player2 = players[match_state.player2_id]
+        
+        # Record match, stats, leaderboard and bets in a single transaction
         async with AsyncSessionLocal() as session:
-            # Get users
-            player1 = await self.bot.fetch_user(match_state.player1_id)
-            player2 = await self.bot.fetch_user(match_state.player2_id)
-            
-            # Create match record
-            winner_id = match_state.get_winner()
-            
-            match_record = Match(
-                guild_id=interaction.guild.id,
-                player1_id=match_state.player1_id,
-                player2_id=match_state.player2_id,
-                player1_score=match_state.player1_score,
-                player2_score=match_state.player2_score,
-                winner_id=winner_id,
-                match_details=json.dumps([r for r in match_state.round_history]),
-                completed_at=discord.utils.utcnow()
-            )
-            session.add(match_record)
-            
-            # Update user stats
-            result = await session.execute(
-                select(User).where(User.id.in_([match_state.player1_id, match_state.player2_id]))
-            )
-            users = result.scalars().all()
-            
-            for user in users:
-                user.total_games += 1
-                if winner_id == user.id:
-                    user.total_wins += 1
-                elif winner_id is None:
-                    user.total_draws += 1
-                else:
-                    user.total_losses += 1
-            
-            # Update leaderboard
-            await self._update_leaderboard(
-                session, interaction.guild.id, match_state.player1_id,
-                won=(winner_id == match_state.player1_id),
-                draw=(winner_id is None)
-            )
-            await self._update_leaderboard(
-                session, interaction.guild.id, match_state.player2_id,
-                won=(winner_id == match_state.player2_id),
-                draw=(winner_id is None)
-            )
-            
-            # Remove active match
-            await session.execute(
-                select(ActiveMatch)
-                .where(ActiveMatch.channel_id == interaction.channel_id)
-            )
-            result = await session.execute(
-                select(ActiveMatch).where(ActiveMatch.channel_id == interaction.channel_id)
-            )
-            active = result.scalar_one_or_none()
-            if active:
-                await session.delete(active)
-            
-            await session.commit()
-            
-            # Show match complete embed
-            embed = EmbedBuilder.match_complete_embed(match_state, player1.name, player2.name)
-            await interaction.channel.send(embed=embed)
-            
-            # Process any active bets
-            await self._process_bets(session, interaction.guild.id, 
-                                    match_state.player1_id, match_state.player2_id, winner_id)
-            
-            # Remove from active matches
-            del self.active_matches[interaction.channel_id]
+            await MatchSettlement.settle(session, interaction.guild.id, interaction.channel_id, match_state)
+        
+        # Remove from active matches
+        del self.active_matches[interaction.channel_id]
+        
+        # Show match complete embed
+        embed = EmbedBuilder.match_complete_embed(match_state, player1.name, player2.name)
+        await interaction.channel.send(embed=embed)
     
-    async def _process_bets(self, session: AsyncSession, guild_id: int,
-                           player1_id: int, player2_id: int, winner_id: Optional[int]):
-        """Process bets for completed match"""
-        result = await session.execute(
-            select(Bet)
-            .where(Bet.guild_id == guild_id)
-            .where(Bet.accepted == True)
-            .where(Bet.completed == False)
-            .where(
-                ((Bet.creator_id == player1_id) & (Bet.challenged_id == player2_id)) |
-                ((Bet.creator_id == player2_id) & (Bet.challenged_id == player1_id))
+    @app_commands.command(name="predict", description="Estimate your chances against another user's team")
+    @app_commands.describe(opponent="The user whose team you want to face")
+    async def predict(self, interaction: discord.Interaction, opponent: discord.Member):
+        """Simulate many matches between two teams and show the odds"""
+        async with AsyncSessionLocal() as session:
+            player1_team, player1_slots = await self._get_team_data(session, interaction.user.id)
+            player2_team, player2_slots = await self._get_team_data(session, opponent.id)
+        
+        if not player1_team or not player1_slots:
+            await interaction.response.send_message(
+                "❌ You need a complete team with 11 players to predict a match!",
+                ephemeral=True
             )
+            return
+        
+        if not player2_team or not player2_slots:
+            await interaction.response.send_message(
+                f"❌ {opponent.mention} doesn't have a complete team!",
+                ephemeral=True
+            )
+            return
+        
+        simulator = BatchSimulator.from_teams(
+            player1_slots, player1_team.formation,
+            player2_slots, player2_team.formation
         )
-        bets = result.scalars().all()
+        prediction = simulator.run()
         
-        for bet in bets:
-            if winner_id is None:
-                # Draw - return cards
-                bet.completed = True
-                continue
-            
-            # Transfer cards to winner
-            if winner_id == bet.creator_id:
-                loser_id = bet.challenged_id
-                loser_cards = bet.challenged_cards
-                winner_id_bet = bet.creator_id
-            else:
-                loser_id = bet.creator_id
-                loser_cards = bet.creator_cards
-                winner_id_bet = bet.challenged_id
-            
-            # Remove cards from loser and give to winner
-            for card_id in loser_cards:
-                # Remove from loser
-                result = await session.execute(
-                    select(Collection)
-                    .where(Collection.user_id == loser_id)
-                    .where(Collection.card_id == card_id)
-                    .limit(1)
-                )
-                collection = result.scalar_one_or_none()
-                if collection:
-                    await session.delete(collection)
-                
-                # Give to winner
-                new_collection = Collection(
-                    user_id=winner_id_bet,
-                    card_id=card_id
-                )
-                session.add(new_collection)
-            
-            bet.completed = True
-            bet.winner_id = winner_id
+        embed = discord.Embed(
+            title="🔮 Match Prediction",
+            description=f"{interaction.user.mention} vs {opponent.mention}\n"
+                        f"Based on {prediction.matches:,} simulated matches",
+            color=discord.Color.purple()
+        )
+        embed.add_field(name=f"{interaction.user.display_name} Wins", value=f"{prediction.player1_win:.1%}", inline=True)
+        embed.add_field(name="Draw", value=f"{prediction.draw:.1%}", inline=True)
+        embed.add_field(name=f"{opponent.display_name} Wins", value=f"{prediction.player2_win:.1%}", inline=True)
+        embed.add_field(
+            name="Expected Score",
+            value=f"{prediction.player1_expected_score:.1f} - {prediction.player2_expected_score:.1f}",
+            inline=False
+        )
         
-        await session.commit()
+        await interaction.response.send_message(embed=embed, ephemeral=True)
     
     @app_commands.command(name="bet", description="Bet cards against another user")
     @app_commands.describe(
@@ -418,22 +392,16 @@ class MatchCog(commands.Cog):
         
         async with AsyncSessionLocal() as session:
             # Find card in collection
-            result = await session.execute(
-                select(Card, Collection)
-                .join(Collection, Card.id == Collection.card_id)
-                .where(Collection.user_id == interaction.user.id)
-                .where(Card.name.ilike(f"%{card_name}%"))
-            )
-            card_data = result.first()
+            matches = await search_cards(card_name, owner=interaction.user.id, limit=1)
             
-            if not card_data:
+            if not matches:
                 await interaction.response.send_message(
                     f"❌ You don't have a card matching '{card_name}'!",
                     ephemeral=True
                 )
                 return
             
-            card, _ = card_data
+            card = matches[0]
             
             # Check for existing bet
             result = await session.execute(
@@ -487,24 +455,100 @@ class MatchCog(commands.Cog):
                 
                 await interaction.response.send_message(embed=embed)
     
+    @create_bet.autocomplete('card_name')
+    async def bet_card_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Suggest cards from the user's collection"""
+        return await owned_card_choices(interaction.user.id, current)
+    
     @app_commands.command(name="leaderboard", description="View the server leaderboard")
     async def view_leaderboard(self, interaction: discord.Interaction):
         """Show server leaderboard"""
+        view = LeaderboardView(interaction.guild, interaction.user.id)
+        embed = await view.load_page()
+        
+        if view.has_pages:
+            await interaction.response.send_message(embed=embed, view=view)
+        else:
+            await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="rating", description="View a global Elo rating")
+    @app_commands.describe(user="The user to look up (defaults to you)")
+    async def view_rating(self, interaction: discord.Interaction, user: Optional[discord.Member] = None):
+        """Show a user's global rating, rank and percentile"""
+        user = user or interaction.user
+        
         async with AsyncSessionLocal() as session:
             result = await session.execute(
-                select(Leaderboard, User)
-                .join(User, Leaderboard.user_id == User.id)
-                .where(Leaderboard.guild_id == interaction.guild.id)
-                .order_by(Leaderboard.points.desc())
+                select(PlayerRating.rating, PlayerRating.games)
+                .where(PlayerRating.user_id == user.id)
             )
-            entries = result.all()
-            
-            embed = EmbedBuilder.leaderboard_embed(
-                interaction.guild.name,
-                [(user, lb) for lb, user in entries]
+            row = result.first()
+        
+        if not row:
+            await interaction.response.send_message(
+                f"❌ {user.mention} hasn't played a rated match yet!",
+                ephemeral=True
             )
-            
-            await interaction.response.send_message(embed=embed)
+            return
+        
+        rating, games = row
+        embed = discord.Embed(
+            title=f"📈 {user.display_name}'s Rating",
+            description="Global Elo rating across all servers",
+            color=discord.Color.gold()
+        )
+        embed.add_field(name="Rating", value=f"{rating:.0f}", inline=True)
+        embed.add_field(name="Matches", value=str(games), inline=True)
+        if rating_index.loaded:
+            rank = rating_index.rank(rating)
+            embed.add_field(name="Global Rank", value=f"#{rank:,} of {rating_index.total:,}", inline=True)
+            embed.add_field(name="Percentile", value=f"{rating_index.percentile(rating):.1f}", inline=True)
+        
+        await interaction.response.send_message(embed=embed)
+
+class LeaderboardView(discord.ui.View):
+    """Next/previous buttons over keyset-paginated leaderboard pages"""
+    
+    PAGE_SIZE = 10
+    
+    def __init__(self, guild: discord.Guild, owner_id: int):
+        super().__init__(timeout=120)
+        self.guild = guild
+        self.owner_id = owner_id
+        self.cursors = [None]  # Cursor that starts each visited page
+        self.next_cursor = None
+    
+    @property
+    def has_pages(self) -> bool:
+        return self.next_cursor is not None or len(self.cursors) > 1
+    
+    async def load_page(self) -> discord.Embed:
+        """Fetch the current page and update the buttons"""
+        rows, self.next_cursor = await leaderboard_service.get_page(
+            self.guild.id, self.PAGE_SIZE, self.cursors[-1]
+        )
+        self.previous_page.disabled = len(self.cursors) == 1
+        self.next_page.disabled = self.next_cursor is None
+        start_rank = (len(self.cursors) - 1) * self.PAGE_SIZE + 1
+        return EmbedBuilder.leaderboard_embed(self.guild.name, rows, start_rank)
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Only the user who opened the leaderboard can page it"""
+        return interaction.user.id == self.owner_id
+    
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+        embed = await self.load_page()
+        await interaction.response.edit_message(embed=embed, view=self)
+    
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.next_cursor is not None:
+            self.cursors.append(self.next_cursor)
+        embed = await self.load_page()
+        await interaction.response.edit_message(embed=embed, view=self)
 
 async def setup(bot):
     await bot.add_cog(MatchCog(bot))
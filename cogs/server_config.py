@@ -44,6 +44,11 @@ class ServerConfigCog(commands.Cog):
             
             await session.commit()
             
+            # Keep the in-memory spawn counter in sync
+            self.bot.message_counter.update_config(
+                interaction.guild.id, spawn_channel_id=channel.id, spawn_enabled=True
+            )
+            
             embed = discord.Embed(
                 title="✅ Server Configured!",
                 description=f"Cards will now spawn in {channel.mention}!",
@@ -82,6 +87,10 @@ class ServerConfigCog(commands.Cog):
             server_config.spawn_enabled = not server_config.spawn_enabled
             await session.commit()
             
+            self.bot.message_counter.update_config(
+                interaction.guild.id, spawn_enabled=server_config.spawn_enabled
+            )
+            
             status = "enabled" if server_config.spawn_enabled else "disabled"
             
             embed = discord.Embed(
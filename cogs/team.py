@@ -7,6 +7,9 @@ from database.database import AsyncSessionLocal
 from database.models import User, Team, TeamSlot, Card, Collection, Logo
 from utils.embeds import EmbedBuilder
 from utils.formations import FormationManager
+from utils.card_index import card_index
+from utils.card_search import search_cards
+from utils.owned_cards import owned_card_choices
 import config
 
 class TeamCog(commands.Cog):
@@ -162,15 +165,15 @@ class TeamCog(commands.Cog):
                 )
                 return
             
-            # Get team slots
+            # Get team slots; card details come from the catalog
             result = await session.execute(
-                select(TeamSlot, Card)
-                .join(Card, TeamSlot.card_id == Card.id)
+                select(TeamSlot.position, TeamSlot.card_id)
                 .where(TeamSlot.team_id == team.id)
             )
             slots = result.all()
+            cards_by_id = await card_index.get_many(card_id for _, card_id in slots)
             
-            team_slots = {slot.position: card for slot, card in slots}
+            team_slots = {position: cards_by_id[card_id] for position, card_id in slots if card_id in cards_by_id}
             
             # Get logo bonus
             logo_bonus = 0
@@ -235,22 +238,16 @@ class TeamCog(commands.Cog):
                     return
                 
                 # Find card in user's collection
-                result = await session.execute(
-                    select(Card, Collection)
-                    .join(Collection, Card.id == Collection.card_id)
-                    .where(Collection.user_id == interaction.user.id)
-                    .where(Card.name.ilike(f"%{player_name}%"))
-                )
-                card_data = result.first()
+                matches = await search_cards(player_name, owner=interaction.user.id, limit=1)
                 
-                if not card_data:
+                if not matches:
                     await interaction.response.send_message(
                         f"You don't have a card matching '{player_name}' in your collection!",
                         ephemeral=True
                     )
                     return
                 
-                card, _ = card_data
+                card = matches[0]
                 
                 # Check if position is already occupied
                 result = await session.execute(
@@ -346,6 +343,11 @@ class TeamCog(commands.Cog):
                 )
                 await interaction.response.send_message(embed=embed)
     
+    @player_manage.autocomplete('player_name')
+    async def player_name_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Suggest cards from the user's collection"""
+        return await owned_card_choices(interaction.user.id, current)
+    
     @app_commands.command(name="logo", description="Manage your team logo")
     @app_commands.describe(
         action="What do you want to do?",
@@ -15,6 +15,17 @@ POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD')
 
 DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
+# Connection pool ("queue" keeps connections open, "null" opens one per session)
+DB_POOL_MODE = os.getenv('DB_POOL_MODE', 'queue').lower()
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
+# Apply pending schema migrations at startup (otherwise refuse to start until migrate.py runs)
+DB_AUTO_MIGRATE = os.getenv('DB_AUTO_MIGRATE', 'true').lower() == 'true'
+
 # API Configuration
 API_FOOTBALL_KEY = os.getenv('API_FOOTBALL_KEY')
 API_FOOTBALL_BASE_URL = "https://v3.football.api-sports.io"
@@ -24,6 +35,39 @@ PATREON_STORE_LINK = os.getenv('PATREON_STORE_LINK', 'https://patreon.com/yourst
 SPAWN_MESSAGE_MIN = int(os.getenv('SPAWN_MESSAGE_MIN', '20'))
 SPAWN_MESSAGE_MAX = int(os.getenv('SPAWN_MESSAGE_MAX', '50'))
 CATCH_TIMEOUT_SECONDS = int(os.getenv('CATCH_TIMEOUT_SECONDS', '180'))
+MESSAGE_COUNT_FLUSH_SECONDS = int(os.getenv('MESSAGE_COUNT_FLUSH_SECONDS', '30'))
+CARD_INDEX_REFRESH_SECONDS = int(os.getenv('CARD_INDEX_REFRESH_SECONDS', '300'))
+SPAWN_EXPIRY_BATCH_SECONDS = float(os.getenv('SPAWN_EXPIRY_BATCH_SECONDS', '1'))
+
+# Name Matching (trigram similarity from 0 to 1)
+CATCH_MATCH_THRESHOLD = float(os.getenv('CATCH_MATCH_THRESHOLD', '0.8'))
+CATCH_TYPO_CHARS = int(os.getenv('CATCH_TYPO_CHARS', '8'))
+SELECT_MATCH_THRESHOLD = float(os.getenv('SELECT_MATCH_THRESHOLD', '0.5'))
+CARD_SEARCH_THRESHOLD = float(os.getenv('CARD_SEARCH_THRESHOLD', '0.3'))
+
+# Match Prediction
+PREDICT_SIMULATIONS = int(os.getenv('PREDICT_SIMULATIONS', '10000'))
+
+# User Display Cache
+USER_CACHE_TTL_SECONDS = int(os.getenv('USER_CACHE_TTL_SECONDS', '600'))
+USER_CACHE_MAX_SIZE = int(os.getenv('USER_CACHE_MAX_SIZE', '5000'))
+
+# Leaderboard Cache
+LEADERBOARD_CACHE_SIZE = int(os.getenv('LEADERBOARD_CACHE_SIZE', '100'))
+LEADERBOARD_CACHE_SECONDS = int(os.getenv('LEADERBOARD_CACHE_SECONDS', '300'))
+
+# Collection Pages
+COLLECTION_COUNT_CACHE_SECONDS = int(os.getenv('COLLECTION_COUNT_CACHE_SECONDS', '30'))  # How long a collection total is reused
+COLLECTION_PAGE_CACHE_SECONDS = int(os.getenv('COLLECTION_PAGE_CACHE_SECONDS', '60'))  # How long a browsed/prefetched page is reused
+AUTOCOMPLETE_BUDGET_SECONDS = float(os.getenv('AUTOCOMPLETE_BUDGET_SECONDS', '2.0'))  # Must stay under Discord's 3s autocomplete limit
+OWNED_INDEX_MAX_USERS = int(os.getenv('OWNED_INDEX_MAX_USERS', '1000'))  # Users whose owned-card autocomplete index is kept
+OWNED_INDEX_SCAN_LIMIT = int(os.getenv('OWNED_INDEX_SCAN_LIMIT', '500'))  # Most index keys read per autocomplete lookup
+
+# Global Elo Ratings
+RATING_INITIAL = int(os.getenv('RATING_INITIAL', '1500'))
+RATING_K_FACTOR = int(os.getenv('RATING_K_FACTOR', '24'))
+RATING_K_PROVISIONAL = int(os.getenv('RATING_K_PROVISIONAL', '40'))  # K for a player's first games
+RATING_PROVISIONAL_GAMES = int(os.getenv('RATING_PROVISIONAL_GAMES', '20'))
 
 # API Server Configuration
 API_SERVER_HOST = os.getenv('API_SERVER_HOST', '0.0.0.0')
@@ -411,6 +455,51 @@ COOLDOWNS = {
     'vote': 86400              # 24 hours
 }
 
+# Card drop weights per pack/spawn.
+# card_types: relative weight per card type (missing or 0 = never drops)
+# event_types: extra multiplier per event_type
+# rating_bands: (min_overall, multiplier) pairs, highest first; first match applies
+_DEFAULT_RATING_BANDS = [(90, 0.2), (85, 0.6), (80, 1.0), (0, 1.4)]
+
+DROP_TABLES = {
+    'spawn': {
+        'card_types': {'base': 1.0, 'event': 0.35, 'icon': 0.15},
+        'event_types': {'promo_code': 0},
+        'rating_bands': _DEFAULT_RATING_BANDS,
+    },
+    'daily_pack': {
+        'card_types': {'base': 1.0},
+        'rating_bands': _DEFAULT_RATING_BANDS,
+    },
+    'weekly_pack': {
+        'card_types': {'icon': 1.0},
+        'rating_bands': [(90, 0.3), (0, 1.0)],
+    },
+    'event_pack': {
+        'card_types': {'event': 1.0},
+        'event_types': {'promo_code': 0},
+        'rating_bands': [(90, 0.4), (0, 1.0)],
+    },
+    'premium_pack': {
+        'card_types': {'base': 1.0, 'event': 1.0, 'icon': 1.0},
+        'event_types': {'promo_code': 0},
+        'rating_bands': [(90, 0.5), (0, 1.0)],
+    },
+    'booster_pack': {
+        'card_types': {'base': 1.0},
+        'rating_bands': [(90, 0.4), (85, 0.8), (0, 1.0)],
+    },
+}
+
+# Number of cards in each pack
+PACK_SIZES = {
+    'daily_pack': 1,
+    'weekly_pack': 1,
+    'event_pack': 1,
+    'premium_pack': 1,
+    'booster_pack': 1,
+}
+
 # Rarity definitions
 LOGO_RARITIES = {
     'common': 1,
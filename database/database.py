@@ -1,29 +1,166 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
+from sqlalchemy import event
+from contextlib import asynccontextmanager
+from typing import Optional
+import time
 import config
 
 Base = declarative_base()
 
-engine = create_async_engine(
-    config.DATABASE_URL,
-    echo=False,
-    poolclass=NullPool,
-    pool_pre_ping=True
-)
-
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False
-)
+class PoolMetrics:
+    """Counters for connection pool activity"""
+
+    def __init__(self):
+        self.connects = 0          # New DBAPI connections opened
+        self.checkouts = 0         # Connections handed out by the pool
+        self.checkins = 0          # Connections returned to the pool
+        self.invalidations = 0     # Connections discarded after errors
+        self.waits = 0             # Checkouts that found the pool exhausted
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record_checkout(self, seconds: float, exhausted: bool):
+        """Record time spent getting a connection from the pool"""
+        if exhausted:
+            self.waits += 1
+        self.total_wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def as_dict(self) -> dict:
+        """Snapshot of the counters"""
+        return {
+            'connects': self.connects,
+            'checkouts': self.checkouts,
+            'checkins': self.checkins,
+            'checked_out': self.checkouts - self.checkins,
+            'invalidations': self.invalidations,
+            'waits': self.waits,
+            'avg_wait_ms': round(self.total_wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            'max_wait_ms': round(self.max_wait_seconds * 1000, 3),
+        }
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited"""
+
+    metrics: PoolMetrics = None
+    max_overflow: int = 0  # Set per engine alongside pool_size
+
+    def connect(self):
+        # No idle connection and no overflow left means this checkout queues
+        exhausted = self.checkedin() == 0 and self.overflow() >= self.max_overflow
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_checkout(time.perf_counter() - start, exhausted)
+
+def create_db_engine(pooled: Optional[bool] = None):
+    """
+    Create an async engine from config.
+    pooled=True uses a metered queue pool, pooled=False opens a new connection per session.
+    """
+    if pooled is None:
+        pooled = config.DB_POOL_MODE == 'queue'
+
+    metrics = PoolMetrics()
+
+    if pooled:
+        # Give each engine its own pool class so metrics don't leak between engines
+        pool_class = type('MeteredQueuePool', (MeteredQueuePool,),
+                          {'metrics': metrics, 'max_overflow': config.DB_MAX_OVERFLOW})
+        new_engine = create_async_engine(
+            config.DATABASE_URL,
+            echo=False,
+            poolclass=pool_class,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+            pool_recycle=config.DB_POOL_RECYCLE,
+            pool_pre_ping=config.DB_POOL_PRE_PING
+        )
+    else:
+        new_engine = create_async_engine(
+            config.DATABASE_URL,
+            echo=False,
+            poolclass=NullPool,
+            pool_pre_ping=True
+        )
+
+    pool = new_engine.sync_engine.pool
+
+    @event.listens_for(pool, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @event.listens_for(pool, 'checkout')
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.checkouts += 1
+
+    @event.listens_for(pool, 'checkin')
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics.checkins += 1
+
+    @event.listens_for(pool, 'invalidate')
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+    new_engine.sync_engine.pool_metrics = metrics
+    return new_engine
+
+def create_session_factory(bind) -> async_sessionmaker:
+    """Create a session factory for an engine"""
+    return async_sessionmaker(
+        bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False
+    )
+
+engine = create_db_engine()
+
+AsyncSessionLocal = create_session_factory(engine)
+
+@asynccontextmanager
+async def session_scope():
+    """
+    Get a session for one unit of work, closed on exit.
+    Every scope gets its own session (and pooled connection): a session can't
+    be shared between tasks, and a nested scope must not see, commit or roll
+    back its caller's uncommitted work.
+    """
+    async with AsyncSessionLocal() as session:
+        yield session
+
+def dialect_insert(session: AsyncSession, table):
+    """
+    INSERT construct for the session's database that supports ON CONFLICT
+    (on_conflict_do_update / on_conflict_do_nothing).
+    """
+    if session.bind.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
+
+def get_pool_stats() -> dict:
+    """Get connection pool metrics for the bot engine"""
+    pool = engine.sync_engine.pool
+    stats = engine.sync_engine.pool_metrics.as_dict()
+    stats['mode'] = 'queue' if isinstance(pool, MeteredQueuePool) else 'null'
+    if isinstance(pool, MeteredQueuePool):
+        stats['size'] = pool.size()
+        stats['idle'] = pool.checkedin()
+        stats['overflow'] = pool.overflow()
+    return stats
 
 async def init_db():
-    """Initialize database tables"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """Check the schema version, creating or migrating the database if needed"""
+    from database.migrations import ensure_schema
+    await ensure_schema(engine, auto_migrate=config.DB_AUTO_MIGRATE)
 
 async def get_session() -> AsyncSession:
     """Get a database session"""
@@ -32,4 +169,3 @@ async def get_session() -> AsyncSession:
             yield session
         finally:
             await session.close()
-
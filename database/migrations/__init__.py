@@ -0,0 +1,150 @@
+"""
+Versioned schema migrations.
+The applied version lives in a one-row schema_version table, so startup only
+reads one integer. Each migration module defines version, description,
+transactional and an async upgrade(conn). Transactional migrations run in a
+single transaction together with the version bump; the others (concurrent
+index builds) run in autocommit mode and must be safe to re-run.
+A migration may also define on_create(conn) for what a new database built
+from the models still needs (e.g. objects that depend on an optional Postgres
+extension); it runs once, in autocommit mode, after the schema is created.
+"""
+import logging
+from typing import List, Optional
+from sqlalchemy import Column, Integer, MetaData, Table, inspect, select, delete, insert, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from database.migrations import (
+    m0001_ratings_and_dedupe,
+    m0002_hot_path_indexes,
+    m0003_collection_quantities,
+    m0004_collection_unique_key,
+    m0005_card_name_search,
+)
+
+logger = logging.getLogger('migrations')
+
+MIGRATIONS = [
+    m0001_ratings_and_dedupe,
+    m0002_hot_path_indexes,
+    m0003_collection_quantities,
+    m0004_collection_unique_key,
+    m0005_card_name_search,
+]
+HEAD = MIGRATIONS[-1].version
+
+# Arbitrary key for the Postgres advisory lock that serializes migration runs
+MIGRATION_LOCK_KEY = 7261948301
+
+version_metadata = MetaData()
+schema_version = Table(
+    'schema_version', version_metadata,
+    Column('version', Integer, nullable=False),
+)
+
+class SchemaOutOfDate(RuntimeError):
+    """The database is behind the code and migrations aren't allowed to run automatically"""
+
+async def get_version(engine: AsyncEngine) -> Optional[int]:
+    """Applied schema version, or None if the database has never been migrated"""
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(select(schema_version.c.version))
+            return result.scalar_one_or_none()
+    except DBAPIError:
+        # No schema_version table yet
+        return None
+
+async def _set_version(conn, version: int):
+    await conn.execute(delete(schema_version))
+    await conn.execute(insert(schema_version).values(version=version))
+
+async def _bootstrap(engine: AsyncEngine) -> int:
+    """
+    First run against this database.
+    An empty database gets the current models and is stamped at HEAD; one created
+    by create_all before migrations existed starts at 0 and is upgraded.
+    """
+    from database.database import Base
+
+    async with engine.begin() as conn:
+        has_tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table('users'))
+        await conn.run_sync(version_metadata.create_all)
+        if has_tables:
+            await _set_version(conn, 0)
+            logger.info("Existing database found; migrating from version 0")
+            return 0
+
+        await conn.run_sync(Base.metadata.create_all)
+        await _set_version(conn, HEAD)
+        logger.info(f"Created schema at version {HEAD}")
+        return HEAD
+
+async def _on_create(engine: AsyncEngine):
+    """Run each migration's on_create step against a newly created schema"""
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        for migration in MIGRATIONS:
+            on_create = getattr(migration, 'on_create', None)
+            if on_create is not None:
+                await on_create(conn)
+
+async def upgrade(engine: AsyncEngine, target: int = HEAD) -> List[int]:
+    """Apply pending migrations up to target. Returns the versions applied."""
+    applied = []
+    async with engine.connect() as lock_conn:
+        lock_conn = await lock_conn.execution_options(isolation_level='AUTOCOMMIT')
+        postgres = lock_conn.dialect.name == 'postgresql'
+        if postgres:
+            # Only one process migrates; others wait here and then find nothing to do
+            await lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {'key': MIGRATION_LOCK_KEY})
+        try:
+            current = await get_version(engine)
+            if current is None:
+                current = await _bootstrap(engine)
+                if current == HEAD:
+                    await _on_create(engine)
+
+            for migration in MIGRATIONS:
+                if migration.version <= current or migration.version > target:
+                    continue
+                logger.info(f"Applying migration {migration.version}: {migration.description}")
+
+                if migration.transactional:
+                    async with engine.begin() as conn:
+                        await migration.upgrade(conn)
+                        await _set_version(conn, migration.version)
+                else:
+                    async with engine.connect() as conn:
+                        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+                        await migration.upgrade(conn)
+                    async with engine.begin() as conn:
+                        await _set_version(conn, migration.version)
+
+                current = migration.version
+                applied.append(migration.version)
+        finally:
+            if postgres:
+                await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': MIGRATION_LOCK_KEY})
+
+    return applied
+
+async def ensure_schema(engine: AsyncEngine, auto_migrate: bool = True) -> int:
+    """
+    Startup check: one read of schema_version when the database is current.
+    Runs pending migrations if auto_migrate, otherwise raises SchemaOutOfDate.
+    """
+    current = await get_version(engine)
+    if current == HEAD:
+        return current
+    if current is not None and current > HEAD:
+        raise SchemaOutOfDate(f"Database is at version {current}, newer than this code ({HEAD})")
+    if not auto_migrate:
+        raise SchemaOutOfDate(
+            f"Database is at version {current if current is not None else 'none'}, code expects {HEAD}. "
+            f"Run: python migrate.py"
+        )
+
+    applied = await upgrade(engine)
+    logger.info(f"Schema at version {HEAD} (applied {applied or 'none'})")
+    return HEAD
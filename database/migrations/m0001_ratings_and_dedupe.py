@@ -0,0 +1,30 @@
+"""Create player_ratings and remove duplicate rows that would block the new unique keys"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from database.migrations import ops
+from database.models import PlayerRating
+
+version = 1
+description = "Create player_ratings, dedupe leaderboard/team_slots/active_matches/spawned_cards"
+transactional = True
+
+async def upgrade(conn: AsyncConnection):
+    await ops.create_table(conn, PlayerRating.__table__)
+
+    # Fold duplicate leaderboard entries into the oldest one before deleting the rest
+    await conn.execute(text("""
+        UPDATE leaderboard SET
+            points = (SELECT SUM(l.points) FROM leaderboard l WHERE l.guild_id = leaderboard.guild_id AND l.user_id = leaderboard.user_id),
+            wins = (SELECT SUM(l.wins) FROM leaderboard l WHERE l.guild_id = leaderboard.guild_id AND l.user_id = leaderboard.user_id),
+            draws = (SELECT SUM(l.draws) FROM leaderboard l WHERE l.guild_id = leaderboard.guild_id AND l.user_id = leaderboard.user_id),
+            losses = (SELECT SUM(l.losses) FROM leaderboard l WHERE l.guild_id = leaderboard.guild_id AND l.user_id = leaderboard.user_id)
+        WHERE id IN (
+            SELECT MIN(id) FROM leaderboard GROUP BY guild_id, user_id HAVING COUNT(*) > 1
+        )
+    """))
+    await ops.keep_one_per_key(conn, 'leaderboard', ['guild_id', 'user_id'], keep='MIN')
+
+    # Latest assignment wins for a position; newest match wins for a channel
+    await ops.keep_one_per_key(conn, 'team_slots', ['team_id', 'position'], keep='MAX')
+    await ops.keep_one_per_key(conn, 'active_matches', ['channel_id'], keep='MAX')
+    await ops.keep_one_per_key(conn, 'spawned_cards', ['message_id'], keep='MIN')
@@ -0,0 +1,18 @@
+"""Indexes and unique keys for the hot lookup paths, built without blocking writes"""
+from sqlalchemy.ext.asyncio import AsyncConnection
+from database.migrations import ops
+
+version = 2
+description = "Hot-path indexes and unique constraints (built concurrently on Postgres)"
+transactional = False
+
+async def upgrade(conn: AsyncConnection):
+    await ops.add_unique_constraint(conn, 'uq_leaderboard_guild_user', 'leaderboard', ['guild_id', 'user_id'])
+    await ops.create_index(conn, 'ix_leaderboard_guild_rank', 'leaderboard', ['guild_id', 'points DESC', 'user_id'])
+    await ops.create_index(conn, 'ix_collections_user_card', 'collections', ['user_id', 'card_id'])
+    await ops.create_index(conn, 'ix_collections_card_id', 'collections', ['card_id'])
+    await ops.add_unique_constraint(conn, 'uq_team_slots_team_position', 'team_slots', ['team_id', 'position'])
+    await ops.create_index(conn, 'ix_bets_guild_creator_challenged', 'bets', ['guild_id', 'creator_id', 'challenged_id'])
+    await ops.add_unique_constraint(conn, 'uq_active_matches_channel', 'active_matches', ['channel_id'])
+    await ops.add_unique_constraint(conn, 'uq_spawned_cards_message', 'spawned_cards', ['message_id'])
+    await ops.create_index(conn, 'ix_cards_api_player_id', 'cards', ['api_player_id'])
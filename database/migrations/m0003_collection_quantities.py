@@ -0,0 +1,28 @@
+"""Collapse duplicate collection rows into one row per (user, card) with a quantity"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from database.migrations import ops
+
+version = 3
+description = "Aggregate collections into per-card quantities"
+transactional = True
+
+async def upgrade(conn: AsyncConnection):
+    await ops.add_column(conn, 'collections', 'quantity', "INTEGER NOT NULL DEFAULT 1")
+    await ops.add_column(conn, 'collections', 'last_obtained_at', "TIMESTAMP WITH TIME ZONE")
+    await conn.execute(text(
+        "UPDATE collections SET last_obtained_at = obtained_at WHERE last_obtained_at IS NULL"
+    ))
+
+    # Fold every copy into the oldest row of its (user, card) group, then drop the rest.
+    # Summing quantity keeps this correct if the migration is re-run.
+    await conn.execute(text("""
+        UPDATE collections SET
+            quantity = (SELECT SUM(c.quantity) FROM collections c WHERE c.user_id = collections.user_id AND c.card_id = collections.card_id),
+            obtained_at = (SELECT MIN(c.obtained_at) FROM collections c WHERE c.user_id = collections.user_id AND c.card_id = collections.card_id),
+            last_obtained_at = (SELECT MAX(c.last_obtained_at) FROM collections c WHERE c.user_id = collections.user_id AND c.card_id = collections.card_id)
+        WHERE id IN (
+            SELECT MIN(id) FROM collections GROUP BY user_id, card_id HAVING COUNT(*) > 1
+        )
+    """))
+    await ops.keep_one_per_key(conn, 'collections', ['user_id', 'card_id'], keep='MIN')
@@ -0,0 +1,11 @@
+"""Make (user_id, card_id) unique on collections, replacing the plain lookup index"""
+from sqlalchemy.ext.asyncio import AsyncConnection
+from database.migrations import ops
+
+version = 4
+description = "Unique (user_id, card_id) on collections"
+transactional = False
+
+async def upgrade(conn: AsyncConnection):
+    await ops.add_unique_constraint(conn, 'uq_collections_user_card', 'collections', ['user_id', 'card_id'])
+    await ops.drop_index(conn, 'ix_collections_user_card')
@@ -0,0 +1,20 @@
+"""Indexes for card name search: pg_trgm for fuzzy/substring search and lower(name) for exact lookups"""
+from sqlalchemy.ext.asyncio import AsyncConnection
+from database.migrations import ops
+
+version = 5
+description = "Card name search indexes (pg_trgm GIN and lower(name))"
+transactional = False
+
+async def create_trigram_index(conn: AsyncConnection):
+    # Without pg_trgm, card search falls back to the in-process index
+    if await ops.create_extension(conn, 'pg_trgm'):
+        await ops.create_index(conn, 'ix_cards_name_trgm', 'cards', ['name gin_trgm_ops'], using='gin')
+
+async def upgrade(conn: AsyncConnection):
+    await ops.create_index(conn, 'ix_cards_name_lower', 'cards', ['lower(name)'])
+    await create_trigram_index(conn)
+
+async def on_create(conn: AsyncConnection):
+    # New databases get lower(name) from the models, but not the optional extension
+    await create_trigram_index(conn)
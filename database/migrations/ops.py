@@ -0,0 +1,107 @@
+"""
+DDL helpers for migrations.
+Every helper is idempotent, so a migration interrupted halfway can simply be run again.
+"""
+import logging
+from typing import Sequence
+from sqlalchemy import Table, inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger('migrations')
+
+def is_postgres(conn: AsyncConnection) -> bool:
+    return conn.dialect.name == 'postgresql'
+
+async def create_table(conn: AsyncConnection, table: Table):
+    """Create a table (and its indexes) if it doesn't exist"""
+    await conn.run_sync(lambda sync_conn: table.create(sync_conn, checkfirst=True))
+
+async def add_column(conn: AsyncConnection, table: str, name: str, ddl: str):
+    """Add a column if it doesn't exist. ddl is the type and constraints, e.g. "INTEGER NOT NULL DEFAULT 1"."""
+    columns = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_columns(table))
+    if any(column['name'] == name for column in columns):
+        return
+    await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+    logger.info(f"Added column {table}.{name}")
+
+async def drop_index(conn: AsyncConnection, name: str):
+    """Drop an index if it exists (CONCURRENTLY on Postgres; needs autocommit)"""
+    concurrently = 'CONCURRENTLY ' if is_postgres(conn) else ''
+    await conn.execute(text(f"DROP INDEX {concurrently}IF EXISTS {name}"))
+
+async def _drop_invalid_index(conn: AsyncConnection, name: str):
+    """Drop an index left INVALID by an interrupted concurrent build"""
+    result = await conn.execute(text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {'name': name})
+    if result.first():
+        logger.warning(f"Dropping invalid index {name} left by an earlier build")
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+async def create_index(conn: AsyncConnection, name: str, table: str,
+                       columns: Sequence[str], unique: bool = False, using: str = None):
+    """
+    Create an index if it doesn't exist.
+    On Postgres the index is built CONCURRENTLY, so reads and writes continue
+    during the build; the connection must be in autocommit mode. using picks
+    the index method (e.g. 'gin') and is Postgres only.
+    """
+    unique_sql = 'UNIQUE ' if unique else ''
+    columns_sql = ', '.join(columns)
+    if is_postgres(conn):
+        using_sql = f" USING {using}" if using else ''
+        await _drop_invalid_index(conn, name)
+        await conn.execute(text(
+            f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table}{using_sql} ({columns_sql})"
+        ))
+    else:
+        await conn.execute(text(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({columns_sql})"))
+    logger.info(f"Index {name} on {table} is in place")
+
+async def add_unique_constraint(conn: AsyncConnection, name: str, table: str, columns: Sequence[str]):
+    """
+    Add a unique constraint if it doesn't exist.
+    On Postgres the backing index is built concurrently first and then attached,
+    so the table is only locked briefly. SQLite can't add constraints to a
+    table, so a unique index enforces the rule instead.
+    """
+    if is_postgres(conn):
+        result = await conn.execute(text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {'name': name})
+        if result.first():
+            return
+        await create_index(conn, name, table, columns, unique=True)
+        await conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}"))
+        logger.info(f"Constraint {name} on {table} is in place")
+    else:
+        # Tables created from the models already carry the constraint
+        result = await conn.execute(text("SELECT sql FROM sqlite_master WHERE name = :table"), {'table': table})
+        row = result.first()
+        if row and f"CONSTRAINT {name} " in (row[0] or ''):
+            return
+        await create_index(conn, name, table, columns, unique=True)
+
+async def create_extension(conn: AsyncConnection, name: str) -> bool:
+    """
+    Create a Postgres extension if it doesn't exist. Returns whether it is installed.
+    Failing for lack of privileges is logged rather than raised, so callers can
+    skip what depends on the extension.
+    """
+    if not is_postgres(conn):
+        return False
+    try:
+        await conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {name}"))
+    except DBAPIError as e:
+        logger.warning(f"Could not create extension {name}: {e}")
+        return False
+    return True
+
+async def keep_one_per_key(conn: AsyncConnection, table: str, key_columns: Sequence[str], keep: str = 'MAX'):
+    """Delete duplicate rows so a unique key can be added, keeping the MIN or MAX id of each group"""
+    key_sql = ', '.join(key_columns)
+    result = await conn.execute(text(
+        f"DELETE FROM {table} WHERE id NOT IN (SELECT {keep}(id) FROM {table} GROUP BY {key_sql})"
+    ))
+    if result.rowcount:
+        logger.warning(f"Removed {result.rowcount} duplicate rows from {table}")
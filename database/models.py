@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, BigInteger, Boolean, DateTime, Float, ForeignKey, Text, JSON, Enum as SQLEnum
+from sqlalchemy import text, Column, Integer, String, BigInteger, Boolean, DateTime, Float, ForeignKey, Text, JSON, UniqueConstraint, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database.database import Base
@@ -45,10 +45,16 @@ class User(Base):
 
 class Card(Base):
     __tablename__ = 'cards'
+    __table_args__ = (
+        # The trigram index for card name search (ix_cards_name_trgm) needs the
+        # optional pg_trgm extension, so only migration 5 creates it
+        # Case-insensitive exact name lookups (CSV upserts)
+        Index('ix_cards_name_lower', text('lower(name)')),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     code = Column(String(50), unique=True, nullable=True)
-    api_player_id = Column(Integer, nullable=True)  # API-Football player ID
+    api_player_id = Column(Integer, nullable=True, index=True)  # API-Football player ID
     name = Column(String(255), nullable=False, index=True)
     position = Column(String(10), nullable=False)
     
@@ -78,13 +84,22 @@ class Card(Base):
 
 class Collection(Base):
     __tablename__ = 'collections'
+    __table_args__ = (
+        # One row per owned card with a copy count; serves a user's collection
+        # and "does this user own card X" checks (target of the grant upsert)
+        UniqueConstraint('user_id', 'card_id', name='uq_collections_user_card'),
+        # Owners of a card (cascades, transfers)
+        Index('ix_collections_card_id', 'card_id'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(BigInteger, ForeignKey('users.id', ondelete='CASCADE'))
     card_id = Column(Integer, ForeignKey('cards.id', ondelete='CASCADE'))
+    quantity = Column(Integer, nullable=False, default=1, server_default='1')
     
-    # Track when card was obtained
+    # When the first and the most recent copy were obtained
     obtained_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_obtained_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     user = relationship("User", back_populates="collections")
@@ -113,6 +128,10 @@ class Team(Base):
 
 class TeamSlot(Base):
     __tablename__ = 'team_slots'
+    __table_args__ = (
+        # One card per position in a team; also serves slot lookups by team_id
+        UniqueConstraint('team_id', 'position', name='uq_team_slots_team_position'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     team_id = Column(Integer, ForeignKey('teams.id', ondelete='CASCADE'))
@@ -148,7 +167,7 @@ class Match(Base):
     player2_score = Column(Integer, default=0)
     winner_id = Column(BigInteger, nullable=True)  # NULL for draw
     
-    # Match details stored as JSON
+    # Packed rounds from MatchArchive.encode ({"format": 1, "data": base64})
     match_details = Column(JSON, nullable=True)
     
     started_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -160,6 +179,10 @@ class Match(Base):
 
 class ActiveMatch(Base):
     __tablename__ = 'active_matches'
+    __table_args__ = (
+        # At most one match in progress per channel
+        UniqueConstraint('channel_id', name='uq_active_matches_channel'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     guild_id = Column(BigInteger, nullable=False)
@@ -187,6 +210,10 @@ class ActiveMatch(Base):
 
 class Bet(Base):
     __tablename__ = 'bets'
+    __table_args__ = (
+        # Open bets between two users in a guild
+        Index('ix_bets_guild_creator_challenged', 'guild_id', 'creator_id', 'challenged_id'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     guild_id = Column(BigInteger, nullable=False)
@@ -211,6 +238,10 @@ class Bet(Base):
 
 class Leaderboard(Base):
     __tablename__ = 'leaderboard'
+    __table_args__ = (
+        # One entry per user per guild (target of the settlement upsert)
+        UniqueConstraint('guild_id', 'user_id', name='uq_leaderboard_guild_user'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     guild_id = Column(BigInteger, nullable=False)
@@ -227,6 +258,19 @@ class Leaderboard(Base):
     # Relationships
     user = relationship("User", back_populates="leaderboard_entries")
 
+# Serves ranked pages: WHERE guild_id = ? ORDER BY points DESC, user_id
+Index('ix_leaderboard_guild_rank', Leaderboard.guild_id, Leaderboard.points.desc(), Leaderboard.user_id)
+
+class PlayerRating(Base):
+    __tablename__ = 'player_ratings'
+    
+    # One global (cross-guild) Elo rating per user
+    user_id = Column(BigInteger, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    rating = Column(Float, nullable=False)
+    games = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class ServerConfig(Base):
     __tablename__ = 'server_config'
     
@@ -265,6 +309,10 @@ class PromoCode(Base):
 
 class SpawnedCard(Base):
     __tablename__ = 'spawned_cards'
+    __table_args__ = (
+        # One spawn per Discord message
+        UniqueConstraint('message_id', name='uq_spawned_cards_message'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     guild_id = Column(BigInteger, nullable=False)
@@ -0,0 +1,45 @@
+"""
+Schema migration tool
+Shows the database's schema version or applies pending migrations.
+Usage: python migrate.py [status|upgrade] [target_version]
+"""
+import asyncio
+import logging
+import sys
+from database.database import engine
+from database.migrations import MIGRATIONS, HEAD, get_version, upgrade
+
+async def show_status():
+    """Print applied and pending migrations"""
+    current = await get_version(engine)
+    print(f"📦 Database version: {current if current is not None else 'not initialized'} (latest: {HEAD})")
+    for migration in MIGRATIONS:
+        applied = current is not None and migration.version <= current
+        mode = '' if migration.transactional else ' [online]'
+        print(f"  {'✅' if applied else '⏳'} {migration.version:04d} {migration.description}{mode}")
+
+async def run_upgrade(target: int):
+    """Apply pending migrations up to target"""
+    print(f"🔄 Upgrading to version {target}...")
+    applied = await upgrade(engine, target)
+    if applied:
+        print(f"✅ Applied: {', '.join(str(version) for version in applied)}")
+    else:
+        print("✅ Already up to date")
+
+async def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    try:
+        if command == 'status':
+            await show_status()
+        elif command == 'upgrade':
+            await run_upgrade(int(sys.argv[2]) if len(sys.argv) > 2 else HEAD)
+            await show_status()
+        else:
+            print(__doc__)
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
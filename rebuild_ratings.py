@@ -0,0 +1,67 @@
+"""
+Global rating rebuild
+Replays every completed match in order in one streaming pass and rewrites
+the player_ratings table. Use after changing the rating settings or to
+repair ratings. Stop the bot first so no matches settle mid-rebuild.
+Usage: python rebuild_ratings.py
+"""
+import asyncio
+import time
+from sqlalchemy import select, delete, insert
+from database.database import AsyncSessionLocal, init_db
+from database.models import Match, PlayerRating
+from utils.ratings import rate_match, match_score
+import config
+
+BATCH_SIZE = 10000
+
+async def rebuild_ratings():
+    """Recompute all ratings from match history"""
+    print("🔄 Replaying match history...")
+    start = time.perf_counter()
+    await init_db()
+
+    ratings = {}  # {user_id: [rating, games]}
+    matches = 0
+
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            select(Match.player1_id, Match.player2_id, Match.winner_id)
+            .where(Match.completed_at.isnot(None))
+            .where(Match.player1_id.isnot(None))
+            .where(Match.player2_id.isnot(None))
+            .order_by(Match.completed_at, Match.id)
+            .execution_options(yield_per=BATCH_SIZE)
+        )
+        async for partition in result.partitions():
+            for player1_id, player2_id, winner_id in partition:
+                player1 = ratings.setdefault(player1_id, [config.RATING_INITIAL, 0])
+                player2 = ratings.setdefault(player2_id, [config.RATING_INITIAL, 0])
+                player1[0], player2[0] = rate_match(
+                    player1[0], player1[1], player2[0], player2[1],
+                    match_score(player1_id, winner_id)
+                )
+                player1[1] += 1
+                player2[1] += 1
+                matches += 1
+
+    print(f"✅ Replayed {matches:,} matches for {len(ratings):,} players")
+
+    print("🔄 Writing ratings...")
+    rows = [
+        {'user_id': user_id, 'rating': rating, 'games': games}
+        for user_id, (rating, games) in ratings.items()
+    ]
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(PlayerRating))
+        for offset in range(0, len(rows), BATCH_SIZE):
+            await session.execute(insert(PlayerRating), rows[offset:offset + BATCH_SIZE])
+        await session.commit()
+
+    print(f"✅ Ratings rebuilt in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(rebuild_ratings())
+    except KeyboardInterrupt:
+        print("\n\n❌ Operation cancelled by user")
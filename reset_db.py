@@ -5,6 +5,7 @@ Use only for development/testing purposes.
 """
 import asyncio
 from database.database import engine, Base
+from database.migrations import version_metadata, upgrade
 import sys
 
 async def reset_database():
@@ -31,12 +32,12 @@ async def reset_database():
     print("\n🔄 Dropping all tables...")
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(version_metadata.drop_all)
     
     print("✅ All tables dropped")
     
     print("🔄 Recreating tables...")
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await upgrade(engine)
     
     print("✅ All tables recreated")
     
@@ -0,0 +1,31 @@
+import asyncio
+import os
+import sys
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.database import Base, create_session_factory
+import database.models  # noqa: F401  (registers the tables)
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """
+    Session factory on a fresh schema.
+    Uses a temporary SQLite file, or TEST_DATABASE_URL if set (e.g. a scratch
+    Postgres database to exercise row locks; its tables are dropped and recreated).
+    """
+    url = os.getenv('TEST_DATABASE_URL') or f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    # Each test drives its own event loop, so connections can't be pooled across tests
+    engine = create_async_engine(url, poolclass=NullPool)
+
+    async def reset():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(reset())
+    yield create_session_factory(engine)
+    asyncio.run(engine.dispose())
@@ -0,0 +1,171 @@
+"""
+Concurrent collection transfers and match settlements.
+Two transactions racing for the same copies must move each copy once: the
+winner of the race moves it, the other moves nothing, and no quantity goes
+below zero.
+"""
+import asyncio
+from sqlalchemy import insert, select, func
+from database.models import User, Card, Collection, Bet, CardType, PlayerRating
+from utils.collection_ops import CollectionOps
+from utils.match_engine import MatchState
+from utils.match_settlement import MatchSettlement
+
+LOSER = 1
+WINNER_A = 2
+WINNER_B = 3
+CARD = 10
+POSITIONS = ['GK', 'LB', 'CB1', 'CB2', 'RB', 'CM1', 'CM2', 'CM3', 'LW', 'ST', 'RW']
+
+async def seed(session_factory, quantity: int):
+    """Three users and one card, of which the loser owns quantity copies"""
+    async with session_factory() as session:
+        await session.execute(insert(User), [
+            {'id': user_id, 'username': f"user{user_id}"} for user_id in (LOSER, WINNER_A, WINNER_B)
+        ])
+        await session.execute(insert(Card), [{
+            'id': CARD, 'name': "Test Player", 'position': 'ST', 'overall_rating': 80,
+            'attack_stat': 80, 'defense_stat': 40, 'card_type': CardType.BASE
+        }])
+        await session.execute(insert(Collection), [{'user_id': LOSER, 'card_id': CARD, 'quantity': quantity}])
+        await session.commit()
+
+async def holdings(session_factory):
+    """{user_id: quantity} of the card, plus the smallest stored quantity"""
+    async with session_factory() as session:
+        result = await session.execute(
+            select(Collection.user_id, Collection.quantity).where(Collection.card_id == CARD)
+        )
+        owned = dict(result.all())
+        result = await session.execute(select(func.min(Collection.quantity)))
+        return owned, result.scalar()
+
+def test_overlapping_transfers_move_a_copy_once(session_factory):
+    """The second transfer starts while the first is uncommitted and must find nothing to move"""
+    async def scenario():
+        await seed(session_factory, quantity=1)
+        first = session_factory()
+        second = session_factory()
+        try:
+            moved_first = await CollectionOps.transfer_cards(first, {LOSER: [CARD]}, WINNER_A)
+            racing = asyncio.create_task(CollectionOps.transfer_cards(second, {LOSER: [CARD]}, WINNER_B))
+            await asyncio.sleep(0.2)
+            await first.commit()
+            moved_second = await racing
+            await second.commit()
+        finally:
+            await first.close()
+            await second.close()
+        return moved_first, moved_second, await holdings(session_factory)
+
+    moved_first, moved_second, (owned, smallest) = asyncio.run(scenario())
+    assert moved_first == [CARD]
+    assert moved_second == []
+    assert owned == {WINNER_A: 1}
+    assert smallest >= 0
+
+def test_stale_transfer_cannot_overdraw(session_factory):
+    """
+    A transfer that read the old quantity before a competing one committed
+    must not take copies that are gone: copies are conserved and none go negative.
+    """
+    async def scenario():
+        await seed(session_factory, quantity=3)
+        first = session_factory()
+        second = session_factory()
+        try:
+            moved_first = await CollectionOps.transfer_cards(first, {LOSER: [CARD, CARD]}, WINNER_A)
+            racing = asyncio.create_task(CollectionOps.transfer_cards(second, {LOSER: [CARD, CARD]}, WINNER_B))
+            await asyncio.sleep(0.2)
+            await first.commit()
+            moved_second = await racing
+            await second.commit()
+        finally:
+            await first.close()
+            await second.close()
+        return moved_first, moved_second, await holdings(session_factory)
+
+    moved_first, moved_second, (owned, smallest) = asyncio.run(scenario())
+    assert moved_first == [CARD, CARD]
+    # Depending on the database the late transfer takes the last copy or nothing, never two
+    assert len(moved_second) <= 1
+    assert owned.get(WINNER_A) == 2
+    assert owned.get(WINNER_B, 0) == len(moved_second)
+    assert sum(owned.values()) == 3
+    assert smallest >= 0
+
+def test_concurrent_transfers_conserve_copies(session_factory):
+    """Three transfers of two copies racing for three copies move at most three in total"""
+    async def transfer(to_user_id: int):
+        async with session_factory() as session:
+            moved = await CollectionOps.transfer_cards(session, {LOSER: [CARD, CARD]}, to_user_id)
+            await session.commit()
+            return moved
+
+    async def scenario():
+        await seed(session_factory, quantity=3)
+        moved = await asyncio.gather(transfer(WINNER_A), transfer(WINNER_B), transfer(WINNER_A))
+        return moved, await holdings(session_factory)
+
+    moved, (owned, smallest) = asyncio.run(scenario())
+    assert sum(len(cards) for cards in moved) == 3 - owned.get(LOSER, 0)
+    assert owned.get(WINNER_A, 0) == len(moved[0]) + len(moved[2])
+    assert owned.get(WINNER_B, 0) == len(moved[1])
+    assert sum(owned.values()) == 3
+    assert smallest >= 0
+
+def finished_match(winner_id: int) -> MatchState:
+    """A completed match the loser lost to winner_id"""
+    card = Card(id=CARD, name="Test Player", position='ST', overall_rating=80,
+                attack_stat=80, defense_stat=40, card_type=CardType.BASE)
+    team = {position: card for position in POSITIONS}
+    match_state = MatchState(winner_id, LOSER, team, dict(team), '4-3-3', '4-3-3')
+    match_state.current_round = match_state.max_rounds + 1
+    match_state.player1_score = 6
+    match_state.player2_score = 5
+    return match_state
+
+def test_concurrent_settlements_move_a_wager_once(session_factory):
+    """The loser bet their only copy in two matches that settle at the same time"""
+    async def settle(guild_id: int, winner_id: int):
+        async with session_factory() as session:
+            await MatchSettlement.settle(session, guild_id, guild_id, finished_match(winner_id))
+
+    async def scenario():
+        await seed(session_factory, quantity=1)
+        async with session_factory() as session:
+            await session.execute(insert(Bet), [
+                {'guild_id': guild_id, 'creator_id': LOSER, 'challenged_id': winner_id,
+                 'creator_cards': [CARD], 'challenged_cards': [], 'accepted': True, 'completed': False}
+                for guild_id, winner_id in ((100, WINNER_A), (200, WINNER_B))
+            ])
+            await session.commit()
+
+        await asyncio.gather(settle(100, WINNER_A), settle(200, WINNER_B))
+
+        async with session_factory() as session:
+            result = await session.execute(select(Bet.completed))
+            completed = result.scalars().all()
+        return completed, await holdings(session_factory)
+
+    completed, (owned, smallest) = asyncio.run(scenario())
+    assert completed == [True, True]
+    # Exactly one winner got the copy; the other settlement moved nothing
+    assert owned in ({WINNER_A: 1}, {WINNER_B: 1})
+    assert smallest >= 0
+
+def test_concurrent_settlements_rate_a_new_player_twice(session_factory):
+    """The loser has no rating yet and finishes two matches at the same time; both count"""
+    async def settle(guild_id: int, winner_id: int):
+        async with session_factory() as session:
+            await MatchSettlement.settle(session, guild_id, guild_id, finished_match(winner_id))
+
+    async def scenario():
+        await seed(session_factory, quantity=1)
+        await asyncio.gather(settle(100, WINNER_A), settle(200, WINNER_B))
+        async with session_factory() as session:
+            result = await session.execute(select(PlayerRating.user_id, PlayerRating.games))
+            return dict(result.all())
+
+    games = asyncio.run(scenario())
+    assert games == {LOSER: 2, WINNER_A: 1, WINNER_B: 1}
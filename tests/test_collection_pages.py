@@ -0,0 +1,52 @@
+"""
+Keyset cursors for collection pages.
+"""
+import base64
+import json
+from datetime import datetime, timezone
+import pytest
+from database.models import CardType
+from utils.collection_pages import CollectionEntry, decode_cursor, encode_cursor
+
+def entry(**fields) -> CollectionEntry:
+    values = dict(card_id=42, name="Kylian Mbappé", position='ST', overall_rating=91,
+                  card_type=CardType.BASE, event_type=None, quantity=2,
+                  last_obtained_at=datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc))
+    values.update(fields)
+    return CollectionEntry(**values)
+
+def token(*parts) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(parts)).encode()).decode('ascii')
+
+@pytest.mark.parametrize('sort_by, expected', [
+    ('ovr', 91),
+    ('name', "Kylian Mbappé"),
+    ('date', datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)),
+])
+def test_cursor_round_trip(sort_by, expected):
+    cursor = encode_cursor(sort_by, entry())
+    assert decode_cursor(sort_by, cursor) == (expected, 42)
+
+def test_cursor_is_url_safe_text():
+    cursor = encode_cursor('name', entry(name="Ødegaard ?/+"))
+    assert cursor.isascii() and '+' not in cursor and '/' not in cursor
+    assert decode_cursor('name', cursor) == ("Ødegaard ?/+", 42)
+
+def test_cursor_without_a_date():
+    cursor = encode_cursor('date', entry(last_obtained_at=None))
+    assert decode_cursor('date', cursor) == (None, 42)
+
+def test_cursor_for_another_sort_is_ignored():
+    assert decode_cursor('name', encode_cursor('ovr', entry())) is None
+
+@pytest.mark.parametrize('bad', [
+    "not base64!",
+    base64.urlsafe_b64encode(b"not json").decode(),
+    token('ovr', 91),
+    token('ovr', 91, "42"),
+    token('date', "yesterday", 42),
+    base64.urlsafe_b64encode(b"5").decode(),
+])
+def test_malformed_cursors_are_rejected(bad):
+    assert decode_cursor('ovr', bad) is None
+    assert decode_cursor('date', bad) is None
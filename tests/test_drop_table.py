@@ -0,0 +1,41 @@
+"""
+Alias table sampling for weighted drops.
+"""
+import random
+from collections import Counter
+import pytest
+from utils.drop_table import AliasTable
+
+def implied_distribution(table: AliasTable) -> Counter:
+    """Probability of each item given the table's buckets"""
+    n = len(table)
+    shares = Counter()
+    for i, item in enumerate(table.items):
+        shares[item] += table.prob[i] / n
+        shares[table.items[table.alias[i]]] += (1.0 - table.prob[i]) / n
+    return shares
+
+def test_buckets_reproduce_the_weights():
+    weights = {'common': 70, 'rare': 20, 'epic': 9, 'legend': 1}
+    table = AliasTable(list(weights), list(weights.values()))
+    shares = implied_distribution(table)
+    for item, weight in weights.items():
+        assert shares[item] == pytest.approx(weight / 100)
+
+def test_draws_follow_the_weights():
+    weights = {'common': 6, 'rare': 3, 'epic': 1}
+    table = AliasTable(list(weights), list(weights.values()))
+    draws = Counter(table.draw_many(100_000, random.Random(7)))
+    for item, weight in weights.items():
+        assert draws[item] / 100_000 == pytest.approx(weight / 10, abs=0.01)
+
+def test_zero_weights_are_never_drawn():
+    table = AliasTable(['a', 'b', 'c'], [1, 0, 3])
+    rng = random.Random(1)
+    assert 'b' not in {table.draw(rng) for _ in range(2_000)}
+
+def test_empty_and_mismatched_tables():
+    assert AliasTable([], []).draw() is None
+    assert AliasTable(['a'], [0]).draw_many(3) == []
+    with pytest.raises(ValueError):
+        AliasTable(['a', 'b'], [1])
@@ -0,0 +1,40 @@
+"""
+Cached leaderboard rows added by match settlement.
+"""
+import asyncio
+import time
+from sqlalchemy import insert
+from database.models import User, Card, CardType
+from utils.leaderboard import leaderboard_service
+from utils.match_engine import MatchState
+from utils.match_settlement import MatchSettlement
+
+GUILD = 100
+POSITIONS = ['GK', 'LB', 'CB1', 'CB2', 'RB', 'CM1', 'CM2', 'CM3', 'LW', 'ST', 'RW']
+
+def test_settlement_caches_rows_with_stored_usernames(session_factory):
+    """New cached rows show users.username, as pages read from the database do"""
+    card = Card(id=1, name="Test Player", position='ST', overall_rating=80,
+                attack_stat=80, defense_stat=40, card_type=CardType.BASE)
+    team = {position: card for position in POSITIONS}
+    match_state = MatchState(1, 2, team, dict(team), '4-3-3', '4-3-3')
+    match_state.current_round = match_state.max_rounds + 1
+    match_state.player1_score = 6
+    match_state.player2_score = 5
+
+    async def scenario():
+        async with session_factory() as session:
+            await session.execute(insert(User), [{'id': 1, 'username': "stored_one"},
+                                                 {'id': 2, 'username': "stored_two"}])
+            await session.commit()
+        # An empty cached top for the guild, as after loading a guild with no matches
+        leaderboard_service._top[GUILD] = ([], time.monotonic() + 60)
+        try:
+            async with session_factory() as session:
+                await MatchSettlement.settle(session, GUILD, GUILD, match_state)
+            rows, _ = leaderboard_service._top[GUILD]
+            return [(row.user_id, row.username, row.points) for row in rows]
+        finally:
+            leaderboard_service.invalidate(GUILD)
+
+    assert asyncio.run(scenario()) == [(1, "stored_one", 3), (2, "stored_two", 0)]
@@ -0,0 +1,76 @@
+"""
+Packing finished matches into the compact archive format and reading them back.
+"""
+import base64
+import json
+import random
+import pytest
+import config
+from database.models import Card, CardType
+from utils.match_archive import ARCHIVE_FORMAT, MatchArchive, ROUND_STRUCT
+from utils.match_engine import MatchState
+
+FORMATION = '433_attack'
+
+def team(first_id: int):
+    positions = list(config.FORMATIONS[FORMATION]['positions'])
+    return {
+        position: Card(id=first_id + i, name=f"Player {first_id + i}", position=position,
+                       overall_rating=70 + i, attack_stat=50 + 3 * i, defense_stat=80 - 2 * i,
+                       card_type=CardType.BASE, club=f"Club {i % 3}")
+        for i, position in enumerate(positions)
+    }
+
+def played_match(seed: int) -> MatchState:
+    match_state = MatchState(1, 2, team(100), team(200), FORMATION, FORMATION)
+    rng = random.Random(seed)
+    player1_positions = list(match_state.player1_team)
+    player2_positions = list(match_state.player2_team)
+    rng.shuffle(player2_positions)
+    for player1_position, player2_position in zip(player1_positions, player2_positions):
+        match_state.play_round(player1_position, player2_position,
+                               (rng.randint(-5, 5), rng.randint(-5, 5)))
+    return match_state
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_round_trip_keeps_every_round(seed):
+    match_state = played_match(seed)
+    details = MatchArchive.encode(match_state)
+    assert details['format'] == ARCHIVE_FORMAT
+
+    # Stored in a JSON column
+    rounds = MatchArchive.decode(json.loads(json.dumps(details)))
+    assert len(rounds) == len(match_state.round_history) == 11
+
+    for record, round_data in zip(rounds, match_state.round_history):
+        attacker, defender = round_data['details']['attacker'], round_data['details']['defender']
+        assert record.round == round_data['round']
+        assert record.player1_position == round_data['player1_position']
+        assert record.player2_position == round_data['player2_position']
+        assert record.player1_card_id == match_state.player1_team[record.player1_position].id
+        assert record.player2_card_id == match_state.player2_team[record.player2_position].id
+        assert record.attack_stat == attacker['effective_attack']
+        assert record.defense_stat == defender['effective_defense']
+        assert record.attack_roll == attacker['roll']
+        assert record.defense_roll == defender['roll']
+        assert record.result == round_data['details']['result']
+        assert record.player1_attacking == (record.round % 2 == 1)
+
+def test_rounds_are_fixed_width():
+    details = MatchArchive.encode(played_match(1))
+    assert len(base64.b64decode(details['data'])) == 11 * ROUND_STRUCT.size
+
+def test_legacy_rows_decode_without_card_ids():
+    match_state = played_match(4)
+    for stored in (match_state.round_history, json.dumps(match_state.round_history)):
+        rounds = MatchArchive.decode(stored)
+        packed = MatchArchive.decode(MatchArchive.encode(match_state))
+        assert [(r.player1_position, r.attack_roll, r.defense_roll) for r in rounds] == \
+               [(r.player1_position, r.attack_roll, r.defense_roll) for r in packed]
+        assert all(r.player1_card_id is None for r in rounds)
+
+def test_unknown_formats_and_positions():
+    assert MatchArchive.decode(None) == []
+    assert MatchArchive.decode({'format': ARCHIVE_FORMAT + 1, 'data': ''}) == []
+    with pytest.raises(ValueError):
+        MatchArchive.position_code('CB1')
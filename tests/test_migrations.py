@@ -0,0 +1,130 @@
+"""
+Bootstrapping a database created by create_all before migrations existed.
+"""
+import asyncio
+import pytest
+from sqlalchemy import MetaData, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from database.database import Base
+from database.migrations import HEAD, get_version, upgrade
+
+# Schema objects the migrations add to a pre-migration database
+MIGRATED_TABLES = {'player_ratings', 'collections'}
+MIGRATED_KEYS = {
+    'uq_leaderboard_guild_user', 'ix_leaderboard_guild_rank', 'ix_collections_card_id',
+    'uq_collections_user_card', 'uq_team_slots_team_position', 'ix_bets_guild_creator_challenged',
+    'uq_active_matches_channel', 'uq_spawned_cards_message', 'ix_cards_api_player_id',
+    'ix_cards_name_lower',
+}
+# collections as create_all used to make it: one row per copy, no quantity
+LEGACY_COLLECTIONS = """
+    CREATE TABLE collections (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id BIGINT REFERENCES users (id) ON DELETE CASCADE,
+        card_id INTEGER REFERENCES cards (id) ON DELETE CASCADE,
+        obtained_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+def legacy_metadata() -> MetaData:
+    """The models' schema as it was before versioned migrations"""
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        if table.name in MIGRATED_TABLES:
+            continue
+        copy = table.to_metadata(metadata)
+        for index in list(copy.indexes):
+            if index.name in MIGRATED_KEYS:
+                copy.indexes.discard(index)
+        for constraint in list(copy.constraints):
+            if constraint.name in MIGRATED_KEYS:
+                copy.constraints.discard(constraint)
+    return metadata
+
+SEED = [
+    "INSERT INTO users (id, username) VALUES (1, 'one'), (2, 'two')",
+    "INSERT INTO cards (id, name, position, overall_rating, attack_stat, defense_stat, card_type) "
+    "VALUES (1, 'A', 'ST', 80, 80, 40, 'BASE'), (2, 'B', 'GK', 70, 20, 75, 'BASE')",
+    # Three copies of card 1 and one of card 2
+    "INSERT INTO collections (user_id, card_id, obtained_at) VALUES "
+    "(1, 1, '2024-01-03 00:00:00'), (1, 1, '2024-01-01 00:00:00'), (1, 1, '2024-01-02 00:00:00'), "
+    "(1, 2, '2024-01-05 00:00:00')",
+    # Two leaderboard rows for the same player in a guild
+    "INSERT INTO leaderboard (guild_id, user_id, points, wins, draws, losses) VALUES "
+    "(10, 1, 3, 1, 0, 0), (10, 1, 7, 2, 1, 1), (10, 2, 0, 0, 0, 2)",
+    "INSERT INTO teams (id, user_id, guild_id) VALUES (1, 1, 10)",
+    "INSERT INTO team_slots (team_id, card_id, position) VALUES (1, 1, 'ST'), (1, 2, 'ST')",
+    "INSERT INTO active_matches (guild_id, channel_id, player1_id, player2_id, current_turn_player) VALUES "
+    "(10, 500, 1, 2, 1), (10, 500, 2, 1, 2)",
+    "INSERT INTO spawned_cards (guild_id, channel_id, message_id, card_id, expires_at) VALUES "
+    "(10, 500, 900, 1, '2024-01-01 00:00:00'), (10, 500, 900, 2, '2024-01-01 00:00:00')",
+]
+
+def test_legacy_database_is_upgraded_from_version_0(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}", poolclass=NullPool)
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(legacy_metadata().create_all)
+            await conn.execute(text(LEGACY_COLLECTIONS))
+            for statement in SEED:
+                await conn.execute(text(statement))
+
+        assert await get_version(engine) is None
+        applied = await upgrade(engine)
+        version = await get_version(engine)
+
+        async with engine.connect() as conn:
+            collections = (await conn.execute(text(
+                "SELECT card_id, quantity, obtained_at, last_obtained_at FROM collections ORDER BY card_id"
+            ))).all()
+            leaderboard = (await conn.execute(text(
+                "SELECT user_id, points, wins, draws, losses FROM leaderboard ORDER BY user_id"
+            ))).all()
+            slots = (await conn.execute(text("SELECT card_id FROM team_slots"))).scalars().all()
+            matches = (await conn.execute(text("SELECT player1_id FROM active_matches"))).scalars().all()
+            spawns = (await conn.execute(text("SELECT card_id FROM spawned_cards"))).scalars().all()
+            ratings = (await conn.execute(text("SELECT COUNT(*) FROM player_ratings"))).scalar()
+
+        # The unique keys now hold
+        with pytest.raises(IntegrityError):
+            async with engine.begin() as conn:
+                await conn.execute(text("INSERT INTO collections (user_id, card_id, quantity) VALUES (1, 1, 1)"))
+        with pytest.raises(IntegrityError):
+            async with engine.begin() as conn:
+                await conn.execute(text("INSERT INTO leaderboard (guild_id, user_id) VALUES (10, 2)"))
+
+        rerun = await upgrade(engine)
+        await engine.dispose()
+        return applied, version, collections, leaderboard, slots, matches, spawns, ratings, rerun
+
+    applied, version, collections, leaderboard, slots, matches, spawns, ratings, rerun = asyncio.run(scenario())
+    assert applied == list(range(1, HEAD + 1))
+    assert version == HEAD
+    assert rerun == []
+
+    # Copies are folded into one row per card, keeping the first and latest dates
+    assert [(card_id, quantity) for card_id, quantity, _, _ in collections] == [(1, 3), (2, 1)]
+    assert str(collections[0][2]).startswith('2024-01-01')
+    assert str(collections[0][3]).startswith('2024-01-03')
+
+    # Duplicate leaderboard rows are summed, not dropped
+    assert leaderboard == [(1, 10, 3, 1, 1), (2, 0, 0, 0, 2)]
+    # Latest slot assignment and newest active match win; the first spawn record is kept
+    assert slots == [2]
+    assert matches == [2]
+    assert spawns == [1]
+    assert ratings == 0
+
+def test_empty_database_is_created_at_head(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'new.db'}", poolclass=NullPool)
+
+    async def scenario():
+        applied = await upgrade(engine)
+        version = await get_version(engine)
+        await engine.dispose()
+        return applied, version
+
+    assert asyncio.run(scenario()) == ([], HEAD)
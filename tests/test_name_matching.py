@@ -0,0 +1,82 @@
+"""
+Name matching for /select and catch guesses.
+"""
+import config
+from utils.name_matching import NameMatcher, edit_distance, is_match, similarity
+
+class Named:
+    def __init__(self, name: str):
+        self.name = name
+
+def lineup_matcher():
+    cards = {'ST': Named("Cristiano Ronaldo"), 'LW': Named("Kylian Mbappé"), 'GK': Named("Alisson Becker")}
+    return NameMatcher(cards.items(), key=lambda item: item[1].name)
+
+def test_select_matches_part_of_a_name():
+    """Any part of a name picks the player, as the old substring check did"""
+    matcher = lineup_matcher()
+    assert matcher.match("Ronal")[0] == 'ST'
+    assert matcher.match("Mbap")[0] == 'LW'
+    assert matcher.match("mba")[0] == 'LW'
+    assert matcher.match("ck")[0] == 'GK'
+
+def test_select_matches_full_names_surnames_and_typos():
+    matcher = lineup_matcher()
+    assert matcher.match("cristiano ronaldo")[0] == 'ST'
+    assert matcher.match("Becker")[0] == 'GK'
+    assert matcher.match("Kylian Mbape")[0] == 'LW'
+    assert matcher.match("Haaland") is None
+
+def test_score_tiers():
+    assert similarity("Kylian Mbappe", "Kylian Mbappé") == 1.0
+    assert similarity("Mbappe", "Kylian Mbappé") == 0.95
+    assert similarity("Mbap", "Kylian Mbappé") == 0.9
+    assert similarity("Kylian Mbape", "Kylian Mbappé") < 0.9
+
+class Card(Named):
+    def __init__(self, id: int, name: str):
+        super().__init__(name)
+        self.id = id
+
+def test_search_ranks_and_filters_by_id():
+    """Card search: exact, then whole word, then fuzzy; allowed limits it to owned cards"""
+    cards = [Card(1, "Cristiano Ronaldo"), Card(2, "Ronaldo"), Card(3, "Ronaldinho"), Card(4, "Kylian Mbappé")]
+    matcher = NameMatcher(cards, threshold=0.3)
+    assert [card.id for card, _ in matcher.search("Ronaldo", 10)] == [2, 1, 3]
+    assert [card.id for card, _ in matcher.search("Ronaldo", 10, allowed={1, 3})] == [1, 3]
+    assert [card.id for card, _ in matcher.search("Ronaldo", 10, threshold=0.9)] == [2, 1]
+    assert matcher.search("Mbappe", 10, allowed={1, 2}) == []
+
+def test_edit_distance_counts_swaps_as_one_edit():
+    assert edit_distance("mbappe", "mbappe", 0) == 0
+    assert edit_distance("mbappe", "mbpape", 1) == 1
+    assert edit_distance("mbappe", "mbape", 1) == 1
+    # Capped at limit + 1
+    assert edit_distance("mbappe", "pmabep", 1) == 2
+    assert edit_distance("mbappe", "kylian mbappe", 2) == 3
+
+def test_catch_accepts_exact_names_and_one_typo_per_eight_letters():
+    assert is_match("jude bellingham", "Jude Bellingham (TOTS)")
+    assert is_match("Kylian Mbappe", "Kylian Mbappé")
+    # 15 letters: one edit
+    assert is_match("Jdue Bellingham", "Jude Bellingham")
+    assert not is_match("Jdue Bellignham", "Jude Bellingham")
+    # 22 letters: two edits
+    assert is_match("Trnet Alexadner-Arnold", "Trent Alexander-Arnold")
+    assert not is_match("Trnet Alexadner Arnlod", "Trent Alexander-Arnold")
+    # Under 8 letters a typo needs the similarity threshold
+    assert not is_match("Pderi", "Pedri")
+
+def test_catch_rejects_other_players_and_partial_names():
+    # The closest pair of different players in the catalog: two edits apart
+    assert not is_match("Jobe Bellingham", "Jude Bellingham")
+    assert not is_match("Bellingham", "Jude Bellingham")
+    assert not is_match("Jude", "Jude Bellingham")
+    assert not is_match("", "Jude Bellingham")
+
+def test_catch_similarity_threshold_boundary(monkeypatch):
+    monkeypatch.setattr(config, 'CATCH_TYPO_CHARS', 0)
+    score = similarity("Jude Bellinghm", "Jude Bellingham")
+    assert is_match("Jude Bellinghm", "Jude Bellingham", threshold=score)
+    assert not is_match("Jude Bellinghm", "Jude Bellingham", threshold=score + 0.01)
+    assert not is_match("Jdue Bellingham", "Jude Bellingham")
@@ -4,6 +4,7 @@ from typing import Optional, Dict, List
 from database.models import Card, CardType
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from utils.card_index import card_index
 import random
 
 class APIFootball:
@@ -137,6 +138,7 @@ class APIFootball:
             session.add(new_card)
             await session.commit()
             await session.refresh(new_card)
+            card_index.invalidate()
             
             return new_card
         except Exception as e:
@@ -157,18 +159,9 @@ class APIFootball:
         return cached_count
     
     async def get_random_card_from_db(self, session: AsyncSession, card_type: CardType = None) -> Optional[Card]:
-        """Get a random card from database"""
+        """Get a random card from the in-memory card index"""
         try:
-            query = select(Card)
-            if card_type:
-                query = query.where(Card.card_type == card_type)
-            
-            result = await session.execute(query)
-            cards = result.scalars().all()
-            
-            if cards:
-                return random.choice(cards)
-            return None
+            return await card_index.sample(card_type=card_type)
         except Exception as e:
             print(f"Error getting random card: {e}")
             return None
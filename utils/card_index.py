@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import random
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, func
+from database.database import session_scope
+from database.models import Card, CardType
+from utils.name_matching import normalize_name
+import config
+
+logger = logging.getLogger('card_index')
+
+class CardRecord:
+    """
+    Read-only copy of a Card row.
+    Has the same attribute names as Card, so embeds and the match engine take
+    either; records are shared between callers and can't be modified.
+    """
+
+    __slots__ = ('id', 'code', 'api_player_id', 'name', 'position', 'overall_rating',
+                 'attack_stat', 'defense_stat', 'club', 'nation', 'league',
+                 'card_type', 'event_type', 'photo_url', 'updated_at')
+
+    def __init__(self, id: int, code: Optional[str], api_player_id: Optional[int], name: str, position: str,
+                 overall_rating: int, attack_stat: int, defense_stat: int, club: Optional[str],
+                 nation: Optional[str], league: Optional[str], card_type: CardType,
+                 event_type: Optional[str], photo_url: Optional[str], updated_at: Optional[datetime]):
+        for slot, value in zip(self.__slots__, (id, code, api_player_id, name, position, overall_rating,
+                                                attack_stat, defense_stat, club, nation, league,
+                                                card_type or CardType.BASE, event_type, photo_url, updated_at)):
+            object.__setattr__(self, slot, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"CardRecord is read-only (tried to set {name})")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"CardRecord is read-only (tried to delete {name})")
+
+    def __repr__(self):
+        return f"<CardRecord {self.id} {self.name!r} {self.overall_rating}>"
+
+# Card columns in CardRecord order
+RECORD_COLUMNS = [getattr(Card, slot) for slot in CardRecord.__slots__]
+
+def _group_key(value: Optional[str]) -> Optional[str]:
+    """Lookup key for club, nation, league and event_type"""
+    return normalize_name(value) if value else None
+
+class CardIndex:
+    """
+    Process-wide in-memory card catalog.
+    The whole catalog is loaded once as read-only CardRecords and indexed by
+    id, code, normalized name, club, nation, league and event_type, so card
+    metadata never needs a database query. Random picks use pools grouped by
+    (card_type, event_type, position). After catalog writes call invalidate();
+    changes made by other processes are picked up by the periodic stamp check.
+    """
+
+    def __init__(self, refresh_interval: int = None):
+        self.refresh_interval = refresh_interval or config.CARD_INDEX_REFRESH_SECONDS
+        self.cards: List[CardRecord] = []
+        self.by_id: Dict[int, CardRecord] = {}
+        self.by_code: Dict[str, CardRecord] = {}
+        self.by_name: Dict[str, List[CardRecord]] = {}
+        self.by_club: Dict[str, List[CardRecord]] = {}
+        self.by_nation: Dict[str, List[CardRecord]] = {}
+        self.by_league: Dict[str, List[CardRecord]] = {}
+        self.by_event_type: Dict[str, List[CardRecord]] = {}
+        self._pools: Dict[Tuple, List[CardRecord]] = {}  # {(card_type, event_type, position): [cards]}
+        self._stamp = None
+        self.version = 0  # Bumped on every rebuild so derived caches know to refresh
+        self._loaded = False
+        self._dirty = False
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    async def _read_stamp(session) -> Tuple:
+        """Cheap catalog fingerprint used to detect changes from other processes"""
+        result = await session.execute(
+            select(func.count(Card.id), func.max(Card.id), func.max(Card.updated_at))
+        )
+        return tuple(result.one())
+
+    async def load(self):
+        """(Re)build the index from the database"""
+        async with self._lock:
+            await self._load_locked()
+
+    async def _load_locked(self):
+        self._dirty = False
+        async with session_scope() as session:
+            stamp = await self._read_stamp(session)
+            result = await session.execute(select(*RECORD_COLUMNS).order_by(Card.id))
+            cards = [CardRecord(*row) for row in result.all()]
+
+        by_name, by_club, by_nation, by_league, by_event_type = (defaultdict(list) for _ in range(5))
+        for card in cards:
+            by_name[normalize_name(card.name)].append(card)
+            for index, value in ((by_club, card.club), (by_nation, card.nation),
+                                 (by_league, card.league), (by_event_type, card.event_type)):
+                key = _group_key(value)
+                if key:
+                    index[key].append(card)
+
+        # Swap every index at once so readers never see a half-built catalog
+        self.cards = cards
+        self.by_id = {card.id: card for card in cards}
+        self.by_code = {card.code: card for card in cards if card.code}
+        self.by_name = dict(by_name)
+        self.by_club = dict(by_club)
+        self.by_nation = dict(by_nation)
+        self.by_league = dict(by_league)
+        self.by_event_type = dict(by_event_type)
+        self._pools = {}
+        self._stamp = stamp
+        self.version += 1
+        self._loaded = True
+        logger.info(f"Card index loaded with {len(cards)} cards")
+
+    def invalidate(self):
+        """Mark the index stale; it is rebuilt on next use. Safe to call from other threads."""
+        self._dirty = True
+
+    async def ensure_loaded(self):
+        """Load the index if it hasn't been loaded or was invalidated"""
+        if self._loaded and not self._dirty:
+            return
+        async with self._lock:
+            if not self._loaded or self._dirty:
+                await self._load_locked()
+
+    def _pool(self, card_type: Optional[CardType], event_type: Optional[str],
+              position: Optional[str]) -> List[CardRecord]:
+        """Get (and memoize) the list of cards matching a filter combination"""
+        key = (card_type, event_type, position)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = [
+                card for card in self.cards
+                if (card_type is None or card.card_type == card_type)
+                and (event_type is None or card.event_type == event_type)
+                and (position is None or card.position == position)
+            ]
+            self._pools[key] = pool
+        return pool
+
+    async def sample(self, card_type: CardType = None, event_type: str = None,
+                     position: str = None) -> Optional[CardRecord]:
+        """Pick a random card matching the filters"""
+        await self.ensure_loaded()
+        pool = self._pool(card_type, event_type, position)
+        if not pool:
+            return None
+        return random.choice(pool)
+
+    async def get(self, card_id: int) -> Optional[CardRecord]:
+        """Look up a card by ID"""
+        await self.ensure_loaded()
+        return self.by_id.get(card_id)
+
+    async def get_many(self, card_ids: Iterable[int]) -> Dict[int, CardRecord]:
+        """Look up several cards by ID; unknown IDs are left out"""
+        await self.ensure_loaded()
+        return {card_id: self.by_id[card_id] for card_id in card_ids if card_id in self.by_id}
+
+    async def get_by_code(self, code: str) -> Optional[CardRecord]:
+        """Look up a card by its catalog code"""
+        await self.ensure_loaded()
+        return self.by_code.get(code)
+
+    async def find_by_name(self, name: str) -> List[CardRecord]:
+        """Cards whose normalized name equals the normalized query"""
+        await self.ensure_loaded()
+        return list(self.by_name.get(normalize_name(name), ()))
+
+    @staticmethod
+    def _find_group(index: Dict[str, List[CardRecord]], query: str) -> List[CardRecord]:
+        """Cards in every group whose key contains the normalized query"""
+        key = _group_key(query)
+        if not key:
+            return []
+        exact = index.get(key)
+        if exact is not None:
+            return list(exact)
+        # Few distinct groups, so scanning the keys is cheap
+        return [card for group, cards in index.items() if key in group for card in cards]
+
+    async def find_by_club(self, club: str) -> List[CardRecord]:
+        """Cards from a club (exact or partial name)"""
+        await self.ensure_loaded()
+        return self._find_group(self.by_club, club)
+
+    async def find_by_nation(self, nation: str) -> List[CardRecord]:
+        """Cards from a nation (exact or partial name)"""
+        await self.ensure_loaded()
+        return self._find_group(self.by_nation, nation)
+
+    async def find_by_league(self, league: str) -> List[CardRecord]:
+        """Cards from a league (exact or partial name)"""
+        await self.ensure_loaded()
+        return self._find_group(self.by_league, league)
+
+    async def find_by_event_type(self, event_type: str) -> List[CardRecord]:
+        """Cards from an event (exact or partial name)"""
+        await self.ensure_loaded()
+        return self._find_group(self.by_event_type, event_type)
+
+    async def refresh_if_stale(self):
+        """Reload if the catalog changed outside this process (e.g. populate_db)"""
+        if not self._loaded:
+            return
+        async with session_scope() as session:
+            stamp = await self._read_stamp(session)
+        if stamp != self._stamp:
+            logger.info("Card catalog changed, rebuilding index")
+            await self.load()
+
+    async def _refresh_loop(self):
+        """Periodically check for catalog changes"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh_if_stale()
+            except Exception as e:
+                logger.error(f"Error refreshing card index: {e}")
+
+    def start(self):
+        """Start the periodic staleness check"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop the periodic staleness check"""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+# Process-wide card index
+card_index = CardIndex()
@@ -0,0 +1,126 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select, func, or_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.database import session_scope
+from database.models import Card, Collection
+from utils.card_index import CardIndex, CardRecord, card_index
+from utils.name_matching import NameMatcher
+import config
+
+logger = logging.getLogger('card_search')
+
+def _escape_like(query: str) -> str:
+    return query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+class CardSearch:
+    """
+    Ranked card name search.
+    On Postgres with pg_trgm the database does the search through the
+    ix_cards_name_trgm GIN index; otherwise a NameMatcher over the card
+    catalog is used, which scores names the same way /select does. Either way results are catalog records, best
+    match first: exact name, then whole-word and substring matches (what the
+    old ILIKE lookups found), then close misspellings.
+    """
+
+    def __init__(self, index: CardIndex, threshold: float = None):
+        self.index = index
+        self.threshold = config.CARD_SEARCH_THRESHOLD if threshold is None else threshold
+        self._use_trgm: Optional[bool] = None
+        self._fallback: Optional[NameMatcher[CardRecord]] = None
+        self._fallback_version = None
+
+    async def _trgm_available(self, session: AsyncSession) -> bool:
+        """Whether the database can run the search itself (checked once per process)"""
+        if self._use_trgm is None:
+            if session.bind.dialect.name != 'postgresql':
+                self._use_trgm = False
+            else:
+                result = await session.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+                self._use_trgm = result.first() is not None
+                if not self._use_trgm:
+                    logger.warning("pg_trgm is not installed; card search uses the in-process index")
+        return self._use_trgm
+
+    async def _search_db(self, session: AsyncSession, query: str, owner: Optional[int],
+                         limit: int) -> List[int]:
+        """Card IDs ranked by the database: exact name, then trigram similarity"""
+        # Scope the % operator's threshold to this transaction
+        await session.execute(
+            select(func.set_config('pg_trgm.similarity_threshold', str(self.threshold), True))
+        )
+        stmt = (
+            select(Card.id)
+            .where(or_(Card.name.ilike(f"%{_escape_like(query)}%", escape='\\'), Card.name.op('%')(query)))
+            .order_by(
+                (func.lower(Card.name) == query.lower()).desc(),
+                func.similarity(Card.name, query).desc(),
+                Card.id
+            )
+            .limit(limit)
+        )
+        if owner is not None:
+            stmt = stmt.join(Collection, Collection.card_id == Card.id).where(Collection.user_id == owner)
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+    def _fallback_index(self) -> NameMatcher[CardRecord]:
+        if self._fallback is None or self._fallback_version != self.index.version:
+            self._fallback = NameMatcher(self.index.cards, threshold=self.threshold)
+            self._fallback_version = self.index.version
+        return self._fallback
+
+    async def search(self, query: str, owner: int = None, limit: int = 10) -> List[CardRecord]:
+        """
+        Cards matching a name query, best first.
+        With owner, only cards in that user's collection are returned.
+        """
+        query = (query or '').strip()
+        if not query:
+            return []
+        await self.index.ensure_loaded()
+
+        card_ids = owned = None
+        async with session_scope() as session:
+            if await self._trgm_available(session):
+                card_ids = await self._search_db(session, query, owner, limit)
+            elif owner is not None:
+                result = await session.execute(select(Collection.card_id).where(Collection.user_id == owner))
+                owned = set(result.scalars().all())
+
+        if card_ids is None:
+            if owned is not None and not owned:
+                return []
+            matches = self._fallback_index().search(query, limit, allowed=owned)
+            return [card for card, _ in matches]
+
+        if any(card_id not in self.index.by_id for card_id in card_ids):
+            # A card was added since the catalog loaded
+            self.index.invalidate()
+            await self.index.ensure_loaded()
+        return [self.index.by_id[card_id] for card_id in card_ids if card_id in self.index.by_id]
+
+async def find_cards_by_names(session: AsyncSession, names: Iterable[str]) -> Dict[str, Card]:
+    """
+    Cards whose name equals one of names, ignoring case, keyed by lowercased name.
+    One query (served by ix_cards_name_lower) instead of one lookup per name;
+    returns ORM rows attached to session so callers can update them.
+    """
+    lowered = {name.lower() for name in names if name}
+    if not lowered:
+        return {}
+    result = await session.execute(
+        select(Card).where(func.lower(Card.name).in_(lowered)).order_by(Card.id)
+    )
+    cards = {}
+    for card in result.scalars().all():
+        # Keep the oldest card if a name was duplicated
+        cards.setdefault(card.name.lower(), card)
+    return cards
+
+# Process-wide card search
+card_search = CardSearch(card_index)
+
+async def search_cards(query: str, owner: int = None, limit: int = 10) -> List[CardRecord]:
+    """Ranked card name search (see CardSearch.search)"""
+    return await card_search.search(query, owner, limit)
@@ -1,72 +1,37 @@
 import discord
 import random
 import asyncio
+import logging
 from datetime import datetime, timedelta
-from typing import Optional
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from sqlalchemy import select, update
-from database.models import ServerConfig, SpawnedCard, Card, Collection, User, CardType
+from database.database import AsyncSessionLocal
+from database.models import ServerConfig, SpawnedCard, Card, User, CardType
+from utils.card_index import card_index
+from utils.drop_table import drop_engine
+from utils.spawn_registry import ActiveSpawn, SpawnRegistry, to_timestamp
+from utils.name_matching import is_match
+from utils.collection_ops import CollectionOps
 import config
 
+logger = logging.getLogger('card_spawner')
+
 class CardSpawner:
     """Handles card spawning in Discord channels"""
     
     def __init__(self, bot):
         self.bot = bot
-        self.active_spawns = {}  # {message_id: card_data}
-    
-    async def increment_message_count(self, session: AsyncSession, guild_id: int):
-        """Increment message count and check if card should spawn"""
-        # Get or create server config
-        result = await session.execute(
-            select(ServerConfig).where(ServerConfig.guild_id == guild_id)
-        )
-        server_config = result.scalar_one_or_none()
-        
-        if not server_config:
-            return False, None
-        
-        if not server_config.spawn_enabled or not server_config.spawn_channel_id:
-            return False, None
-        
-        # Increment message count
-        server_config.message_count += 1
-        
-        # Check if threshold is set, if not, set a new random threshold
-        if server_config.message_threshold is None:
-            server_config.message_threshold = random.randint(
-                config.SPAWN_MESSAGE_MIN,
-                config.SPAWN_MESSAGE_MAX
-            )
-        
-        # Check if we should spawn
-        should_spawn = server_config.message_count >= server_config.message_threshold
-        
-        if should_spawn:
-            # Reset counter and threshold
-            server_config.message_count = 0
-            server_config.message_threshold = random.randint(
-                config.SPAWN_MESSAGE_MIN,
-                config.SPAWN_MESSAGE_MAX
-            )
-            await session.commit()
-            return True, server_config.spawn_channel_id
-        
-        await session.commit()
-        return False, None
+        self.registry = SpawnRegistry(self._expire_spawns)
     
-    async def spawn_card(self, session: AsyncSession, guild_id: int, channel_id: int) -> Optional[discord.Message]:
+    async def spawn_card(self, guild_id: int, channel_id: int) -> Optional[discord.Message]:
         """Spawn a random card in the channel"""
         try:
-            # Get random card from database
-            result = await session.execute(select(Card))
-            cards = result.scalars().all()
+            # Draw a card from the weighted spawn table
+            card = await drop_engine.draw('spawn')
             
-            if not cards:
+            if not card:
                 return None
             
-            card = random.choice(cards)
-            
             # Get channel
             channel = self.bot.get_channel(channel_id)
             if not channel:
@@ -91,34 +56,36 @@ class CardSpawner:
             
             embed.set_footer(text=f"You have {config.CATCH_TIMEOUT_SECONDS} seconds to catch this card!")
             
-            # Create button
-            view = CatchCardView(self, card, session)
+            # Create button (holds no card or database state)
+            view = CatchCardView(self)
             
             # Send message
             message = await channel.send(embed=embed, view=view)
             
-            # Store spawned card in database
+            # Store spawned card in database using a short-lived session
             expires_at = datetime.utcnow() + timedelta(seconds=config.CATCH_TIMEOUT_SECONDS)
-            spawned_card = SpawnedCard(
+            async with AsyncSessionLocal() as session:
+                spawned_card = SpawnedCard(
+                    guild_id=guild_id,
+                    channel_id=channel_id,
+                    message_id=message.id,
+                    card_id=card.id,
+                    caught=False,
+                    expires_at=expires_at
+                )
+                session.add(spawned_card)
+                await session.commit()
+            
+            # Register as active; the registry schedules expiry
+            self.registry.add(ActiveSpawn(
+                message_id=message.id,
                 guild_id=guild_id,
                 channel_id=channel_id,
-                message_id=message.id,
-                card_id=card.id,
-                caught=False,
-                expires_at=expires_at
-            )
-            session.add(spawned_card)
-            await session.commit()
-            
-            # Store in active spawns
-            self.active_spawns[message.id] = {
-                'card': card,
-                'spawned_card_id': spawned_card.id,
-                'expires_at': expires_at
-            }
-            
-            # Schedule expiration
-            asyncio.create_task(self._handle_expiration(message, spawned_card.id, channel))
+                spawned_card_id=spawned_card.id,
+                card=card,
+                expires_at=to_timestamp(expires_at),
+                view=view
+            ))
             
             return message
         
@@ -126,92 +93,138 @@ class CardSpawner:
             print(f"Error spawning card: {e}")
             return None
     
-    async def _handle_expiration(self, message: discord.Message, spawned_card_id: int, channel):
-        """Handle card spawn expiration"""
-        await asyncio.sleep(config.CATCH_TIMEOUT_SECONDS)
+    async def restore_spawns(self) -> int:
+        """Reload uncaught spawns from the database after a restart"""
+        async with AsyncSessionLocal() as session:
+            # Include recently expired spawns so their messages get cleaned up
+            cutoff = datetime.utcnow() - timedelta(seconds=config.CATCH_TIMEOUT_SECONDS)
+            result = await session.execute(
+                select(SpawnedCard)
+                .where(SpawnedCard.caught == False)
+                .where(SpawnedCard.expires_at > cutoff)
+            )
+            rows = result.scalars().all()
         
-        # Check if still active (not caught)
-        if message.id in self.active_spawns:
-            del self.active_spawns[message.id]
+        restored = 0
+        for row in rows:
+            card = await card_index.get(row.card_id)
+            if not card:
+                continue
             
-            # Update embed to show expired
-            embed = discord.Embed(
-                title="⚽ Card Expired",
-                description="This card was not caught in time and has disappeared!",
-                color=discord.Color.red()
-            )
+            # Clicks on restored messages are handled by the persistent catch view
+            self.registry.add(ActiveSpawn(
+                message_id=row.message_id,
+                guild_id=row.guild_id,
+                channel_id=row.channel_id,
+                spawned_card_id=row.id,
+                card=card,
+                expires_at=to_timestamp(row.expires_at)
+            ))
+            restored += 1
+        
+        logger.info(f"Restored {restored} active spawns")
+        return restored
+    
+    async def _expire_spawns(self, spawns: List[ActiveSpawn]):
+        """Mark a batch of expired spawns as gone"""
+        # Update embed to show expired
+        embed = discord.Embed(
+            title="⚽ Card Expired",
+            description="This card was not caught in time and has disappeared!",
+            color=discord.Color.red()
+        )
+        
+        edits = []
+        for spawn in spawns:
+            if spawn.view:
+                spawn.view.stop()
             
-            try:
-                await message.edit(embed=embed, view=None)
-            except:
-                pass
+            channel = self.bot.get_channel(spawn.channel_id)
+            if channel:
+                message = channel.get_partial_message(spawn.message_id)
+                edits.append(message.edit(embed=embed, view=None))
+        
+        # Errors (deleted messages, missing permissions) are ignored
+        await asyncio.gather(*edits, return_exceptions=True)
     
-    async def attempt_catch(self, session: AsyncSession, message_id: int, user_id: int, 
-                          username: str, guess: str) -> tuple[bool, str]:
+    async def attempt_catch(self, message_id: int, user_id: int,
+                          username: str, guess: str) -> tuple[bool, str, Optional[Card]]:
         """
         Attempt to catch a spawned card
-        Returns: (success, message)
+        Returns: (success, message, card)
         """
-        if message_id not in self.active_spawns:
-            return False, "This card is no longer available!"
+        spawn = self.registry.get(message_id)
+        if not spawn:
+            return False, "This card is no longer available!", None
         
-        spawn_data = self.active_spawns[message_id]
-        card = spawn_data['card']
-        
-        # Check if guess matches (case insensitive)
-        if guess.lower().strip() != card.name.lower().strip():
-            return False, f"Wrong name! Try again."
-        
-        # Correct guess! Give card to user
-        # Get or create user
-        result = await session.execute(
-            select(User).where(User.id == user_id)
-        )
-        user = result.scalar_one_or_none()
+        card = spawn.card
         
-        if not user:
-            user = User(id=user_id, username=username)
-            session.add(user)
-            await session.flush()
+        # Check if guess matches (accent/typo tolerant) - wrong guesses never touch the database
+        if not is_match(guess, card.name):
+            return False, f"Wrong name! Try again.", None
         
-        # Add card to collection
-        collection_entry = Collection(
-            user_id=user_id,
-            card_id=card.id
-        )
-        session.add(collection_entry)
-        
-        # Update user stats
-        user.cards_collected += 1
-        
-        # Mark spawned card as caught
-        await session.execute(
-            update(SpawnedCard)
-            .where(SpawnedCard.id == spawn_data['spawned_card_id'])
-            .values(caught=True, caught_by=user_id)
-        )
-        
-        await session.commit()
+        async with AsyncSessionLocal() as session:
+            # Claim the spawn atomically; only one concurrent catch can match caught == False
+            result = await session.execute(
+                update(SpawnedCard)
+                .where(SpawnedCard.id == spawn.spawned_card_id)
+                .where(SpawnedCard.caught == False)
+                .where(SpawnedCard.expires_at > datetime.utcnow())
+                .values(caught=True, caught_by=user_id)
+            )
+            
+            if result.rowcount != 1:
+                await session.rollback()
+                return False, "Too slow! This card has already been caught.", None
+            
+            # Correct guess! Give card to user
+            # Get or create user
+            result = await session.execute(
+                select(User).where(User.id == user_id)
+            )
+            user = result.scalar_one_or_none()
+            
+            if not user:
+                user = User(id=user_id, username=username, cards_collected=0)
+                session.add(user)
+                await session.flush()
+            
+            # Add card to collection and update user stats
+            await CollectionOps.grant_cards(session, user_id, [card.id])
+            
+            await session.commit()
         
         # Remove from active spawns
-        del self.active_spawns[message_id]
+        self.registry.remove(message_id)
+        if spawn.view:
+            spawn.view.stop()
         
-        return True, f"Congratulations! You caught **{card.name}** ({card.overall_rating} OVR {card.position})!"
+        return True, f"Congratulations! You caught **{card.name}** ({card.overall_rating} OVR {card.position})!", card
 
 class CatchCardView(discord.ui.View):
-    """View for catching cards"""
+    """
+    View for catching cards.
+    Stateless: the spawn is looked up by message ID when the modal is submitted,
+    so one persistent instance can serve every spawn message.
+    """
     
-    def __init__(self, spawner: CardSpawner, card: Card, session: AsyncSession):
-        super().__init__(timeout=config.CATCH_TIMEOUT_SECONDS)
+    def __init__(self, spawner: CardSpawner):
+        # Expiry is handled by the spawn registry, not the view timeout
+        super().__init__(timeout=None)
         self.spawner = spawner
-        self.card = card
-        self.session = session
     
-    @discord.ui.button(label="Catch Card!", style=discord.ButtonStyle.green, emoji="⚽")
+    @discord.ui.button(label="Catch Card!", style=discord.ButtonStyle.green, emoji="⚽",
+                       custom_id="spawn:catch")
     async def catch_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Handle catch button click"""
+        if interaction.message.id not in self.spawner.registry:
+            await interaction.response.send_message(
+                "This card is no longer available!", ephemeral=True
+            )
+            return
+        
         # Send modal for name input
-        modal = CatchCardModal(self.spawner, self.card, self.session)
+        modal = CatchCardModal(self.spawner)
         await interaction.response.send_modal(modal)
 
 class CatchCardModal(discord.ui.Modal, title="Catch the Card!"):
@@ -224,18 +237,15 @@ class CatchCardModal(discord.ui.Modal, title="Catch the Card!"):
         max_length=100
     )
     
-    def __init__(self, spawner: CardSpawner, card: Card, session: AsyncSession):
+    def __init__(self, spawner: CardSpawner):
         super().__init__()
         self.spawner = spawner
-        self.card = card
-        self.session = session
     
     async def on_submit(self, interaction: discord.Interaction):
         """Handle name submission"""
         guess = self.player_name.value
         
-        success, message = await self.spawner.attempt_catch(
-            self.session,
+        success, message, card = await self.spawner.attempt_catch(
             interaction.message.id,
             interaction.user.id,
             interaction.user.name,
@@ -246,15 +256,14 @@ class CatchCardModal(discord.ui.Modal, title="Catch the Card!"):
             # Update original message
             embed = discord.Embed(
                 title="⚽ Card Caught!",
-                description=f"{interaction.user.mention} caught **{self.card.name}**!",
+                description=f"{interaction.user.mention} caught **{card.name}**!",
                 color=discord.Color.gold()
             )
-            embed.add_field(name="Player", value=self.card.name, inline=True)
-            embed.add_field(name="Position", value=self.card.position, inline=True)
-            embed.add_field(name="Rating", value=f"{self.card.overall_rating} OVR", inline=True)
+            embed.add_field(name="Player", value=card.name, inline=True)
+            embed.add_field(name="Position", value=card.position, inline=True)
+            embed.add_field(name="Rating", value=f"{card.overall_rating} OVR", inline=True)
             
             await interaction.message.edit(embed=embed, view=None)
             await interaction.response.send_message(message, ephemeral=True)
         else:
             await interaction.response.send_message(message, ephemeral=True)
-
@@ -0,0 +1,158 @@
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List
+from sqlalchemy import event, select, update, delete, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.database import dialect_insert
+from database.models import User, Collection
+from utils.collection_pages import collection_pages
+from utils.owned_cards import owned_cards
+
+logger = logging.getLogger('collection_ops')
+
+def _run_after_commit(sync_session):
+    callbacks = sync_session.info.get('after_commit_callbacks', [])
+    sync_session.info['after_commit_callbacks'] = []
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Error in after-commit callback: {e}")
+
+def _drop_after_commit(sync_session, transaction):
+    # Commit has already run the callbacks; anything left belongs to a rollback or close
+    if transaction.parent is None:
+        sync_session.info['after_commit_callbacks'] = []
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]):
+    """
+    Run callback once the session's current transaction commits.
+    It is dropped if the transaction rolls back or the session closes first,
+    so in-memory caches only ever reflect committed rows.
+    """
+    sync_session = session.sync_session
+    if not sync_session.info.get('after_commit_hooked'):
+        event.listen(sync_session, 'after_commit', _run_after_commit)
+        event.listen(sync_session, 'after_transaction_end', _drop_after_commit)
+        sync_session.info['after_commit_hooked'] = True
+    sync_session.info.setdefault('after_commit_callbacks', []).append(callback)
+
+class CollectionOps:
+    """
+    Set-based collection writes on per-card quantities.
+    Each (user, card) pair is one row with a copy count, changed by atomic
+    increments and conditional decrements. Nothing here commits; callers
+    decide the transaction boundary, and the collection caches are cleared
+    once it commits.
+    """
+
+    @staticmethod
+    async def _add(session: AsyncSession, user_id: int, counts: Counter):
+        """Add copies with one upsert: new cards insert a row, owned cards bump their quantity"""
+        now = datetime.now(timezone.utc)
+        stmt = dialect_insert(session, Collection).values([
+            {'user_id': user_id, 'card_id': card_id, 'quantity': quantity,
+             'obtained_at': now, 'last_obtained_at': now}
+            for card_id, quantity in counts.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Collection.user_id, Collection.card_id],
+            set_={
+                'quantity': Collection.quantity + stmt.excluded.quantity,
+                'last_obtained_at': stmt.excluded.last_obtained_at
+            }
+        )
+        await session.execute(stmt)
+        added = list(counts)
+        after_commit(session, lambda: collection_pages.invalidate(user_id))
+        after_commit(session, lambda: owned_cards.added(user_id, added))
+
+    @staticmethod
+    async def grant_cards(session: AsyncSession, user_id: int, card_ids: Iterable[int]) -> int:
+        """Add cards to a user's collection (repeat an ID for several copies) and bump their stats. Returns cards added."""
+        counts = Counter(card_ids)
+        if not counts:
+            return 0
+
+        await CollectionOps._add(session, user_id, counts)
+        total = sum(counts.values())
+        await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(cards_collected=User.cards_collected + total)
+        )
+        return total
+
+    @staticmethod
+    async def remove_cards(session: AsyncSession, user_id: int, card_ids: Iterable[int]) -> List[int]:
+        """
+        Take copies out of a user's collection (repeat an ID to remove several).
+        The decrement only applies where enough copies remain, so concurrent
+        removals can't go below zero; rows that reach zero are deleted.
+        Returns the card IDs removed (with repeats).
+        """
+        counts = Counter(card_ids)
+        if not counts:
+            return []
+
+        result = await session.execute(
+            update(Collection)
+            .where(Collection.user_id == user_id)
+            .where(Collection.card_id.in_(list(counts)))
+            .where(Collection.quantity >= case(counts, value=Collection.card_id))
+            .values(quantity=Collection.quantity - case(counts, value=Collection.card_id))
+            .returning(Collection.card_id, Collection.quantity)
+            .execution_options(synchronize_session=False)
+        )
+        rows = result.all()
+        removed = [card_id for card_id, _ in rows for _ in range(counts[card_id])]
+        gone = [card_id for card_id, quantity in rows if quantity <= 0]
+        after_commit(session, lambda: collection_pages.invalidate(user_id))
+        after_commit(session, lambda: owned_cards.removed(user_id, gone))
+
+        if removed:
+            await session.execute(
+                delete(Collection)
+                .where(Collection.user_id == user_id)
+                .where(Collection.card_id.in_(set(removed)))
+                .where(Collection.quantity <= 0)
+                .execution_options(synchronize_session=False)
+            )
+        return removed
+
+    @staticmethod
+    async def transfer_cards(session: AsyncSession, owed: Dict[int, List[int]], to_user_id: int) -> List[int]:
+        """
+        Move cards between collections.
+        owed maps each giving user to the card IDs they hand over (repeat an ID to move copies).
+        The givers' rows are locked first, so concurrent transfers of the same
+        cards wait for each other instead of moving a copy twice. Copies a giver
+        doesn't have are skipped. Returns the moved card IDs (with repeats).
+        """
+        card_ids = {card_id for cards in owed.values() for card_id in cards}
+        if not card_ids:
+            return []
+
+        result = await session.execute(
+            select(Collection.user_id, Collection.card_id, Collection.quantity)
+            .where(Collection.user_id.in_(list(owed)))
+            .where(Collection.card_id.in_(card_ids))
+            .order_by(Collection.id)
+            .with_for_update()
+        )
+        available = {(user_id, card_id): quantity for user_id, card_id, quantity in result.all()}
+
+        moved = []
+        for from_user_id, cards in owed.items():
+            # Only ask for copies the giver has; the conditional decrement still guards a lost race
+            wanted = Counter()
+            for card_id, quantity in Counter(cards).items():
+                wanted[card_id] = min(quantity, available.get((from_user_id, card_id), 0))
+            wanted = +wanted
+            if wanted:
+                moved.extend(await CollectionOps.remove_cards(session, from_user_id, wanted.elements()))
+
+        if moved:
+            await CollectionOps._add(session, to_user_id, Counter(moved))
+        return moved
@@ -0,0 +1,242 @@
+import asyncio
+import base64
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, func, and_, or_
+from database.database import session_scope
+from database.models import Card, Collection, CardType
+import config
+
+logger = logging.getLogger('collection_pages')
+
+# (sort_by, event_filter, page_size, page)
+PageKey = Tuple[str, Optional[str], int, int]
+# Sort options: the column ordered on and whether it runs descending.
+# Card ID breaks ties so every row has a unique position for the keyset.
+SORTS = {
+    'ovr': (Card.overall_rating, True),
+    'name': (Card.name, False),
+    'date': (Collection.last_obtained_at, True),
+}
+
+class CollectionEntry:
+    """One owned card as shown in a collection page"""
+
+    __slots__ = ('card_id', 'name', 'position', 'overall_rating', 'card_type',
+                 'event_type', 'quantity', 'last_obtained_at')
+
+    def __init__(self, card_id: int, name: str, position: str, overall_rating: int, card_type: CardType,
+                 event_type: Optional[str], quantity: int, last_obtained_at: Optional[datetime]):
+        self.card_id = card_id
+        self.name = name
+        self.position = position
+        self.overall_rating = overall_rating
+        self.card_type = card_type
+        self.event_type = event_type
+        self.quantity = quantity
+        self.last_obtained_at = last_obtained_at
+
+    def sort_value(self, sort_by: str):
+        if sort_by == 'ovr':
+            return self.overall_rating
+        if sort_by == 'name':
+            return self.name
+        return self.last_obtained_at.isoformat() if self.last_obtained_at else None
+
+def encode_cursor(sort_by: str, entry: CollectionEntry) -> str:
+    """Opaque token for the page after entry"""
+    raw = json.dumps([sort_by, entry.sort_value(sort_by), entry.card_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode('ascii')
+
+def decode_cursor(sort_by: str, token: str) -> Optional[Tuple]:
+    """(sort value, card_id) from a token, or None if it is invalid or for another sort"""
+    try:
+        token_sort, value, card_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+        if token_sort != sort_by or type(card_id) is not int:
+            return None
+        if sort_by == 'date' and value is not None:
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        return None
+    return value, card_id
+
+class CollectionPages:
+    """
+    Paged reads of a user's collection.
+    Sorting, the event filter and LIMIT run in the database, and pages follow
+    a keyset cursor on (sort column, card_id), so each page reads one page of
+    rows however large the collection is. Totals come from a separate COUNT
+    that is cached briefly per user and filter.
+    Browsed pages are kept in a short-lived per-user page cache, and the
+    pages next to the one on screen can be prefetched into it.
+    """
+
+    def __init__(self, count_ttl: int = None, page_ttl: int = None):
+        self.count_ttl = count_ttl or config.COLLECTION_COUNT_CACHE_SECONDS
+        self.page_ttl = page_ttl or config.COLLECTION_PAGE_CACHE_SECONDS
+        self._counts: Dict[Tuple[int, Optional[str]], Tuple[Tuple[int, int], float]] = {}
+        self._pages: Dict[int, Dict[PageKey, Tuple[Tuple, float]]] = {}  # {user_id: {key: (page, expires_at)}}
+        self._pending: Dict[Tuple[int, PageKey], asyncio.Future] = {}
+        self._generation: Dict[int, int] = {}  # Bumped on invalidate so in-flight loads don't cache stale pages
+
+    @staticmethod
+    def _keyset(user_id: int, sort_by: str, after: Tuple):
+        """WHERE clause for rows after (value, card_id) in this sort order"""
+        column, descending = SORTS[sort_by]
+        value, card_id = after
+        if sort_by == 'date' and value is not None:
+            # Compare against the stored timestamp so the comparison matches ORDER BY
+            # exactly (SQLite keeps timestamps as text); the token's copy is the fallback
+            stored = (
+                select(Collection.last_obtained_at)
+                .where(Collection.user_id == user_id)
+                .where(Collection.card_id == card_id)
+                .scalar_subquery()
+            )
+            value = func.coalesce(stored, value)
+        if value is None:
+            # NULL sort values come last; only later card IDs among them remain
+            return and_(column.is_(None), Card.id > card_id)
+        beyond = column < value if descending else column > value
+        if descending:
+            # NULLs sort last descending, so they are still ahead of this row
+            beyond = or_(beyond, column.is_(None))
+        return or_(beyond, and_(column == value, Card.id > card_id))
+
+    async def get_page(self, user_id: int, sort_by: str = 'ovr', event_filter: str = None,
+                       page_size: int = 10, cursor: str = None,
+                       offset: int = 0) -> Tuple[List[CollectionEntry], Optional[str]]:
+        """
+        Get one page of a user's collection.
+        Pass the previous page's cursor to continue; offset is only for jumping
+        straight to a page number. Returns (entries, cursor for the next page or None).
+        """
+        if sort_by not in SORTS:
+            sort_by = 'ovr'
+        column, descending = SORTS[sort_by]
+
+        query = (
+            select(Card.id, Card.name, Card.position, Card.overall_rating, Card.card_type,
+                   Card.event_type, Collection.quantity, Collection.last_obtained_at)
+            .join(Collection, Card.id == Collection.card_id)
+            .where(Collection.user_id == user_id)
+        )
+        if event_filter:
+            query = query.where(Card.event_type == event_filter)
+
+        after = decode_cursor(sort_by, cursor) if cursor else None
+        if after is not None:
+            query = query.where(self._keyset(user_id, sort_by, after))
+        elif offset:
+            query = query.offset(offset)
+
+        order = column.desc().nulls_last() if descending else column.asc()
+        query = query.order_by(order, Card.id.asc()).limit(page_size + 1)
+
+        async with session_scope() as session:
+            result = await session.execute(query)
+            entries = [CollectionEntry(*row) for row in result.all()]
+
+        has_more = len(entries) > page_size
+        entries = entries[:page_size]
+        return entries, (encode_cursor(sort_by, entries[-1]) if has_more and entries else None)
+
+    async def count(self, user_id: int, event_filter: str = None) -> Tuple[int, int]:
+        """(distinct cards, total copies) matching the filter, cached briefly"""
+        key = (user_id, event_filter)
+        cached = self._counts.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        query = (
+            select(func.count(Collection.id), func.coalesce(func.sum(Collection.quantity), 0))
+            .where(Collection.user_id == user_id)
+        )
+        if event_filter:
+            query = query.join(Card, Card.id == Collection.card_id).where(Card.event_type == event_filter)
+
+        async with session_scope() as session:
+            result = await session.execute(query)
+            totals = tuple(result.one())
+
+        now = time.monotonic()
+        if len(self._counts) >= 1000:
+            self._counts = {k: v for k, v in self._counts.items() if v[1] > now}
+        self._counts[key] = (totals, now + self.count_ttl)
+        return totals
+
+    async def fetch(self, user_id: int, sort_by: str, event_filter: Optional[str], page_size: int,
+                    page: int, cursor: str = None) -> Tuple[List[CollectionEntry], Optional[str]]:
+        """
+        Get a numbered page through the page cache.
+        cursor is the token that starts this page if known, otherwise it is read by offset.
+        Concurrent requests for the same page share one query.
+        """
+        key = (sort_by, event_filter, page_size, page)
+        cached = self._pages.get(user_id, {}).get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        pending = self._pending.get((user_id, key))
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[(user_id, key)] = future
+        generation = self._generation.get(user_id, 0)
+        try:
+            result = await self.get_page(user_id, sort_by, event_filter, page_size,
+                                         cursor, (page - 1) * page_size)
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a failed prefetch nobody awaited doesn't log a warning
+            future.exception()
+            raise
+        finally:
+            self._pending.pop((user_id, key), None)
+
+        if self._generation.get(user_id, 0) == generation:
+            self._store_page(user_id, key, result)
+        future.set_result(result)
+        return result
+
+    def _store_page(self, user_id: int, key: PageKey, result: Tuple):
+        now = time.monotonic()
+        if len(self._pages) >= 1000:
+            self._pages = {
+                uid: live for uid, live in (
+                    (uid, {k: v for k, v in pages.items() if v[1] > now}) for uid, pages in self._pages.items()
+                ) if live
+            }
+        self._pages.setdefault(user_id, {})[key] = (result, now + self.page_ttl)
+
+    def is_cached(self, user_id: int, sort_by: str, event_filter: Optional[str], page_size: int, page: int) -> bool:
+        key = (sort_by, event_filter, page_size, page)
+        cached = self._pages.get(user_id, {}).get(key)
+        return (cached is not None and cached[1] > time.monotonic()) or (user_id, key) in self._pending
+
+    def prefetch(self, user_id: int, sort_by: str, event_filter: Optional[str], page_size: int,
+                 page: int, cursor: str = None):
+        """Load a page into the cache in the background if it isn't there already"""
+        if self.is_cached(user_id, sort_by, event_filter, page_size, page):
+            return
+        task = asyncio.create_task(self.fetch(user_id, sort_by, event_filter, page_size, page, cursor))
+        task.add_done_callback(self._log_prefetch_error)
+
+    @staticmethod
+    def _log_prefetch_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Collection page prefetch failed: {task.exception()}")
+
+    def invalidate(self, user_id: int):
+        """Drop cached totals and pages for a user after their collection changes"""
+        for key in [key for key in self._counts if key[0] == user_id]:
+            del self._counts[key]
+        self._pages.pop(user_id, None)
+        self._generation[user_id] = self._generation.get(user_id, 0) + 1
+
+# Process-wide collection pager
+collection_pages = CollectionPages()
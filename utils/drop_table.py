@@ -0,0 +1,149 @@
+import random
+from typing import Dict, List, Optional, Sequence
+from database.models import CardType
+from utils.card_index import CardIndex, CardRecord, card_index
+import config
+
+class AliasTable:
+    """
+    Walker/Vose alias table for O(1) weighted sampling.
+    Building is O(n); every draw after that costs two random numbers.
+    """
+
+    __slots__ = ('items', 'prob', 'alias')
+
+    def __init__(self, items: Sequence, weights: Sequence[float]):
+        if len(items) != len(weights):
+            raise ValueError("items and weights must have the same length")
+
+        n = len(items)
+        total = float(sum(weights))
+        self.items = list(items)
+        self.prob = [0.0] * n
+        self.alias = [0] * n
+
+        if n == 0 or total <= 0:
+            self.items = []
+            return
+
+        # Scale weights so the average bucket is exactly 1
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+
+        # Leftovers are full buckets (floating point rounding)
+        for i in large + small:
+            self.prob[i] = 1.0
+
+    def __len__(self):
+        return len(self.items)
+
+    def draw(self, rng: random.Random = random):
+        """Draw one item"""
+        if not self.items:
+            return None
+        i = int(rng.random() * len(self.items))
+        if rng.random() < self.prob[i]:
+            return self.items[i]
+        return self.items[self.alias[i]]
+
+    def draw_many(self, count: int, rng: random.Random = random) -> List:
+        """Draw several items (with replacement)"""
+        if not self.items:
+            return []
+        items, prob, alias = self.items, self.prob, self.alias
+        n = len(items)
+        results = []
+        for _ in range(count):
+            i = int(rng.random() * n)
+            results.append(items[i] if rng.random() < prob[i] else items[alias[i]])
+        return results
+
+def card_weight(card: CardRecord, spec: Dict) -> float:
+    """
+    Weight of a card under a drop table spec.
+    The card_type, event_type and rating band weights are multiplied together.
+    """
+    card_type = card.card_type.value if card.card_type else CardType.BASE.value
+
+    type_weights = spec.get('card_types')
+    if type_weights is not None:
+        weight = float(type_weights.get(card_type, 0))
+    else:
+        weight = 1.0
+
+    if weight <= 0:
+        return 0.0
+
+    event_weights = spec.get('event_types', {})
+    if card.event_type and card.event_type in event_weights:
+        weight *= event_weights[card.event_type]
+
+    # Rating bands are (min_rating, weight) pairs, highest first
+    for min_rating, band_weight in spec.get('rating_bands', []):
+        if card.overall_rating >= min_rating:
+            weight *= band_weight
+            break
+
+    return max(0.0, weight)
+
+class DropEngine:
+    """Weighted card drops built from the card index and config.DROP_TABLES"""
+
+    def __init__(self, index: CardIndex, tables: Dict[str, Dict] = None):
+        self.index = index
+        self.specs = tables if tables is not None else config.DROP_TABLES
+        self._tables: Dict[str, AliasTable] = {}
+        self._version = None
+
+    async def _get_table(self, name: str) -> Optional[AliasTable]:
+        """Get the alias table for a drop table, rebuilding after catalog changes"""
+        await self.index.ensure_loaded()
+
+        if self._version != self.index.version:
+            self._tables = {}
+            self._version = self.index.version
+
+        table = self._tables.get(name)
+        if table is None:
+            spec = self.specs.get(name)
+            if spec is None:
+                return None
+            cards = []
+            weights = []
+            for card in self.index.cards:
+                weight = card_weight(card, spec)
+                if weight > 0:
+                    cards.append(card)
+                    weights.append(weight)
+            table = AliasTable(cards, weights)
+            self._tables[name] = table
+        return table
+
+    async def draw(self, name: str) -> Optional[CardRecord]:
+        """Draw one card from a drop table"""
+        table = await self._get_table(name)
+        if table is None:
+            return None
+        return table.draw()
+
+    async def draw_many(self, name: str, count: int) -> List[CardRecord]:
+        """Draw several cards from a drop table (e.g. for multi-card packs)"""
+        table = await self._get_table(name)
+        if table is None:
+            return []
+        return table.draw_many(count)
+
+# Process-wide drop engine
+drop_engine = DropEngine(card_index)
@@ -49,20 +49,21 @@ class EmbedBuilder:
         return embed
     
     @staticmethod
-    def collection_embed(user: User, cards: List[Card], page: int, total_pages: int, 
-                        sort_by: str = "ovr") -> discord.Embed:
-        """Create an embed for displaying user's collection"""
+    def collection_embed(username: str, entries: List, page: int, total_pages: int,
+                        sort_by: str = "ovr", total_cards: int = 0, total_copies: int = 0) -> discord.Embed:
+        """Create an embed for one page of a user's collection (CollectionEntry rows)"""
         embed = discord.Embed(
-            title=f"{user.username}'s Collection",
-            description=f"Total Cards: {len(cards)} | Page {page}/{total_pages}",
+            title=f"{username}'s Collection",
+            description=f"Total Cards: {total_cards} ({total_copies} copies) | Page {page}/{total_pages}",
             color=discord.Color.blue()
         )
         
-        # Group cards by position or show list
         cards_text = []
-        for i, card in enumerate(cards[:10], 1):  # Show 10 per page
+        start = (page - 1) * 10
+        for i, entry in enumerate(entries[:10], start + 1):  # Show 10 per page
             cards_text.append(
-                f"{i}. **{card.name}** - {card.position} ({card.overall_rating} OVR) - {card.card_type.value}"
+                f"{i}. **{entry.name}** - {entry.position} ({entry.overall_rating} OVR) - {entry.card_type.value}"
+                + (f" x{entry.quantity}" if entry.quantity > 1 else "")
             )
         
         embed.add_field(
@@ -215,8 +216,8 @@ class EmbedBuilder:
         return embed
     
     @staticmethod
-    def leaderboard_embed(guild_name: str, entries: List[tuple], page: int = 1) -> discord.Embed:
-        """Create an embed for the leaderboard"""
+    def leaderboard_embed(guild_name: str, entries: List, start_rank: int = 1) -> discord.Embed:
+        """Create an embed for one page of the leaderboard (LeaderboardRow entries)"""
         embed = discord.Embed(
             title=f"🏆 {guild_name} Leaderboard",
             description=f"Win = 3 pts | Draw = 1 pt | Loss = 0 pts",
@@ -227,13 +228,12 @@ class EmbedBuilder:
             embed.add_field(name="No Data", value="No matches played yet!", inline=False)
             return embed
         
-        # Show top 10
         leaderboard_text = []
-        for i, (user, lb_entry) in enumerate(entries[:10], 1):
+        for i, entry in enumerate(entries, start_rank):
             medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
             leaderboard_text.append(
-                f"{medal} **{user.username}** - {lb_entry.points} pts "
-                f"({lb_entry.wins}W-{lb_entry.draws}D-{lb_entry.losses}L)"
+                f"{medal} **{entry.username}** - {entry.points} pts "
+                f"({entry.wins}W-{entry.draws}D-{entry.losses}L)"
             )
         
         embed.add_field(
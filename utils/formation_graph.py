@@ -0,0 +1,60 @@
+from typing import Dict, Optional, Tuple
+import config
+
+# Two positions link when they are within this distance on both axes
+LINK_DISTANCE = 2
+
+class FormationGraph:
+    """
+    Compiled view of a formation: position links and stat bonuses.
+    Built once at import from config.FORMATIONS so chemistry and bonus
+    lookups never recompute coordinates.
+    """
+
+    __slots__ = ('key', 'positions', 'neighbors', 'links', 'attack_bonus', 'defense_bonus')
+
+    def __init__(self, key: str, spec: Dict):
+        coords = spec.get('positions', {})
+        self.key = key
+        self.positions: Tuple[str, ...] = tuple(coords)
+
+        neighbors = {pos: [] for pos in self.positions}
+        links = []
+        for idx, pos_a in enumerate(self.positions):
+            x_a, y_a = coords[pos_a]
+            for pos_b in self.positions[idx + 1:]:
+                x_b, y_b = coords[pos_b]
+                if abs(x_a - x_b) <= LINK_DISTANCE and abs(y_a - y_b) <= LINK_DISTANCE:
+                    neighbors[pos_a].append(pos_b)
+                    neighbors[pos_b].append(pos_a)
+                    links.append((pos_a, pos_b))
+
+        self.neighbors: Dict[str, Tuple[str, ...]] = {pos: tuple(adj) for pos, adj in neighbors.items()}
+        self.links: Tuple[Tuple[str, str], ...] = tuple(links)
+
+        bonuses = spec.get('bonuses', {})
+        self.attack_bonus: Dict[str, int] = {pos: b.get('attack', 0) for pos, b in bonuses.items()}
+        self.defense_bonus: Dict[str, int] = {pos: b.get('defense', 0) for pos, b in bonuses.items()}
+
+    def are_linked(self, pos_a: str, pos_b: str) -> bool:
+        """Check if two positions are adjacent in this formation"""
+        return pos_b in self.neighbors.get(pos_a, ())
+
+def link_score(card_a, card_b, club: float, nation: float, league: float) -> float:
+    """Chemistry between two linked cards with the given weights per shared attribute"""
+    score = 0
+    if card_a.club and card_b.club and card_a.club == card_b.club:
+        score += club
+    if card_a.nation and card_b.nation and card_a.nation == card_b.nation:
+        score += nation
+    if card_a.league and card_b.league and card_a.league == card_b.league:
+        score += league
+    return score
+
+FORMATION_GRAPHS: Dict[str, FormationGraph] = {
+    key: FormationGraph(key, spec) for key, spec in config.FORMATIONS.items()
+}
+
+def get_formation_graph(formation_key: str) -> Optional[FormationGraph]:
+    """Get the compiled graph for a formation"""
+    return FORMATION_GRAPHS.get(formation_key)
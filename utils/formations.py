@@ -1,5 +1,6 @@
 import config
 from typing import Dict, Tuple, Optional
+from utils.formation_graph import get_formation_graph, link_score
 
 class FormationManager:
     """Manages team formations and position validation"""
@@ -38,44 +39,19 @@ class FormationManager:
         Calculate team chemistry based on player links
         team_data should be: {position: card_object}
         """
-        formation = config.FORMATIONS.get(formation_key)
-        if not formation:
+        graph = get_formation_graph(formation_key)
+        if not graph:
             return 0
         
-        formation_positions = formation.get('positions', {})
-        position_names = [pos for pos in team_data.keys() if pos in formation_positions]
-        
         chemistry = 0
         
-        def are_adjacent(pos_a: str, pos_b: str) -> bool:
-            coord_a = formation_positions.get(pos_a)
-            coord_b = formation_positions.get(pos_b)
-            if not coord_a or not coord_b:
-                return False
-            x_diff = abs(coord_a[0] - coord_b[0])
-            y_diff = abs(coord_a[1] - coord_b[1])
-            return x_diff <= 2 and y_diff <= 2
-        
-        # Check chemistry between adjacent players
-        for idx, pos1 in enumerate(position_names):
-            card1 = team_data[pos1]
-            for pos2 in position_names[idx + 1:]:
-                if not are_adjacent(pos1, pos2):
-                    continue
-                
-                card2 = team_data[pos2]
-                
-                # Same club: +2 chemistry
-                if card1.club and card2.club and card1.club == card2.club:
-                    chemistry += 2
-                
-                # Same nation: +1 chemistry
-                if card1.nation and card2.nation and card1.nation == card2.nation:
-                    chemistry += 1
-                
-                # Same league: +1 chemistry
-                if card1.league and card2.league and card1.league == card2.league:
-                    chemistry += 1
+        # Check chemistry between linked players (same club +2, nation +1, league +1)
+        for pos1, pos2 in graph.links:
+            card1 = team_data.get(pos1)
+            card2 = team_data.get(pos2)
+            if card1 is None or card2 is None:
+                continue
+            chemistry += link_score(card1, card2, club=2, nation=1, league=1)
         
         return chemistry
     
@@ -85,10 +61,12 @@ class FormationManager:
         Apply formation bonuses to card stats
         Returns: (modified_attack, modified_defense)
         """
-        bonuses = FormationManager.get_position_bonuses(position, formation_key)
+        graph = get_formation_graph(formation_key)
+        if not graph:
+            return card.attack_stat, card.defense_stat
         
-        attack = card.attack_stat + bonuses.get('attack', 0)
-        defense = card.defense_stat + bonuses.get('defense', 0)
+        attack = card.attack_stat + graph.attack_bonus.get(position, 0)
+        defense = card.defense_stat + graph.defense_bonus.get(position, 0)
         
         return attack, defense
     
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, and_, or_
+from database.database import session_scope
+from database.models import Leaderboard, User
+import config
+
+# Keyset cursor: (points, user_id) of the last row on the previous page
+Cursor = Tuple[int, int]
+
+class LeaderboardRow:
+    """One ranked leaderboard entry"""
+
+    __slots__ = ('user_id', 'username', 'points', 'wins', 'draws', 'losses')
+
+    def __init__(self, user_id: int, username: str, points: int, wins: int, draws: int, losses: int):
+        self.user_id = user_id
+        self.username = username
+        self.points = points or 0
+        self.wins = wins or 0
+        self.draws = draws or 0
+        self.losses = losses or 0
+
+    @property
+    def sort_key(self) -> Tuple[int, int]:
+        return (-self.points, self.user_id)
+
+    @property
+    def cursor(self) -> Cursor:
+        return (self.points, self.user_id)
+
+class LeaderboardService:
+    """
+    Ranked per-guild leaderboard reads.
+    Pages are keyset-paginated on (points DESC, user_id ASC), which the
+    ix_leaderboard_guild_rank index serves directly. The top N rows of each
+    guild are cached and kept current by match settlement.
+    """
+
+    def __init__(self, top_size: int = None, ttl: int = None):
+        self.top_size = top_size or config.LEADERBOARD_CACHE_SIZE
+        self.ttl = ttl or config.LEADERBOARD_CACHE_SECONDS
+        self._top: Dict[int, Tuple[List[LeaderboardRow], float]] = {}  # {guild_id: (rows, expires_at)}
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    @staticmethod
+    async def _query(guild_id: int, limit: int, after: Optional[Cursor] = None) -> List[LeaderboardRow]:
+        """Keyset query for one page of a guild's leaderboard"""
+        query = (
+            select(Leaderboard.user_id, User.username, Leaderboard.points,
+                   Leaderboard.wins, Leaderboard.draws, Leaderboard.losses)
+            .join(User, Leaderboard.user_id == User.id)
+            .where(Leaderboard.guild_id == guild_id)
+        )
+        if after is not None:
+            points, user_id = after
+            query = query.where(or_(
+                Leaderboard.points < points,
+                and_(Leaderboard.points == points, Leaderboard.user_id > user_id)
+            ))
+        query = query.order_by(Leaderboard.points.desc(), Leaderboard.user_id.asc()).limit(limit)
+
+        async with session_scope() as session:
+            result = await session.execute(query)
+            return [LeaderboardRow(*row) for row in result.all()]
+
+    async def _get_top(self, guild_id: int) -> List[LeaderboardRow]:
+        """Cached top rows for a guild, loading them if missing or expired"""
+        cached = self._top.get(guild_id)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        lock = self._locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            cached = self._top.get(guild_id)
+            if cached and cached[1] > time.monotonic():
+                return cached[0]
+            rows = await self._query(guild_id, self.top_size)
+            self._top[guild_id] = (rows, time.monotonic() + self.ttl)
+            return rows
+
+    async def get_page(self, guild_id: int, page_size: int = 10,
+                       after: Optional[Cursor] = None) -> Tuple[List[LeaderboardRow], Optional[Cursor]]:
+        """
+        Get a page of the leaderboard.
+        Returns: (rows, cursor for the next page or None if this is the last page)
+        """
+        top = await self._get_top(guild_id)
+
+        if after is None:
+            start = 0
+        else:
+            # Serve later pages from the cache while they fall inside it
+            start = next((i + 1 for i, row in enumerate(top) if row.cursor == after), None)
+
+        # Use the cache if it covers this page plus one row, or holds the whole guild
+        if start is not None and (start + page_size < len(top) or len(top) < self.top_size):
+            rows = top[start:start + page_size + 1]
+        else:
+            rows = await self._query(guild_id, page_size + 1, after)
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        return rows, (rows[-1].cursor if has_more and rows else None)
+
+    def apply_totals(self, guild_id: int, totals: Iterable[tuple], usernames: Dict[int, str]):
+        """
+        Fold updated (user_id, points, wins, draws, losses) rows into the cached top.
+        usernames are users.username for the players, as the database pages show them.
+        Points never decrease, so an entry outside the cache only needs to beat the last cached row.
+        """
+        cached = self._top.get(guild_id)
+        if not cached:
+            return
+        rows, expires_at = cached
+        by_user = {row.user_id: row for row in rows}
+        complete = len(rows) < self.top_size
+
+        for user_id, points, wins, draws, losses in totals:
+            row = by_user.get(user_id)
+            if row is not None:
+                row.points, row.wins, row.draws, row.losses = points, wins, draws, losses
+                continue
+
+            new_row = LeaderboardRow(user_id, usernames.get(user_id, f"User {user_id}"),
+                                     points, wins, draws, losses)
+            if complete or (rows and new_row.sort_key < rows[-1].sort_key):
+                rows.append(new_row)
+                by_user[user_id] = new_row
+
+        rows.sort(key=lambda row: row.sort_key)
+        del rows[self.top_size:]
+
+    def invalidate(self, guild_id: int = None):
+        """Drop cached rows for a guild (or every guild)"""
+        if guild_id is None:
+            self._top.clear()
+        else:
+            self._top.pop(guild_id, None)
+
+# Process-wide leaderboard service
+leaderboard_service = LeaderboardService()
@@ -0,0 +1,184 @@
+import base64
+import json
+import struct
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import Match
+
+# Bump when the round record layout changes
+ARCHIVE_FORMAT = 1
+
+# Position codes used in archived rounds. Append only: stored matches refer to
+# these indexes, and every position used in config.FORMATIONS must be listed.
+POSITION_CODES = (
+    'GK', 'LB', 'LCB', 'CB', 'RCB', 'RB', 'LWB', 'RWB',
+    'CDM', 'LDM', 'RDM', 'LCM', 'CM', 'RCM', 'LM', 'RM',
+    'CAM', 'LAM', 'RAM', 'LW', 'RW', 'ST', 'CF',
+)
+_POSITION_INDEX = {pos: idx for idx, pos in enumerate(POSITION_CODES)}
+
+# One round: player1 card, player2 card, player1 position, player2 position,
+# attacker effective stat, defender effective stat, attack roll offset, defense roll offset
+ROUND_STRUCT = struct.Struct('<IIBBBBbb')
+
+class RoundRecord:
+    """One archived round. Odd rounds are attacked by player 1, even rounds by player 2."""
+
+    __slots__ = ('round', 'player1_card_id', 'player2_card_id', 'player1_position',
+                 'player2_position', 'attack_stat', 'defense_stat', 'attack_roll', 'defense_roll')
+
+    def __init__(self, round_number: int, player1_card_id: Optional[int], player2_card_id: Optional[int],
+                 player1_position: str, player2_position: str, attack_stat: int, defense_stat: int,
+                 attack_roll: int, defense_roll: int):
+        self.round = round_number
+        self.player1_card_id = player1_card_id
+        self.player2_card_id = player2_card_id
+        self.player1_position = player1_position
+        self.player2_position = player2_position
+        self.attack_stat = attack_stat
+        self.defense_stat = defense_stat
+        self.attack_roll = attack_roll
+        self.defense_roll = defense_roll
+
+    @property
+    def player1_attacking(self) -> bool:
+        return self.round % 2 == 1
+
+    @property
+    def result(self) -> str:
+        if self.attack_roll > self.defense_roll:
+            return 'attacker_wins'
+        if self.defense_roll > self.attack_roll:
+            return 'defender_wins'
+        return 'draw'
+
+class ArchivedMatch:
+    """A match history row as plain values; rounds are decoded on first access"""
+
+    __slots__ = ('id', 'guild_id', 'player1_id', 'player2_id', 'player1_score',
+                 'player2_score', 'winner_id', 'completed_at', '_details', '_rounds')
+
+    def __init__(self, match_id: int, guild_id: int, player1_id: int, player2_id: int,
+                 player1_score: int, player2_score: int, winner_id: Optional[int],
+                 completed_at: Optional[datetime], details):
+        self.id = match_id
+        self.guild_id = guild_id
+        self.player1_id = player1_id
+        self.player2_id = player2_id
+        self.player1_score = player1_score
+        self.player2_score = player2_score
+        self.winner_id = winner_id
+        self.completed_at = completed_at
+        self._details = details
+        self._rounds = None
+
+    @property
+    def rounds(self) -> List[RoundRecord]:
+        if self._rounds is None:
+            self._rounds = MatchArchive.decode(self._details)
+        return self._rounds
+
+class MatchArchive:
+    """
+    Compact storage for Match.match_details.
+    Rounds are packed as fixed-width binary records holding card IDs, position
+    codes, effective stats and roll offsets (14 bytes a round) and stored as
+    {"format": 1, "data": <base64>}. Names and derived fields are not stored;
+    they come from the card catalog and the rolls.
+    """
+
+    @staticmethod
+    def encode(match_state) -> Dict:
+        """Pack a finished match's rounds"""
+        packed = bytearray()
+        for round_data in match_state.round_history:
+            details = round_data['details']
+            attacker, defender = details['attacker'], details['defender']
+            player1_position = round_data['player1_position']
+            player2_position = round_data['player2_position']
+            packed += ROUND_STRUCT.pack(
+                match_state.player1_team[player1_position].id,
+                match_state.player2_team[player2_position].id,
+                MatchArchive.position_code(player1_position),
+                MatchArchive.position_code(player2_position),
+                attacker['effective_attack'],
+                defender['effective_defense'],
+                attacker['roll'] - attacker['effective_attack'],
+                defender['roll'] - defender['effective_defense']
+            )
+        return {'format': ARCHIVE_FORMAT, 'data': base64.b64encode(bytes(packed)).decode('ascii')}
+
+    @staticmethod
+    def position_code(position: str) -> int:
+        """Archive code for a position"""
+        try:
+            return _POSITION_INDEX[position]
+        except KeyError:
+            raise ValueError(f"Position {position!r} has no archive code; add it to POSITION_CODES")
+
+    @staticmethod
+    def decode(details) -> List[RoundRecord]:
+        """Unpack stored match details, including rows written before the archive format"""
+        if not details:
+            return []
+        if isinstance(details, str):
+            # Older rows hold json.dumps(round_history) inside the JSON column
+            details = json.loads(details)
+        if isinstance(details, list):
+            return MatchArchive._decode_legacy(details)
+        if details.get('format') != ARCHIVE_FORMAT:
+            return []
+
+        rounds = []
+        data = base64.b64decode(details['data'])
+        for idx, fields in enumerate(ROUND_STRUCT.iter_unpack(data)):
+            (player1_card_id, player2_card_id, player1_code, player2_code,
+             attack_stat, defense_stat, attack_offset, defense_offset) = fields
+            rounds.append(RoundRecord(
+                idx + 1, player1_card_id, player2_card_id,
+                POSITION_CODES[player1_code], POSITION_CODES[player2_code],
+                attack_stat, defense_stat,
+                attack_stat + attack_offset, defense_stat + defense_offset
+            ))
+        return rounds
+
+    @staticmethod
+    def _decode_legacy(round_history: List[Dict]) -> List[RoundRecord]:
+        """Rounds from the old verbose dicts; card IDs weren't stored there"""
+        rounds = []
+        for round_data in round_history:
+            details = round_data['details']
+            rounds.append(RoundRecord(
+                round_data['round'], None, None,
+                round_data['player1_position'], round_data['player2_position'],
+                details['attacker']['effective_attack'], details['defender']['effective_defense'],
+                details['attacker']['roll'], details['defender']['roll']
+            ))
+        return rounds
+
+    @staticmethod
+    async def stream(session: AsyncSession, guild_id: int = None, since: datetime = None,
+                     batch_size: int = 5000) -> AsyncIterator[ArchivedMatch]:
+        """
+        Iterate completed matches in completion order without loading ORM objects.
+        Rows are fetched in batches from a server-side cursor, so memory stays
+        flat however many matches are scanned.
+        """
+        query = (
+            select(Match.id, Match.guild_id, Match.player1_id, Match.player2_id,
+                   Match.player1_score, Match.player2_score, Match.winner_id,
+                   Match.completed_at, Match.match_details)
+            .where(Match.completed_at.isnot(None))
+        )
+        if guild_id is not None:
+            query = query.where(Match.guild_id == guild_id)
+        if since is not None:
+            query = query.where(Match.completed_at >= since)
+        query = query.order_by(Match.completed_at, Match.id).execution_options(yield_per=batch_size)
+
+        result = await session.stream(query)
+        async for partition in result.partitions():
+            for row in partition:
+                yield ArchivedMatch(*row)
@@ -2,6 +2,29 @@ import random
 from typing import Dict, Tuple, Optional
 from database.models import Card
 from utils.formations import FormationManager
+from utils.formation_graph import get_formation_graph, link_score
+
+class StatTable:
+    """
+    Effective attack/defense per position for a fixed lineup.
+    Built once per lineup so rounds are plain lookups.
+    """
+
+    __slots__ = ('attack', 'defense')
+
+    def __init__(self, team_data: Dict, formation: str):
+        self.attack: Dict[str, int] = {}
+        self.defense: Dict[str, int] = {}
+        for position, card in team_data.items():
+            self.attack[position] = MatchEngine.calculate_player_effective_stat(
+                card, position, formation, team_data, is_attacking=True
+            )
+            self.defense[position] = MatchEngine.calculate_player_effective_stat(
+                card, position, formation, team_data, is_attacking=False
+            )
+
+    def __len__(self):
+        return len(self.attack)
 
 class MatchEngine:
     """Handles match simulation with chemistry and formations"""
@@ -26,49 +49,25 @@ class MatchEngine:
             stat = defense_bonus
         
         # Add chemistry bonus (calculate chemistry for just this player's links)
-        chemistry_bonus = MatchEngine._calculate_player_chemistry(position, card, team_data)
+        chemistry_bonus = MatchEngine._calculate_player_chemistry(position, card, formation, team_data)
         stat += chemistry_bonus
         
         return min(99, max(0, stat))
     
     @staticmethod
-    def _calculate_player_chemistry(position: str, card: Card, team_data: Dict) -> int:
+    def _calculate_player_chemistry(position: str, card: Card, formation: str, team_data: Dict) -> int:
         """Calculate chemistry bonus for individual player"""
-        chemistry = 0
-        
-        # Define position adjacencies
-        adjacencies = {
-            'GK': ['LCB', 'RCB'],
-            'LB': ['LCB', 'LCM'],
-            'LCB': ['GK', 'LB', 'RCB', 'CDM'],
-            'RCB': ['GK', 'RB', 'LCB', 'CDM'],
-            'RB': ['RCB', 'RCM'],
-            'CDM': ['LCB', 'RCB', 'LCM', 'RCM', 'CAM'],
-            'LCM': ['LB', 'CDM', 'LW', 'CAM'],
-            'RCM': ['RB', 'CDM', 'RW', 'CAM'],
-            'CAM': ['CDM', 'LCM', 'RCM', 'ST', 'LW', 'RW'],
-            'LW': ['LCM', 'CAM', 'ST'],
-            'ST': ['CAM', 'LW', 'RW'],
-            'RW': ['RCM', 'CAM', 'ST']
-        }
+        graph = get_formation_graph(formation)
+        if not graph:
+            return 0
         
-        adjacent_positions = adjacencies.get(position, [])
+        chemistry = 0
         
-        for adj_pos in adjacent_positions:
-            if adj_pos in team_data:
-                adj_card = team_data[adj_pos]
-                
-                # Same club: +1 per link
-                if card.club and adj_card.club and card.club == adj_card.club:
-                    chemistry += 1
-                
-                # Same nation: +0.5 per link
-                if card.nation and adj_card.nation and card.nation == adj_card.nation:
-                    chemistry += 0.5
-                
-                # Same league: +0.5 per link
-                if card.league and adj_card.league and card.league == adj_card.league:
-                    chemistry += 0.5
+        # Same club: +1 per link, same nation/league: +0.5 per link
+        for adj_pos in graph.neighbors.get(position, ()):
+            adj_card = team_data.get(adj_pos)
+            if adj_card is not None:
+                chemistry += link_score(card, adj_card, club=1, nation=0.5, league=0.5)
         
         return int(chemistry)
     
@@ -89,9 +88,25 @@ class MatchEngine:
             defender_card, defender_position, defender_formation, defender_team, is_attacking=False
         )
         
+        return MatchEngine.resolve_round(
+            attacker_card, attacker_position, attack_stat,
+            defender_card, defender_position, defense_stat
+        )
+    
+    @staticmethod
+    def resolve_round(attacker_card: Card, attacker_position: str, attack_stat: int,
+                      defender_card: Card, defender_position: str, defense_stat: int,
+                      variance: Optional[Tuple[int, int]] = None) -> Tuple[str, Dict]:
+        """
+        Resolve a round from precomputed effective stats
+        variance replays a known (attack, defense) roll instead of rolling
+        Returns: (result, details)
+        """
         # Add some variance (±5 points)
-        attack_roll = attack_stat + random.randint(-5, 5)
-        defense_roll = defense_stat + random.randint(-5, 5)
+        if variance is None:
+            variance = (random.randint(-5, 5), random.randint(-5, 5))
+        attack_roll = attack_stat + variance[0]
+        defense_roll = defense_stat + variance[1]
         
         # Determine winner
         if attack_roll > defense_roll:
@@ -144,6 +159,9 @@ class MatchEngine:
         else:
             return 0
 
+# Bump when the checkpoint layout changes
+CHECKPOINT_VERSION = 1
+
 class MatchState:
     """Tracks state of an ongoing match"""
     
@@ -157,6 +175,10 @@ class MatchState:
         self.player1_formation = player1_formation
         self.player2_formation = player2_formation
         
+        # Lineups are fixed for the whole match, so effective stats are computed once
+        self.player1_stats = StatTable(player1_team, player1_formation)
+        self.player2_stats = StatTable(player2_team, player2_formation)
+        
         self.current_round = 1
         self.max_rounds = 11
         
@@ -195,7 +217,8 @@ class MatchState:
         
         return True
     
-    def play_round(self, player1_position: str, player2_position: str) -> Dict:
+    def play_round(self, player1_position: str, player2_position: str,
+                   variance: Optional[Tuple[int, int]] = None) -> Dict:
         """Play a round and update scores"""
         # Get cards
         player1_card = self.player1_team[player1_position]
@@ -203,9 +226,10 @@ class MatchState:
         
         # Alternate who attacks (odd rounds: player1 attacks, even rounds: player2 attacks)
         if self.current_round % 2 == 1:
-            result, details = MatchEngine.simulate_round(
-                player1_card, player1_position, self.player1_formation, self.player1_team,
-                player2_card, player2_position, self.player2_formation, self.player2_team
+            result, details = MatchEngine.resolve_round(
+                player1_card, player1_position, self.player1_stats.attack[player1_position],
+                player2_card, player2_position, self.player2_stats.defense[player2_position],
+                variance
             )
             
             if result == 'attacker_wins':
@@ -213,9 +237,10 @@ class MatchState:
             elif result == 'defender_wins':
                 self.player2_score += 1
         else:
-            result, details = MatchEngine.simulate_round(
-                player2_card, player2_position, self.player2_formation, self.player2_team,
-                player1_card, player1_position, self.player1_formation, self.player1_team
+            result, details = MatchEngine.resolve_round(
+                player2_card, player2_position, self.player2_stats.attack[player2_position],
+                player1_card, player1_position, self.player1_stats.defense[player1_position],
+                variance
             )
             
             if result == 'attacker_wins':
@@ -242,6 +267,69 @@ class MatchState:
         
         return round_data
     
+    def to_checkpoint(self) -> Dict:
+        """
+        Compact, JSON-safe snapshot of the match.
+        Only card IDs, formations and per-round picks/rolls are stored;
+        everything else is rebuilt by replaying the rounds.
+        """
+        rounds = []
+        for round_data in self.round_history:
+            details = round_data['details']
+            rounds.append([
+                round_data['player1_position'],
+                round_data['player2_position'],
+                details['attacker']['roll'] - details['attacker']['effective_attack'],
+                details['defender']['roll'] - details['defender']['effective_defense']
+            ])
+        
+        return {
+            'v': CHECKPOINT_VERSION,
+            'formations': [self.player1_formation, self.player2_formation],
+            'teams': [
+                {pos: card.id for pos, card in self.player1_team.items()},
+                {pos: card.id for pos, card in self.player2_team.items()}
+            ],
+            'rounds': rounds
+        }
+    
+    @classmethod
+    def from_checkpoint(cls, player1_id: int, player2_id: int, data: Dict,
+                        cards_by_id: Dict[int, Card]) -> Optional['MatchState']:
+        """Rebuild a match from to_checkpoint() output. Returns None if it can't be restored."""
+        if not data or data.get('v') != CHECKPOINT_VERSION:
+            return None
+        
+        teams = []
+        for team_ids in data['teams']:
+            team = {}
+            for pos, card_id in team_ids.items():
+                card = cards_by_id.get(card_id)
+                if card is None:
+                    return None
+                team[pos] = card
+            teams.append(team)
+        
+        player1_formation, player2_formation = data['formations']
+        match_state = cls(player1_id, player2_id, teams[0], teams[1],
+                          player1_formation, player2_formation)
+        
+        # Replay finished rounds with their original rolls
+        for player1_position, player2_position, attack_variance, defense_variance in data['rounds']:
+            match_state.select_card(player1_id, player1_position)
+            match_state.select_card(player2_id, player2_position)
+            match_state.play_round(player1_position, player2_position,
+                                   (attack_variance, defense_variance))
+        
+        return match_state
+    
+    @staticmethod
+    def checkpoint_card_ids(data: Dict) -> set:
+        """All card IDs referenced by a checkpoint"""
+        if not data or data.get('v') != CHECKPOINT_VERSION:
+            return set()
+        return {card_id for team_ids in data['teams'] for card_id in team_ids.values()}
+    
     def is_complete(self) -> bool:
         """Check if match is complete"""
         return self.current_round > self.max_rounds
@@ -0,0 +1,191 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, update, delete, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.database import dialect_insert
+from database.models import User, Match, ActiveMatch, Bet, Leaderboard, PlayerRating
+from utils.collection_ops import CollectionOps
+from utils.leaderboard import leaderboard_service
+from utils.match_archive import MatchArchive
+from utils.match_engine import MatchEngine, MatchState
+from utils.ratings import rating_index, rate_match, match_score
+import config
+
+class MatchSettlement:
+    """
+    Writes everything a finished match changes in one transaction:
+    match record, user stats, leaderboard, global ratings, bets and the active match row.
+    Uses a fixed number of statements regardless of how many cards are bet.
+    """
+
+    @staticmethod
+    async def settle(session: AsyncSession, guild_id: int, channel_id: int,
+                     match_state: MatchState) -> Match:
+        """Settle a completed match and commit. Returns the new Match row."""
+        player_ids = [match_state.player1_id, match_state.player2_id]
+        winner_id = match_state.get_winner()
+
+        match_record = Match(
+            guild_id=guild_id,
+            player1_id=match_state.player1_id,
+            player2_id=match_state.player2_id,
+            player1_score=match_state.player1_score,
+            player2_score=match_state.player2_score,
+            winner_id=winner_id,
+            match_details=MatchArchive.encode(match_state),
+            completed_at=datetime.now(timezone.utc)
+        )
+        session.add(match_record)
+
+        usernames = await MatchSettlement._update_user_stats(session, player_ids, winner_id)
+        totals = await MatchSettlement._upsert_leaderboard(session, guild_id, player_ids, winner_id)
+        rating_moves = await MatchSettlement._update_ratings(session, player_ids, winner_id)
+        await MatchSettlement._settle_bets(session, guild_id, player_ids, winner_id)
+
+        await session.execute(
+            delete(ActiveMatch).where(ActiveMatch.channel_id == channel_id)
+        )
+
+        await session.commit()
+        
+        # Keep the cached top of the leaderboard current without re-reading it
+        leaderboard_service.apply_totals(guild_id, totals, usernames)
+        for old_rating, new_rating in rating_moves:
+            rating_index.move(old_rating, new_rating)
+        return match_record
+
+    @staticmethod
+    async def _update_user_stats(session: AsyncSession, player_ids: List[int],
+                                 winner_id: Optional[int]) -> Dict[int, str]:
+        """
+        Increment games/wins/draws/losses for both players in one UPDATE
+        Returns {user_id: username} from the updated rows
+        """
+        values = {'total_games': User.total_games + 1}
+        if winner_id is None:
+            values['total_draws'] = User.total_draws + 1
+        else:
+            values['total_wins'] = User.total_wins + case((User.id == winner_id, 1), else_=0)
+            values['total_losses'] = User.total_losses + case((User.id != winner_id, 1), else_=0)
+
+        result = await session.execute(
+            update(User).where(User.id.in_(player_ids)).values(**values)
+            .returning(User.id, User.username)
+        )
+        return dict(result.all())
+
+    @staticmethod
+    async def _upsert_leaderboard(session: AsyncSession, guild_id: int,
+                                  player_ids: List[int], winner_id: Optional[int]) -> List[tuple]:
+        """
+        Insert or increment both leaderboard entries in one statement
+        Returns the new (user_id, points, wins, draws, losses) totals
+        """
+        rows = []
+        for user_id in player_ids:
+            won = winner_id == user_id
+            draw = winner_id is None
+            rows.append({
+                'guild_id': guild_id,
+                'user_id': user_id,
+                'points': MatchEngine.calculate_points(won, draw),
+                'wins': int(won),
+                'draws': int(draw),
+                'losses': int(not won and not draw)
+            })
+
+        stmt = dialect_insert(session, Leaderboard).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Leaderboard.guild_id, Leaderboard.user_id],
+            set_={
+                'points': Leaderboard.points + stmt.excluded.points,
+                'wins': Leaderboard.wins + stmt.excluded.wins,
+                'draws': Leaderboard.draws + stmt.excluded.draws,
+                'losses': Leaderboard.losses + stmt.excluded.losses,
+                'updated_at': datetime.now(timezone.utc)
+            }
+        ).returning(Leaderboard.user_id, Leaderboard.points, Leaderboard.wins,
+                    Leaderboard.draws, Leaderboard.losses)
+        result = await session.execute(stmt)
+        return [tuple(row) for row in result.all()]
+
+    @staticmethod
+    async def _update_ratings(session: AsyncSession, player_ids: List[int],
+                              winner_id: Optional[int]) -> List[Tuple[Optional[float], float]]:
+        """
+        Apply the Elo update for both players under row locks
+        Returns (old rating or None if unrated, new rating) per player
+        """
+        # Create missing rows first so the locking read covers both players: a
+        # concurrent settlement for a new player then waits here instead of
+        # computing from the same starting point and overwriting this update
+        await session.execute(
+            dialect_insert(session, PlayerRating)
+            .values([
+                {'user_id': user_id, 'rating': config.RATING_INITIAL, 'games': 0}
+                for user_id in sorted(player_ids)
+            ])
+            .on_conflict_do_nothing(index_elements=[PlayerRating.user_id])
+        )
+        result = await session.execute(
+            select(PlayerRating.user_id, PlayerRating.rating, PlayerRating.games)
+            .where(PlayerRating.user_id.in_(player_ids))
+            .order_by(PlayerRating.user_id)  # Consistent lock order across matches
+            .with_for_update()
+        )
+        # Rows with no games are the placeholders above, never committed as is
+        current = {user_id: (rating if games else None, games) for user_id, rating, games in result.all()}
+
+        player1_id, player2_id = player_ids
+        old1, games1 = current[player1_id]
+        old2, games2 = current[player2_id]
+        new1, new2 = rate_match(
+            config.RATING_INITIAL if old1 is None else old1, games1,
+            config.RATING_INITIAL if old2 is None else old2, games2,
+            match_score(player1_id, winner_id)
+        )
+
+        now = datetime.now(timezone.utc)
+        await session.execute(update(PlayerRating), [
+            {'user_id': player1_id, 'rating': new1, 'games': games1 + 1, 'updated_at': now},
+            {'user_id': player2_id, 'rating': new2, 'games': games2 + 1, 'updated_at': now},
+        ])
+        return [(old1, new1), (old2, new2)]
+
+    @staticmethod
+    async def _settle_bets(session: AsyncSession, guild_id: int,
+                           player_ids: List[int], winner_id: Optional[int]):
+        """Complete accepted bets between the players and move the loser's cards"""
+        player1_id, player2_id = player_ids
+        result = await session.execute(
+            select(Bet)
+            .where(Bet.guild_id == guild_id)
+            .where(Bet.accepted == True)
+            .where(Bet.completed == False)
+            .where(
+                ((Bet.creator_id == player1_id) & (Bet.challenged_id == player2_id)) |
+                ((Bet.creator_id == player2_id) & (Bet.challenged_id == player1_id))
+            )
+        )
+        bets = result.scalars().all()
+        if not bets:
+            return
+
+        if winner_id is not None:
+            # Cards each loser owes: {loser_id: [card_id, ...]} (duplicates allowed)
+            owed: Dict[int, List[int]] = defaultdict(list)
+            for bet in bets:
+                if winner_id == bet.creator_id:
+                    owed[bet.challenged_id].extend(bet.challenged_cards or [])
+                else:
+                    owed[bet.creator_id].extend(bet.creator_cards or [])
+
+            await CollectionOps.transfer_cards(session, owed, winner_id)
+
+        # Draws just close the bets; everyone keeps their cards
+        await session.execute(
+            update(Bet)
+            .where(Bet.id.in_([bet.id for bet in bets]))
+            .values(completed=True, winner_id=winner_id)
+        )
@@ -0,0 +1,95 @@
+import numpy as np
+from typing import Dict, Optional
+from utils.match_engine import MatchState, StatTable
+import config
+
+class LineupArrays:
+    """Effective attack/defense stats of a lineup as arrays"""
+
+    __slots__ = ('positions', 'attack', 'defense')
+
+    def __init__(self, stats: StatTable):
+        self.positions = list(stats.attack.keys())
+        self.attack = np.array([stats.attack[pos] for pos in self.positions], dtype=np.int16)
+        self.defense = np.array([stats.defense[pos] for pos in self.positions], dtype=np.int16)
+
+    def __len__(self):
+        return len(self.positions)
+
+class SimulationResult:
+    """Outcome probabilities from a batch of simulated matches"""
+
+    __slots__ = ('matches', 'player1_win', 'draw', 'player2_win',
+                 'player1_expected_score', 'player2_expected_score')
+
+    def __init__(self, matches: int, player1_win: float, draw: float, player2_win: float,
+                 player1_expected_score: float, player2_expected_score: float):
+        self.matches = matches
+        self.player1_win = player1_win
+        self.draw = draw
+        self.player2_win = player2_win
+        self.player1_expected_score = player1_expected_score
+        self.player2_expected_score = player2_expected_score
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class BatchSimulator:
+    """
+    Vectorized match simulator for win-probability estimation.
+    Runs many full matches at once with the same rules as MatchState:
+    each player uses every card once in a random order, player 1 attacks in
+    odd rounds, and each side rolls ±5 on its effective stat.
+    """
+
+    def __init__(self, player1_stats: StatTable, player2_stats: StatTable, max_rounds: int = 11):
+        self.player1 = LineupArrays(player1_stats)
+        self.player2 = LineupArrays(player2_stats)
+        self.rounds = min(max_rounds, len(self.player1), len(self.player2))
+        if self.rounds == 0:
+            raise ValueError("Both lineups need at least one card")
+
+    @classmethod
+    def from_teams(cls, player1_team: Dict, player1_formation: str,
+                   player2_team: Dict, player2_formation: str) -> 'BatchSimulator':
+        """Build a simulator from two {position: card} lineups"""
+        return cls(StatTable(player1_team, player1_formation), StatTable(player2_team, player2_formation))
+
+    @classmethod
+    def from_match(cls, match_state: MatchState) -> 'BatchSimulator':
+        """Build a simulator reusing the stat tables of a match in progress"""
+        return cls(match_state.player1_stats, match_state.player2_stats, match_state.max_rounds)
+
+    def _orders(self, rng: np.random.Generator, count: int, size: int) -> np.ndarray:
+        """Random card order per match: (count, rounds) indexes into the lineup"""
+        return np.argsort(rng.random((count, size)), axis=1)[:, :self.rounds]
+
+    def run(self, matches: int = None, seed: Optional[int] = None) -> SimulationResult:
+        """Simulate a batch of matches"""
+        matches = matches or config.PREDICT_SIMULATIONS
+        rng = np.random.default_rng(seed)
+
+        order1 = self._orders(rng, matches, len(self.player1))
+        order2 = self._orders(rng, matches, len(self.player2))
+
+        # Player 1 attacks in rounds 1, 3, 5... (even column indexes)
+        p1_attacks = (np.arange(self.rounds) % 2 == 0)
+        attack = np.where(p1_attacks, self.player1.attack[order1], self.player2.attack[order2])
+        defense = np.where(p1_attacks, self.player2.defense[order2], self.player1.defense[order1])
+
+        rolls = rng.integers(-5, 6, size=(2, matches, self.rounds), dtype=np.int16)
+        margin = (attack + rolls[0]) - (defense + rolls[1])
+
+        attacker_won = margin > 0
+        defender_won = margin < 0
+        player1_score = (np.where(p1_attacks, attacker_won, defender_won)).sum(axis=1)
+        player2_score = (np.where(p1_attacks, defender_won, attacker_won)).sum(axis=1)
+
+        return SimulationResult(
+            matches=matches,
+            player1_win=float(np.mean(player1_score > player2_score)),
+            draw=float(np.mean(player1_score == player2_score)),
+            player2_win=float(np.mean(player1_score < player2_score)),
+            player1_expected_score=float(player1_score.mean()),
+            player2_expected_score=float(player2_score.mean())
+        )
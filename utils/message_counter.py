@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import random
+from typing import Dict, Optional, Tuple
+from sqlalchemy import select, update
+from database.database import session_scope
+from database.models import ServerConfig
+import config
+
+logger = logging.getLogger('message_counter')
+
+class GuildCounter:
+    """In-memory spawn counter state for a single guild"""
+
+    __slots__ = ('spawn_channel_id', 'spawn_enabled', 'message_count', 'message_threshold', 'dirty')
+
+    def __init__(self, spawn_channel_id: Optional[int], spawn_enabled: bool,
+                 message_count: int, message_threshold: Optional[int]):
+        self.spawn_channel_id = spawn_channel_id
+        self.spawn_enabled = spawn_enabled
+        self.message_count = message_count
+        self.message_threshold = message_threshold
+        self.dirty = False
+
+class MessageCounter:
+    """
+    Write-behind message counter for card spawning.
+    Counts live in memory and are flushed to server_config in batches.
+    """
+
+    def __init__(self, flush_interval: int = None):
+        self.flush_interval = flush_interval or config.MESSAGE_COUNT_FLUSH_SECONDS
+        self.guilds: Dict[int, Optional[GuildCounter]] = {}  # {guild_id: GuildCounter or None if unconfigured}
+        self._load_locks: Dict[int, asyncio.Lock] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def _load_guild(self, guild_id: int) -> Optional[GuildCounter]:
+        """Load a guild's counter state from the database (once per process)"""
+        lock = self._load_locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            if guild_id in self.guilds:
+                return self.guilds[guild_id]
+
+            async with session_scope() as session:
+                result = await session.execute(
+                    select(ServerConfig).where(ServerConfig.guild_id == guild_id)
+                )
+                server_config = result.scalar_one_or_none()
+
+            if server_config:
+                state = GuildCounter(
+                    spawn_channel_id=server_config.spawn_channel_id,
+                    spawn_enabled=bool(server_config.spawn_enabled),
+                    message_count=server_config.message_count or 0,
+                    message_threshold=server_config.message_threshold
+                )
+            else:
+                state = None
+
+            self.guilds[guild_id] = state
+            self._load_locks.pop(guild_id, None)
+            return state
+
+    async def increment(self, guild_id: int) -> Tuple[bool, Optional[int]]:
+        """
+        Count a message for a guild and decide whether a card should spawn.
+        Only the first message per guild touches the database.
+        Returns: (should_spawn, channel_id)
+        """
+        if guild_id in self.guilds:
+            state = self.guilds[guild_id]
+        else:
+            state = await self._load_guild(guild_id)
+
+        if state is None or not state.spawn_enabled or not state.spawn_channel_id:
+            return False, None
+
+        state.message_count += 1
+        state.dirty = True
+
+        # Pick a threshold if none is set yet
+        if state.message_threshold is None:
+            state.message_threshold = random.randint(
+                config.SPAWN_MESSAGE_MIN,
+                config.SPAWN_MESSAGE_MAX
+            )
+
+        if state.message_count >= state.message_threshold:
+            # Reset counter and threshold
+            state.message_count = 0
+            state.message_threshold = random.randint(
+                config.SPAWN_MESSAGE_MIN,
+                config.SPAWN_MESSAGE_MAX
+            )
+            return True, state.spawn_channel_id
+
+        return False, None
+
+    def update_config(self, guild_id: int, spawn_channel_id: Optional[int] = None,
+                      spawn_enabled: Optional[bool] = None):
+        """Apply a server config change to the cached state"""
+        state = self.guilds.get(guild_id)
+        if state is None:
+            # Not cached (or cached as unconfigured) - reload on next message
+            self.guilds.pop(guild_id, None)
+            return
+
+        if spawn_channel_id is not None:
+            state.spawn_channel_id = spawn_channel_id
+        if spawn_enabled is not None:
+            state.spawn_enabled = spawn_enabled
+
+    async def flush(self) -> int:
+        """Write all dirty counters to the database in one batch. Returns rows written."""
+        async with self._flush_lock:
+            batch = []
+            for guild_id, state in self.guilds.items():
+                if state is not None and state.dirty:
+                    batch.append({
+                        'guild_id': guild_id,
+                        'message_count': state.message_count,
+                        'message_threshold': state.message_threshold
+                    })
+                    state.dirty = False
+
+            if not batch:
+                return 0
+
+            try:
+                async with session_scope() as session:
+                    await session.execute(update(ServerConfig), batch)
+                    await session.commit()
+            except Exception as e:
+                # Mark the batch dirty again so the next flush retries it
+                for row in batch:
+                    state = self.guilds.get(row['guild_id'])
+                    if state is not None:
+                        state.dirty = True
+                logger.error(f"Error flushing message counters: {e}")
+                return 0
+
+            return len(batch)
+
+    async def _flush_loop(self):
+        """Periodically flush dirty counters"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Start the periodic flush task"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flush task and write any pending counts"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
@@ -0,0 +1,200 @@
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Collection, Dict, FrozenSet, Generic, Hashable, Iterable, List, Optional, Tuple, TypeVar
+import config
+
+T = TypeVar('T')
+
+# Trailing card variant tags like "(Boxing Day)" or "[TOTS]"
+_SUFFIX_RE = re.compile(r'\s*[\(\[][^\)\]]*[\)\]]\s*$')
+_PUNCT_RE = re.compile(r"[^a-z0-9\s]")
+_SPACE_RE = re.compile(r'\s+')
+
+# Characters NFKD does not decompose into a base letter
+_FOLD = str.maketrans({'ø': 'o', 'ß': 'ss', 'æ': 'ae', 'œ': 'oe', 'đ': 'd', 'ł': 'l', 'ı': 'i', 'þ': 'th'})
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a player name for matching.
+    Folds accents, drops variant suffixes, strips punctuation and collapses spaces.
+    """
+    if not name:
+        return ''
+    name = name.strip()
+    while True:
+        stripped = _SUFFIX_RE.sub('', name)
+        if stripped == name or not stripped:
+            break
+        name = stripped
+    name = unicodedata.normalize('NFKD', name.lower().translate(_FOLD))
+    name = ''.join(ch for ch in name if not unicodedata.combining(ch))
+    # Hyphens and apostrophes separate words ("Gibbs-White", "N'Golo")
+    name = name.replace('-', ' ').replace("'", '')
+    name = _PUNCT_RE.sub('', name)
+    return _SPACE_RE.sub(' ', name).strip()
+
+def trigrams(key: str) -> FrozenSet[str]:
+    """Padded character trigrams of a normalized key"""
+    if not key:
+        return frozenset()
+    padded = f"  {key} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+@lru_cache(maxsize=8192)
+def name_profile(name: str) -> Tuple[str, FrozenSet[str]]:
+    """Normalized key and trigram set for a name (cached per distinct name)"""
+    key = normalize_name(name)
+    return key, trigrams(key)
+
+def similarity(query: str, name: str) -> float:
+    """
+    Score how well a query matches a name, from 0 to 1.
+    1.0 is an exact match after normalization, 0.95 a whole-word part of
+    the name (e.g. a surname), 0.9 any other part of it (e.g. "mbap"),
+    otherwise trigram Dice similarity.
+    """
+    q_key, q_grams = name_profile(query)
+    n_key, n_grams = name_profile(name)
+    return _score(q_key, q_grams, n_key, n_grams)
+
+def _score(q_key: str, q_grams: FrozenSet[str], n_key: str, n_grams: FrozenSet[str],
+           shared: Optional[int] = None) -> float:
+    if not q_key or not n_key:
+        return 0.0
+    if q_key == n_key:
+        return 1.0
+    if f" {q_key} " in f" {n_key} ":
+        return 0.95
+    if q_key in n_key:
+        return 0.9
+    if shared is None:
+        shared = len(q_grams & n_grams)
+    return 2.0 * shared / (len(q_grams) + len(n_grams))
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Damerau-Levenshtein distance (optimal string alignment: a swap of two
+    adjacent letters counts as one edit), capped at limit + 1.
+    Only cells within limit of the diagonal are computed, so a check costs
+    about len(a) * (2 * limit + 1) steps.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous = None
+    row = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            best = min(row[j] + 1, current[j - 1] + 1, row[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                best = min(best, previous[j - 2] + 1)
+            current[j] = min(best, over)
+        if min(current) > limit:
+            return over
+        previous, row = row, current
+    return row[-1]
+
+def is_match(guess: str, name: str, threshold: float = None) -> bool:
+    """
+    Check a catch guess against a card name.
+    Accepts the exact normalized name, a full-length guess within one edit
+    (typo, missing or swapped letter) per CATCH_TYPO_CHARS characters of the
+    name, or a trigram similarity at or above the threshold.
+    """
+    if threshold is None:
+        threshold = config.CATCH_MATCH_THRESHOLD
+    q_key, q_grams = name_profile(guess)
+    n_key, n_grams = name_profile(name)
+    if not q_key:
+        return False
+    if q_key == n_key:
+        return True
+    # Partial names (surname only) are too short for either test below
+    edits = len(n_key) // config.CATCH_TYPO_CHARS if config.CATCH_TYPO_CHARS > 0 else 0
+    if edits and edit_distance(q_key, n_key, edits) <= edits:
+        return True
+    shared = len(q_grams & n_grams)
+    return 2.0 * shared / (len(q_grams) + len(n_grams)) >= threshold
+
+class NameMatcher(Generic[T]):
+    """
+    Precomputed name index over a set of items.
+    Exact normalized names are a dict lookup; anything else is scored only
+    against items sharing at least one trigram with the query (which every
+    name containing a query of three or more letters does).
+    """
+
+    def __init__(self, items: Iterable[T], key: Callable[[T], str] = lambda card: card.name,
+                 threshold: float = None, ident: Callable[[T], Hashable] = lambda card: card.id):
+        self.threshold = config.SELECT_MATCH_THRESHOLD if threshold is None else threshold
+        self.ident = ident
+        self.items: List[T] = []
+        self._keys: List[str] = []
+        self._grams: List[FrozenSet[str]] = []
+        self._exact: Dict[str, List[int]] = {}
+        self._postings: Dict[str, List[int]] = {}
+
+        for item in items:
+            name_key, grams = name_profile(key(item))
+            i = len(self.items)
+            self.items.append(item)
+            self._keys.append(name_key)
+            self._grams.append(grams)
+            self._exact.setdefault(name_key, []).append(i)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(i)
+
+    def __len__(self):
+        return len(self.items)
+
+    def search(self, query: str, limit: int = 5, threshold: float = None,
+               allowed: Collection[Hashable] = None) -> List[Tuple[T, float]]:
+        """
+        Best matches for a query, highest score first, at or above the threshold
+        (the matcher's own unless given). allowed restricts the items considered
+        to those whose ident is in it.
+        """
+        if threshold is None:
+            threshold = self.threshold
+        q_key, q_grams = name_profile(query)
+        if not q_key:
+            return []
+
+        exact = self._exact.get(q_key, [])
+        if allowed is not None:
+            exact = [i for i in exact if self.ident(self.items[i]) in allowed]
+        if exact and len(exact) >= limit:
+            return [(self.items[i], 1.0) for i in exact[:limit]]
+
+        if len(q_key) < 3:
+            # Too short to share a trigram with names it is part of; check them all
+            shared = dict.fromkeys(range(len(self.items)))
+        else:
+            # Count shared trigrams per candidate from the posting lists
+            shared = Counter()
+            for gram in q_grams:
+                postings = self._postings.get(gram)
+                if postings:
+                    shared.update(postings)
+
+        scored = []
+        for i, count in shared.items():
+            if allowed is not None and self.ident(self.items[i]) not in allowed:
+                continue
+            score = _score(q_key, q_grams, self._keys[i], self._grams[i], count)
+            if score >= threshold:
+                scored.append((score, i))
+
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+        return [(self.items[i], score) for score, i in scored[:limit]]
+
+    def match(self, query: str) -> Optional[T]:
+        """Single best match for a query, or None if nothing clears the threshold"""
+        results = self.search(query, limit=1)
+        return results[0][0] if results else None
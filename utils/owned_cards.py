@@ -0,0 +1,204 @@
+import asyncio
+import bisect
+import heapq
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Set, Tuple
+from discord import app_commands
+from sqlalchemy import select
+from database.database import session_scope
+from database.models import Collection
+from utils.card_index import CardIndex, CardRecord, card_index
+from utils.name_matching import normalize_name
+import config
+
+logger = logging.getLogger('owned_cards')
+
+def name_tokens(name: str) -> List[str]:
+    """Prefix keys for a name: the full normalized name and every word-aligned suffix ("kylian mbappe", "mbappe")"""
+    key = normalize_name(name)
+    if not key:
+        return []
+    words = key.split(' ')
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+class UserCardIndex:
+    """
+    Prefix index over one user's owned cards.
+    Keys are (token, card_id) pairs in a sorted list, so a prefix lookup is a
+    bisect plus a short scan and adding or removing a card is a few inserts.
+    """
+
+    __slots__ = ('card_ids', 'keys', 'version')
+
+    def __init__(self, cards: Iterable[CardRecord], version: int):
+        self.card_ids: Set[int] = set()
+        self.keys: List[Tuple[str, int]] = []
+        self.version = version
+        entries = []
+        for card in cards:
+            self.card_ids.add(card.id)
+            entries.extend((token, card.id) for token in name_tokens(card.name))
+        entries.sort()
+        self.keys = entries
+
+    def add(self, card: CardRecord):
+        if card.id in self.card_ids:
+            return
+        self.card_ids.add(card.id)
+        for token in name_tokens(card.name):
+            bisect.insort(self.keys, (token, card.id))
+
+    def remove(self, card: CardRecord):
+        if card.id not in self.card_ids:
+            return
+        self.card_ids.discard(card.id)
+        for token in name_tokens(card.name):
+            i = bisect.bisect_left(self.keys, (token, card.id))
+            if i < len(self.keys) and self.keys[i] == (token, card.id):
+                del self.keys[i]
+
+    def prefix(self, query: str, limit: int, scan_limit: int) -> List[int]:
+        """
+        Card IDs with a name or name word starting with query (normalized).
+        Looks at no more than scan_limit keys, so the cost is bounded however
+        large the collection is.
+        """
+        key = normalize_name(query)
+        found: Dict[int, None] = {}
+        i = bisect.bisect_left(self.keys, (key, -1))
+        end = min(len(self.keys), i + scan_limit)
+        while i < end and len(found) < limit:
+            token, card_id = self.keys[i]
+            if not token.startswith(key):
+                break
+            found[card_id] = None
+            i += 1
+        return list(found)
+
+class OwnedCardIndex:
+    """
+    Per-user prefix indexes of owned cards for slash-command autocomplete.
+    A user's index is built on their first lookup with one query for their
+    card IDs (names come from the card catalog), then kept current by
+    CollectionOps as grants and removals commit. Indexes are kept for
+    the most recently active users only. Suggestions are hints: commands
+    still check ownership when they run.
+    """
+
+    def __init__(self, index: CardIndex, max_users: int = None):
+        self.index = index
+        self.max_users = max_users or config.OWNED_INDEX_MAX_USERS
+        self._users: 'OrderedDict[int, UserCardIndex]' = OrderedDict()
+        self._building: Dict[int, asyncio.Task] = {}
+        self._changes: Dict[int, int] = {}  # Updates seen during a user's build, so a stale build isn't kept
+
+    async def _build(self, user_id: int) -> UserCardIndex:
+        await self.index.ensure_loaded()
+        changes = self._changes.get(user_id, 0)
+        async with session_scope() as session:
+            result = await session.execute(select(Collection.card_id).where(Collection.user_id == user_id))
+            card_ids = result.scalars().all()
+
+        by_id = self.index.by_id
+        user_index = UserCardIndex((by_id[card_id] for card_id in card_ids if card_id in by_id),
+                                   self.index.version)
+        if self._changes.get(user_id, 0) != changes:
+            # The collection changed mid-build; answer this lookup but rebuild next time
+            return user_index
+        self._users[user_id] = user_index
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        return user_index
+
+    async def get(self, user_id: int) -> UserCardIndex:
+        """A user's index, building it if needed. Concurrent callers share one build."""
+        user_index = self._users.get(user_id)
+        if user_index is not None and user_index.version == self.index.version:
+            self._users.move_to_end(user_id)
+            return user_index
+
+        task = self._building.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._build(user_id))
+            self._building[user_id] = task
+            task.add_done_callback(lambda _: self._build_done(user_id))
+        # Shielded so a caller giving up on its time budget doesn't cancel the build
+        return await asyncio.shield(task)
+
+    def _build_done(self, user_id: int):
+        self._building.pop(user_id, None)
+        self._changes.pop(user_id, None)
+
+    def _changed(self, user_id: int):
+        if user_id in self._building:
+            self._changes[user_id] = self._changes.get(user_id, 0) + 1
+
+    async def suggest(self, user_id: int, query: str, limit: int = 25) -> List[CardRecord]:
+        """
+        Owned cards for an autocomplete query.
+        An empty query lists the best-rated cards; otherwise names or name words
+        starting with the query, in name order.
+        """
+        user_index = await self.get(user_id)
+        by_id = self.index.by_id
+        if not normalize_name(query):
+            cards = (by_id[card_id] for card_id in user_index.card_ids if card_id in by_id)
+            return heapq.nsmallest(limit, cards, key=lambda card: (-card.overall_rating, card.name))
+
+        card_ids = user_index.prefix(query, limit, config.OWNED_INDEX_SCAN_LIMIT)
+        return [by_id[card_id] for card_id in card_ids if card_id in by_id]
+
+    def added(self, user_id: int, card_ids: Iterable[int]):
+        """Cards now owned by a user (no-op if their index isn't built)"""
+        self._changed(user_id)
+        user_index = self._users.get(user_id)
+        if user_index is None:
+            return
+        for card_id in card_ids:
+            card = self.index.by_id.get(card_id)
+            if card is None:
+                # Not in the catalog yet; rebuild on next lookup
+                self._users.pop(user_id, None)
+                return
+            user_index.add(card)
+
+    def removed(self, user_id: int, card_ids: Iterable[int]):
+        """Cards a user no longer owns any copies of (no-op if their index isn't built)"""
+        self._changed(user_id)
+        user_index = self._users.get(user_id)
+        if user_index is None:
+            return
+        for card_id in card_ids:
+            card = self.index.by_id.get(card_id)
+            if card is None:
+                self._users.pop(user_id, None)
+                return
+            user_index.remove(card)
+
+    def invalidate(self, user_id: int):
+        """Drop a user's index; it is rebuilt on next lookup"""
+        self._users.pop(user_id, None)
+
+# Process-wide owned-card indexes
+owned_cards = OwnedCardIndex(card_index)
+
+async def owned_card_choices(user_id: int, current: str) -> List[app_commands.Choice[str]]:
+    """
+    Autocomplete choices from a user's owned cards.
+    Gives up after config.AUTOCOMPLETE_BUDGET_SECONDS so the reply stays inside
+    Discord's 3 second window; a slow first build carries on for later keystrokes.
+    """
+    try:
+        cards = await asyncio.wait_for(owned_cards.suggest(user_id, current),
+                                       config.AUTOCOMPLETE_BUDGET_SECONDS)
+    except asyncio.TimeoutError:
+        return []
+    except Exception as e:
+        logger.error(f"Error building autocomplete for {user_id}: {e}")
+        return []
+    return [
+        app_commands.Choice(name=f"{card.name} ({card.overall_rating} {card.position})"[:100], value=card.name[:100])
+        for card in cards
+    ]
@@ -0,0 +1,125 @@
+import logging
+from typing import List, Optional, Tuple
+from sqlalchemy import select
+from database.database import session_scope
+from database.models import PlayerRating
+import config
+
+logger = logging.getLogger('ratings')
+
+# Ratings are bucketed to whole points inside this range for the rank index
+RATING_FLOOR = 0
+RATING_CEILING = 4000
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    """Elo win expectancy of a player against an opponent"""
+    return 1.0 / (1.0 + 10 ** ((opponent_rating - rating) / 400.0))
+
+def k_factor(games: int) -> int:
+    """K-factor for a player with this many rated games"""
+    if games < config.RATING_PROVISIONAL_GAMES:
+        return config.RATING_K_PROVISIONAL
+    return config.RATING_K_FACTOR
+
+def rate_match(rating1: float, games1: int, rating2: float, games2: int,
+               score1: float) -> Tuple[float, float]:
+    """
+    New ratings for both players after one match.
+    score1 is player 1's result: 1 win, 0.5 draw, 0 loss.
+    """
+    expected1 = expected_score(rating1, rating2)
+    new1 = rating1 + k_factor(games1) * (score1 - expected1)
+    new2 = rating2 + k_factor(games2) * ((1 - score1) - (1 - expected1))
+    return new1, new2
+
+def match_score(player1_id: int, winner_id: Optional[int]) -> float:
+    """Player 1's Elo result for a match"""
+    if winner_id is None:
+        return 0.5
+    return 1.0 if winner_id == player1_id else 0.0
+
+class RatingIndex:
+    """
+    Global rating distribution for rank and percentile lookups.
+    A Fenwick tree of player counts per whole rating point, so adding, moving
+    and ranking a rating are O(log R) with R the rating range, no matter how
+    many players are rated. Only counts are kept, not per-user entries.
+    """
+
+    def __init__(self, floor: int = RATING_FLOOR, ceiling: int = RATING_CEILING):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.size = ceiling - floor + 1
+        self._tree: List[int] = [0] * (self.size + 1)
+        self.total = 0
+        self.loaded = False
+
+    def _bucket(self, rating: float) -> int:
+        """1-based tree slot for a rating"""
+        return min(max(int(rating), self.floor), self.ceiling) - self.floor + 1
+
+    def _add_at(self, slot: int, delta: int):
+        while slot <= self.size:
+            self._tree[slot] += delta
+            slot += slot & -slot
+
+    def _count_through(self, slot: int) -> int:
+        """Players in slots 1..slot"""
+        count = 0
+        while slot > 0:
+            count += self._tree[slot]
+            slot -= slot & -slot
+        return count
+
+    def add(self, rating: float):
+        """Count a newly rated player"""
+        self._add_at(self._bucket(rating), 1)
+        self.total += 1
+
+    def move(self, old_rating: Optional[float], new_rating: float):
+        """Move a player from old_rating to new_rating (None if they weren't rated)"""
+        if old_rating is None:
+            self.add(new_rating)
+            return
+        old_slot, new_slot = self._bucket(old_rating), self._bucket(new_rating)
+        if old_slot != new_slot:
+            self._add_at(old_slot, -1)
+            self._add_at(new_slot, 1)
+
+    def rank(self, rating: float) -> int:
+        """1-based global rank: one more than the players rated in a higher bucket"""
+        return self.total - self._count_through(self._bucket(rating)) + 1
+
+    def percentile(self, rating: float) -> float:
+        """Share of rated players (0-100) at or below this rating's bucket"""
+        if not self.total:
+            return 100.0
+        return self._count_through(self._bucket(rating)) / self.total * 100
+
+    def build(self, counts: List[int]):
+        """Replace the tree from per-slot counts in O(R)"""
+        tree = [0] + counts
+        for slot in range(1, self.size + 1):
+            parent = slot + (slot & -slot)
+            if parent <= self.size:
+                tree[parent] += tree[slot]
+        self._tree = tree
+        self.total = sum(counts)
+
+    async def load(self, batch_size: int = 10000):
+        """Build the index by streaming every stored rating"""
+        counts = [0] * self.size
+        async with session_scope() as session:
+            result = await session.stream(
+                select(PlayerRating.rating).execution_options(yield_per=batch_size)
+            )
+            async for partition in result.partitions():
+                for (rating,) in partition:
+                    counts[self._bucket(rating) - 1] += 1
+
+        self.build(counts)
+        self.loaded = True
+        logger.info(f"Rating index loaded with {self.total} players")
+
+# Process-wide rating index
+rating_index = RatingIndex()
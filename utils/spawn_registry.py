@@ -0,0 +1,122 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+import config
+
+logger = logging.getLogger('spawn_registry')
+
+def to_timestamp(value: datetime) -> float:
+    """Convert a stored datetime to a Unix timestamp (naive values are UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class ActiveSpawn:
+    """A spawned card that can still be caught"""
+
+    __slots__ = ('message_id', 'guild_id', 'channel_id', 'spawned_card_id', 'card', 'expires_at', 'view')
+
+    def __init__(self, message_id: int, guild_id: int, channel_id: int, spawned_card_id: int,
+                 card, expires_at: float, view=None):
+        self.message_id = message_id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.spawned_card_id = spawned_card_id
+        self.card = card
+        self.expires_at = expires_at  # Unix timestamp
+        self.view = view
+
+class SpawnRegistry:
+    """
+    Active spawns keyed by message ID, expired by one background task.
+    Deadlines live in a min-heap; the task sleeps until the earliest one and
+    expires everything that is due in a single batch.
+    """
+
+    def __init__(self, on_expire: Callable[[List[ActiveSpawn]], Awaitable[None]],
+                 batch_window: float = None):
+        self.on_expire = on_expire
+        self.batch_window = batch_window if batch_window is not None else config.SPAWN_EXPIRY_BATCH_SECONDS
+        self.spawns: Dict[int, ActiveSpawn] = {}
+        self._heap: List[tuple] = []  # [(expires_at, message_id)]
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def __contains__(self, message_id: int) -> bool:
+        return message_id in self.spawns
+
+    def __len__(self) -> int:
+        return len(self.spawns)
+
+    def add(self, spawn: ActiveSpawn):
+        """Register a spawn and schedule its expiry"""
+        self.spawns[spawn.message_id] = spawn
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (spawn.expires_at, spawn.message_id))
+
+        # Wake the scheduler if this deadline is now the earliest
+        if earliest is None or spawn.expires_at < earliest:
+            self._wakeup.set()
+
+    def get(self, message_id: int) -> Optional[ActiveSpawn]:
+        """Get an active spawn"""
+        return self.spawns.get(message_id)
+
+    def remove(self, message_id: int) -> Optional[ActiveSpawn]:
+        """Remove a spawn (e.g. when caught). Its heap entry is skipped lazily."""
+        return self.spawns.pop(message_id, None)
+
+    def _pop_due(self, now: float) -> List[ActiveSpawn]:
+        """Pop every spawn whose deadline has passed"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, message_id = heapq.heappop(self._heap)
+            spawn = self.spawns.get(message_id)
+            # Skip caught spawns and stale entries
+            if spawn is not None and spawn.expires_at == expires_at:
+                del self.spawns[message_id]
+                due.append(spawn)
+        return due
+
+    async def _run(self):
+        """Scheduler loop"""
+        while True:
+            self._wakeup.clear()
+
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            # Sleep a little past the earliest deadline so neighbours expire together
+            delay = self._heap[0][0] + self.batch_window - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due = self._pop_due(time.time())
+            if due:
+                try:
+                    await self.on_expire(due)
+                except Exception as e:
+                    logger.error(f"Error expiring {len(due)} spawns: {e}")
+
+    def start(self):
+        """Start the expiry scheduler"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the expiry scheduler"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
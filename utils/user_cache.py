@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+import discord
+import config
+
+logger = logging.getLogger('user_cache')
+
+class UserDisplay:
+    """The parts of a Discord user needed to show them in messages"""
+
+    __slots__ = ('id', 'name', 'display_name')
+
+    def __init__(self, user_id: int, name: str, display_name: str):
+        self.id = user_id
+        self.name = name
+        self.display_name = display_name
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    @classmethod
+    def from_user(cls, user) -> 'UserDisplay':
+        return cls(user.id, user.name, getattr(user, 'display_name', user.name))
+
+    @classmethod
+    def placeholder(cls, user_id: int) -> 'UserDisplay':
+        return cls(user_id, f"User {user_id}", f"User {user_id}")
+
+class UserCache:
+    """
+    TTL + LRU cache of user display info.
+    Lookups try the cache, then discord.py's user/member caches, and only
+    then fall back to a gateway member query or REST fetch.
+    """
+
+    def __init__(self, bot, ttl: int = None, max_size: int = None):
+        self.bot = bot
+        self.ttl = ttl or config.USER_CACHE_TTL_SECONDS
+        self.max_size = max_size or config.USER_CACHE_MAX_SIZE
+        self._entries: 'OrderedDict[int, Tuple[UserDisplay, float]]' = OrderedDict()
+        self._pending: Dict[int, asyncio.Future] = {}
+
+        self.hits = 0        # Served from this cache
+        self.local_hits = 0  # Served from discord.py's in-memory caches
+        self.misses = 0      # Needed a gateway query or REST fetch
+        self.fetch_errors = 0
+
+    def remember(self, user) -> UserDisplay:
+        """Store (or refresh) a user or member object we already have"""
+        display = user if isinstance(user, UserDisplay) else UserDisplay.from_user(user)
+        self._entries[display.id] = (display, time.monotonic() + self.ttl)
+        self._entries.move_to_end(display.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return display
+
+    def peek(self, user_id: int, guild: Optional[discord.Guild] = None) -> Optional[UserDisplay]:
+        """Look a user up without any network calls"""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            display, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return display
+            del self._entries[user_id]
+
+        user = (guild.get_member(user_id) if guild else None) or self.bot.get_user(user_id)
+        if user is not None:
+            self.local_hits += 1
+            return self.remember(user)
+
+        return None
+
+    async def get(self, user_id: int, guild: Optional[discord.Guild] = None) -> UserDisplay:
+        """Get a user's display info, fetching it if it isn't cached anywhere"""
+        display = self.peek(user_id, guild)
+        if display is not None:
+            return display
+        return (await self._fetch([user_id], guild))[user_id]
+
+    async def get_many(self, user_ids: Iterable[int],
+                       guild: Optional[discord.Guild] = None) -> Dict[int, UserDisplay]:
+        """Get several users at once; misses are fetched in one batch"""
+        found = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            display = self.peek(user_id, guild)
+            if display is not None:
+                found[user_id] = display
+            else:
+                missing.append(user_id)
+
+        if missing:
+            found.update(await self._fetch(missing, guild))
+        return found
+
+    async def _fetch(self, user_ids: list, guild: Optional[discord.Guild]) -> Dict[int, UserDisplay]:
+        """Resolve uncached users, sharing in-flight lookups between callers"""
+        loop = asyncio.get_running_loop()
+        waiting = {uid: self._pending[uid] for uid in user_ids if uid in self._pending}
+        todo = [uid for uid in user_ids if uid not in waiting]
+        for uid in todo:
+            self._pending[uid] = loop.create_future()
+        self.misses += len(todo)
+
+        resolved = {}
+        try:
+            if todo:
+                resolved = await self._resolve(todo, guild)
+        finally:
+            # Unresolvable users get a placeholder so callers can still render something
+            for uid in todo:
+                self._pending.pop(uid).set_result(resolved.get(uid) or UserDisplay.placeholder(uid))
+
+        results = {uid: resolved.get(uid) or UserDisplay.placeholder(uid) for uid in todo}
+        for uid, future in waiting.items():
+            results[uid] = await future
+        return results
+
+    async def _resolve(self, user_ids: list, guild: Optional[discord.Guild]) -> Dict[int, UserDisplay]:
+        """Gateway member query for the guild first, REST for whatever is left"""
+        resolved = {}
+
+        if guild is not None:
+            for start in range(0, len(user_ids), 100):
+                try:
+                    members = await guild.query_members(user_ids=user_ids[start:start + 100], cache=True)
+                except (discord.ClientException, asyncio.TimeoutError) as e:
+                    logger.warning(f"Member query failed: {e}")
+                    break
+                for member in members:
+                    resolved[member.id] = self.remember(member)
+
+        remaining = [uid for uid in user_ids if uid not in resolved]
+        if remaining:
+            users = await asyncio.gather(
+                *(self.bot.fetch_user(uid) for uid in remaining), return_exceptions=True
+            )
+            for uid, user in zip(remaining, users):
+                if isinstance(user, Exception):
+                    self.fetch_errors += 1
+                    logger.warning(f"Could not fetch user {uid}: {user}")
+                    continue
+                resolved[uid] = self.remember(user)
+
+        return resolved
+
+    def stats(self) -> dict:
+        """Cache counters"""
+        lookups = self.hits + self.local_hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'local_hits': self.local_hits,
+            'misses': self.misses,
+            'fetch_errors': self.fetch_errors,
+            'hit_rate': round((self.hits + self.local_hits) / lookups, 3) if lookups else 0.0,
+        }